@@ -0,0 +1,144 @@
+"""
+A/B check of the prompt layout modes: input tokens and extraction results.
+
+    python -m benchmarks.ab_layout                              # Mortgage_PDF/, real OCR, Gemini
+    python -m benchmarks.ab_layout --model local:qwen2.5-7b-instruct --fail-on-regression
+    python -m benchmarks.ab_layout --offline                    # canned OCR, token counts only
+
+Each PDF is OCR'd once; every mode in --modes (the first is the baseline)
+then builds its full-document prompt, whose size is counted, and runs the
+extraction. Results are compared field by field with the recorded
+Mortgage_PDF_outputs/<stem>.json. With --fail-on-regression the script
+exits non-zero when a mode gets fewer fields right than the baseline.
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+from src.ocr import OCRService, OCRConfig
+from src.pipeline import PipelineEngine, REQUIRED_FIELDS
+from src.prompts import full_doc_prompt
+from src.llm_backends import JSON_PREAMBLE, FakeExtractor
+from src.utils.pdf_utils import pages_to_layout_json, LAYOUT_MODES
+from src.utils.tokens import count_tokens, estimate_tokens
+from src.validate import normalize
+from src.metrics import Metrics
+from benchmarks.stubs import CannedPaddleOCR, load_records, record_lines
+
+
+def _canon(value: Any) -> str:
+    if isinstance(value, list):
+        return json.dumps(sorted(_canon(v) for v in value))
+    return re.sub(r"\s+", " ", str(value)).strip().casefold() if value is not None else ""
+
+
+def field_matches(got: Dict[str, Any], expected: Dict[str, Any]) -> Dict[str, bool]:
+    """Per field: does the normalized result equal the normalized recorded value?"""
+    got, expected = normalize(dict(got)), normalize(dict(expected))
+    return {f: _canon(got.get(f)) == _canon(expected.get(f)) for f in REQUIRED_FIELDS}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pdf-dir", default="Mortgage_PDF")
+    ap.add_argument("--records", default="Mortgage_PDF_outputs", help="Expected results (<stem>.json)")
+    ap.add_argument("--modes", nargs="+", default=list(LAYOUT_MODES), choices=LAYOUT_MODES)
+    ap.add_argument("--model", default="gemini-1.5-flash", help="Extraction backend spec (see run.py --model)")
+    ap.add_argument("--llm-base-url", default=None)
+    ap.add_argument("--llm-mode", default="always", choices=["always", "fallback", "never"])
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--tokens-only", action="store_true", help="Only compare prompt sizes, no LLM calls")
+    ap.add_argument("--offline", action="store_true", help="Canned OCR from the records; implies --tokens-only")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    ap.add_argument("--out", help="Write the per-document report JSON here")
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ.setdefault("TQDM_DISABLE", "1")
+
+    records = load_records(Path(args.records))
+    pdfs = sorted(f for f in Path(args.pdf_dir).glob("*") if f.suffix.lower() == ".pdf")
+    if not pdfs:
+        sys.exit(f"No PDFs in {args.pdf_dir}")
+    run_llm = not (args.tokens_only or args.offline)
+
+    ocr = extractor = None
+    paddle = None
+    if args.offline:
+        paddle = CannedPaddleOCR()
+        ocr = OCRService(OCRConfig(dpi=args.dpi), ocr=paddle)
+        extractor = FakeExtractor()
+    engines: Dict[str, PipelineEngine] = {}
+    for mode in args.modes:
+        engines[mode] = PipelineEngine(dpi=args.dpi, model=args.model, llm_mode=args.llm_mode, layout=mode,
+                                       llm_base_url=args.llm_base_url, ocr=ocr, extractor=extractor)
+        ocr, extractor = engines[mode].ocr, (engines[mode].extractor if run_llm else extractor)
+
+    base = args.modes[0]
+    report: List[Dict[str, Any]] = []
+    totals = {m: {"tokens": 0, "tokens_4c": 0, "input_tokens": 0, "matched": 0, "fields": 0} for m in args.modes}
+    print(f"{'document':<40}{'mode':<9}{'tokens':>8}{'~4c':>8}{'billed':>8}{'fields ok':>11}")
+    for pdf in pdfs:
+        expected = records.get(pdf.stem)
+        if paddle is not None:
+            paddle.use(record_lines(expected or {}, 40, 1))
+        cleaned, meta = engines[base].ocr_document(str(pdf))
+        row: Dict[str, Any] = {"file": pdf.name, "pages": meta["pages"], "modes": {}}
+        for mode in args.modes:
+            prompt = JSON_PREAMBLE + full_doc_prompt(pages_to_layout_json(cleaned, mode))
+            rec: Dict[str, Any] = {"prompt_chars": len(prompt), "tokens": count_tokens(prompt),
+                                   "tokens_4c": estimate_tokens(prompt)}
+            if run_llm:
+                metrics = Metrics(pdf.name)
+                try:
+                    result = engines[mode].extract_document(cleaned, dict(meta), metrics)
+                    rec["result"] = result.data
+                except Exception as e:
+                    rec["error"] = str(e)
+                summary = metrics.summary()
+                rec["llm_calls"] = summary["llm_calls"]
+                rec["input_tokens"] = summary["input_tokens"]
+                rec["prompt_tokens_est"] = summary["prompt_tokens_est"]
+                if expected is not None and "result" in rec:
+                    rec["fields_ok"] = field_matches(rec["result"], expected)
+            row["modes"][mode] = rec
+            t = totals[mode]
+            t["tokens"] += rec["tokens"]
+            t["tokens_4c"] += rec["tokens_4c"]
+            t["input_tokens"] += rec.get("input_tokens") or 0
+            if "fields_ok" in rec:
+                t["matched"] += sum(rec["fields_ok"].values())
+                t["fields"] += len(rec["fields_ok"])
+            ok = f"{sum(rec['fields_ok'].values())}/{len(rec['fields_ok'])}" if "fields_ok" in rec else "-"
+            print(f"{pdf.name[:39]:<40}{mode:<9}{rec['tokens']:>8}{rec['tokens_4c']:>8}"
+                  f"{rec.get('input_tokens') or '-':>8}{ok:>11}")
+        if run_llm and len(args.modes) > 1 and all("result" in r for r in row["modes"].values()):
+            row["modes_agree"] = len({json.dumps(normalize(dict(r["result"])), sort_keys=True, default=str)
+                                      for r in row["modes"].values()}) == 1
+        report.append(row)
+
+    print(f"\n{'mode':<9}{'tokens':>10}{'vs ' + base:>10}{'billed':>10}{'fields ok':>12}")
+    regressions = []
+    for mode, t in totals.items():
+        ratio = t["tokens"] / totals[base]["tokens"] if totals[base]["tokens"] else 0.0
+        ok = f"{t['matched']}/{t['fields']}" if t["fields"] else "-"
+        print(f"{mode:<9}{t['tokens']:>10}{ratio:>9.0%} {t['input_tokens'] or '-':>10}{ok:>12}")
+        if t["fields"] and t["matched"] < totals[base]["matched"]:
+            regressions.append(mode)
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"totals": totals, "documents": report}, indent=2,
+                                             ensure_ascii=False, default=str), encoding="utf-8")
+        print(f"Report -> {args.out}")
+    if regressions:
+        print(f"Fewer correct fields than {base}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
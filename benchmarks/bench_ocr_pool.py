@@ -0,0 +1,54 @@
+"""
+Pages/sec scaling of OCRPool vs. the single-process OCRService.
+
+    python -m benchmarks.bench_ocr_pool Mortgage_PDF/some.pdf --workers 1 2 4 8
+
+Each configuration OCRs the same rendered pages; pool start-up (PaddleOCR
+load in every worker) is excluded by warming the pool on one page first.
+"""
+import argparse
+import os
+import time
+
+from src.ocr import OCRService, OCRConfig, render_pdf
+from src.ocr_pool import OCRPool
+
+
+def _bench_service(cfg, images):
+    ocr = OCRService(cfg)
+    t0 = time.perf_counter()
+    ocr.run(images)
+    return time.perf_counter() - t0
+
+
+def _bench_pool(cfg, images, workers):
+    with OCRPool(cfg, processes=workers) as pool:
+        pool.run(images[:1] * workers)  # warm every worker's model
+        t0 = time.perf_counter()
+        pool.run(images)
+        return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("pdf")
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=1, help="Repeat the PDF's pages N times")
+    ap.add_argument("--workers", type=int, nargs="+",
+                    default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = ap.parse_args()
+
+    cfg = OCRConfig(dpi=args.dpi)
+    images = render_pdf(args.pdf, args.dpi) * args.repeat
+    n = len(images)
+    print(f"{n} pages @ {args.dpi} DPI, {os.cpu_count()} CPUs")
+
+    base = _bench_service(cfg, images)
+    print(f"{'OCRService':>12}  {n / base:8.2f} pages/s  (1.00x)")
+    for w in args.workers:
+        dt = _bench_pool(cfg, images, w)
+        print(f"{'pool x' + str(w):>12}  {n / dt:8.2f} pages/s  ({base / dt:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
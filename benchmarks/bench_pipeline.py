@@ -0,0 +1,225 @@
+"""
+Offline end-to-end pipeline benchmark with stub OCR / LLM backends.
+
+    python -m benchmarks.bench_pipeline --synthetic 4 --pages 5
+    python -m benchmarks.bench_pipeline --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --baseline benchmarks/baseline.json --fail-on-regression
+
+Runs the real rendering, preprocessing, layout and normalization code over
+Mortgage_PDF/ plus synthetic image-only PDFs, with PaddleOCR replaced by
+canned results and Gemini by a model that replays Mortgage_PDF_outputs/*.json
+(see benchmarks/stubs.py), so it needs no GPU, model download or network.
+Reports pages/sec, per-stage and per-function latency percentiles and peak
+RSS, and compares against a stored baseline JSON.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from src.ocr import OCRService, OCRConfig, render_pdf
+from src.gemini_extractor import GeminiExtractor
+from src.pipeline import PipelineEngine
+from src.preprocess import preprocess_pages, page_as_layout_text
+from src.validate import normalize
+from src.metrics import peak_rss_mb
+from benchmarks.stubs import (CannedPaddleOCR, ReplayChatModel, load_records,
+                              record_lines, write_synthetic_pdf)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    v = sorted(values)
+
+    def q(p: float) -> float:
+        return v[min(len(v) - 1, int(round(p * (len(v) - 1))))]
+
+    return {"n": len(v), "mean": round(sum(v) / len(v), 6),
+            "p50": round(q(0.5), 6), "p90": round(q(0.9), 6), "p99": round(q(0.99), 6)}
+
+
+def _timed(fn, *args) -> float:
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def build_corpus(args, records: Dict[str, Dict[str, Any]], tmp: Path) -> List[Dict[str, Any]]:
+    """[{pdf, record, pages: canned OCR lines per page}] for real and synthetic PDFs."""
+    recs = list(records.values()) or [{}]
+    docs: List[Dict[str, Any]] = []
+    if not args.no_real:
+        for i, pdf in enumerate(sorted(f for f in Path(args.pdf_dir).glob("*") if f.suffix.lower() == ".pdf")):
+            rec = records.get(pdf.stem, recs[i % len(recs)])
+            docs.append({"pdf": pdf, "record": rec, "pages": record_lines(rec, args.lines, 1, seed=i)})
+    for i in range(args.synthetic):
+        rec = recs[i % len(recs)]
+        pages = record_lines(rec, args.lines, args.pages, seed=1000 + i)
+        pdf = write_synthetic_pdf(tmp / f"synthetic_{i:03d}.pdf", pages)
+        docs.append({"pdf": pdf, "record": rec, "pages": pages})
+    return docs
+
+
+def bench_pipeline(engine: PipelineEngine, paddle: CannedPaddleOCR, llm: ReplayChatModel,
+                   docs: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    stages: Dict[str, List[float]] = {}
+    doc_s: List[float] = []
+    pages = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for d in docs:
+            paddle.use(d["pages"])
+            llm.use(d["record"])
+            t = time.perf_counter()
+            result = engine.process_document(str(d["pdf"]))
+            doc_s.append(time.perf_counter() - t)
+            pages += result.meta["pages"]
+            for name, rec in result.meta["metrics"]["stages"].items():
+                stages.setdefault(name, []).append(rec["wall_s"])
+    total = time.perf_counter() - t0
+    return {"documents": len(doc_s), "pages": pages, "seconds": round(total, 4),
+            "pages_per_s": round(pages / total, 3) if total else 0.0,
+            "doc_s": percentiles(doc_s),
+            "stages": {k: percentiles(v) for k, v in sorted(stages.items())}}
+
+
+def bench_functions(ocr: OCRService, paddle: CannedPaddleOCR, docs: List[Dict[str, Any]],
+                    dpi: int, repeat: int) -> Dict[str, Any]:
+    """Per-call latency of the hot functions, each measured in isolation."""
+    timings: Dict[str, List[float]] = {k: [] for k in (
+        "pdf_to_images", "run_page", "preprocess_pages", "page_as_layout_text", "normalize")}
+    for _ in range(repeat):
+        for d in docs:
+            paddle.use(d["pages"])
+            t = time.perf_counter()
+            images = render_pdf(str(d["pdf"]), dpi, ocr.cfg.max_side)
+            timings["pdf_to_images"].append(time.perf_counter() - t)
+            raw = []
+            for i, img in enumerate(images):
+                t = time.perf_counter()
+                raw.append(ocr.run_page(i, img))
+                timings["run_page"].append(time.perf_counter() - t)
+            del images
+            t = time.perf_counter()
+            cleaned = preprocess_pages(raw)
+            timings["preprocess_pages"].append(time.perf_counter() - t)
+            for p in cleaned:
+                timings["page_as_layout_text"].append(_timed(page_as_layout_text, p))
+            timings["normalize"].append(_timed(normalize, d["record"]))
+    return {k: percentiles(v) for k, v in timings.items()}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_time: float = 0.001) -> List[str]:
+    """
+    Human-readable regressions (slower than baseline by more than `tolerance`).
+    Latencies below `min_time` seconds on both sides are timer noise and skipped.
+    """
+    out: List[str] = []
+
+    def check(name: str, new: float, old: float, higher_is_better: bool = False, timed: bool = True) -> None:
+        if not old or not new or (timed and max(old, new) < min_time):
+            return
+        ratio = (old / new) if higher_is_better else (new / old)
+        mark = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        print(f"  {name:<40} {old:>12.6g} -> {new:<12.6g} {ratio:6.2f}x  {mark}")
+        if mark != "ok":
+            out.append(name)
+
+    print(f"\nvs. baseline ({baseline.get('created', '?')}), tolerance {tolerance:.0%}:")
+    check("pipeline.pages_per_s", report["pipeline"]["pages_per_s"],
+          baseline.get("pipeline", {}).get("pages_per_s", 0), higher_is_better=True, timed=False)
+    for section in ("stages", "doc_s"):
+        new_sec = report["pipeline"][section]
+        old_sec = baseline.get("pipeline", {}).get(section, {})
+        if section == "doc_s":
+            new_sec, old_sec = {"doc": new_sec}, {"doc": old_sec}
+        for k, v in new_sec.items():
+            check(f"pipeline.{section}.{k}.p50", v.get("p50", 0), old_sec.get(k, {}).get("p50", 0))
+    for k, v in report["functions"].items():
+        check(f"functions.{k}.p50", v.get("p50", 0), baseline.get("functions", {}).get(k, {}).get("p50", 0))
+    check("peak_rss_mb", report.get("peak_rss_mb") or 0, baseline.get("peak_rss_mb") or 0, timed=False)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pdf-dir", default="Mortgage_PDF")
+    ap.add_argument("--records", default="Mortgage_PDF_outputs", help="Recorded JSON replayed by the fake LLM")
+    ap.add_argument("--no-real", action="store_true", help="Only use synthetic PDFs")
+    ap.add_argument("--synthetic", type=int, default=3, help="Number of synthetic PDFs")
+    ap.add_argument("--pages", type=int, default=4, help="Pages per synthetic PDF")
+    ap.add_argument("--lines", type=int, default=40, help="Canned OCR lines per page")
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--llm-mode", default="always", choices=["always", "fallback", "never"])
+    ap.add_argument("--ocr-latency", type=float, default=0.0, help="Seconds the fake OCR sleeps per page")
+    ap.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the fake LLM sleeps per call")
+    ap.add_argument("--out", help="Write the report JSON here")
+    ap.add_argument("--save-baseline", help="Store this run as the baseline JSON")
+    ap.add_argument("--baseline", help="Compare against this baseline JSON")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown vs. baseline")
+    ap.add_argument("--min-time", type=float, default=0.001, help="Ignore latencies below this (seconds)")
+    ap.add_argument("--fail-on-regression", action="store_true")
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    records = load_records(Path(args.records))
+    paddle = CannedPaddleOCR(latency=args.ocr_latency)
+    llm = ReplayChatModel(latency=args.llm_latency)
+    cfg = OCRConfig(dpi=args.dpi)
+    ocr = OCRService(cfg, ocr=paddle)
+    engine = PipelineEngine(dpi=args.dpi, ocr_cfg=cfg, llm_mode=args.llm_mode, ocr=ocr,
+                            extractor=GeminiExtractor(model="replay", retries=1, delay=0, llm=llm))
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        docs = build_corpus(args, records, Path(tmp))
+        if not docs:
+            sys.exit("No PDFs to benchmark (empty --pdf-dir and --synthetic 0)")
+        print(f"{len(docs)} documents, {len(records)} recorded results, {os.cpu_count()} CPUs")
+        paddle.use(docs[0]["pages"])
+        llm.use(docs[0]["record"])
+        engine.process_document(str(docs[0]["pdf"]))  # warm-up (imports, allocator)
+
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "env": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+            "params": {k: getattr(args, k) for k in ("synthetic", "pages", "lines", "dpi", "repeat",
+                                                     "llm_mode", "ocr_latency", "llm_latency", "no_real")},
+            "pipeline": bench_pipeline(engine, paddle, llm, docs, args.repeat),
+            "functions": bench_functions(ocr, paddle, docs, args.dpi, args.repeat),
+            "llm_calls": llm.calls,
+        }
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    p = report["pipeline"]
+    print(f"\n{p['pages']} pages in {p['seconds']:.2f}s -> {p['pages_per_s']:.2f} pages/s, "
+          f"peak RSS {report['peak_rss_mb']} MB")
+    print(f"{'':<24}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+    for label, table in (("stage", p["stages"]), ("fn", report["functions"])):
+        for k, v in table.items():
+            print(f"{label + ' ' + k:<24}{v['p50'] * 1e3:>10.2f}{v['p90'] * 1e3:>10.2f}{v['p99'] * 1e3:>10.2f}")
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        Path(path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report -> {path}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text(encoding="utf-8")),
+                              args.tolerance, args.min_time)
+        if regressions and args.fail_on_regression:
+            sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
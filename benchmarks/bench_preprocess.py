@@ -0,0 +1,125 @@
+"""
+Text normalizer microbenchmark and differential check.
+
+    python -m benchmarks.bench_preprocess --pages 200 --lines 60
+
+Compares preprocess.TextNormalizer (one combined pass per stage over a
+whole page) with the original per-line chain of re.sub / str.replace
+calls, kept below as the reference. Every line of a deed-like corpus plus
+random strings built from the characters the rules care about must come
+out identical; the script exits non-zero on any difference.
+tests/test_preprocess.py runs the same check (reference, corpus, edge
+lines) under pytest.
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Callable, List
+
+from src.preprocess import TextNormalizer, fix_common_misreads, preprocess_pages
+from benchmarks.stubs import load_records, record_lines
+
+_FUZZ_ALPHABET = "OOoIlS0123456789$,. NMLSnmls#:“”’—–ab\t"
+# NMLS prefixes the fuzz rarely assembles, in both cases of O
+_EDGE_LINES = ["NMLS o123", "nmls# O45", "NMLS: o7", "NMLS#o0", "Nmls ID o3901", "NMLSo", "NMLS oO1"]
+
+
+def reference_fix(text: str) -> str:
+    """fix_common_misreads as it was before TextNormalizer (one pass per rule)."""
+    t = text
+    t = re.sub(r'(?<=\d)O(?=\d)', '0', t)
+    t = re.sub(r'(?<=\$)O(?=\d)', '0', t)
+    t = re.sub(r'(NMLS[#:]?\s*)O(?=\d)', r'\g<1>0', t, flags=re.I)
+    t = re.sub(r'\bI\b', '1', t)
+    t = re.sub(r'\bl\b', '1', t)
+    t = re.sub(r'\bS\b', '5', t)
+    t = re.sub(r'(?<!\$)(\b\d{1,3}(?:,\d{3})+(?:\.\d{2})?\b)', r'$\1', t)
+    t = (t.replace('“', '"')
+           .replace('”', '"')
+           .replace('’', "'")
+           .replace('—', '-')
+           .replace('–', '-'))
+    return t.strip()
+
+
+def corpus(records_dir: str, pages: int, lines: int, fuzz: int, seed: int = 0) -> List[List[str]]:
+    """Pages of OCR-like lines: recorded deed facts and filler, then random fuzz pages."""
+    rng = random.Random(seed)
+    recs = list(load_records(Path(records_dir)).values()) or [{}]
+    out: List[List[str]] = []
+    for i in range(pages):
+        page = record_lines(recs[i % len(recs)], lines, 1, seed=i)[0]
+        out.append([_misread(rng, t) for t in page])
+    out.append(list(_EDGE_LINES))
+    for _ in range(fuzz):
+        out.append(["".join(rng.choice(_FUZZ_ALPHABET) for _ in range(rng.randint(0, 30)))
+                    for _ in range(lines)])
+    return out
+
+
+def _misread(rng: random.Random, text: str) -> str:
+    """Inject the OCR confusions the rules repair (0->O/o, 1->I/l, 5->S, quotes, dashes)."""
+    subs = {"0": rng.choice("Oo"), "1": rng.choice("Il"), "5": "S", "'": "’", "-": "—"}
+    return "".join(subs[c] if c in subs and rng.random() < 0.3 else c for c in text)
+
+
+def differential(pages: List[List[str]], norm: TextNormalizer) -> int:
+    bad = 0
+    for page in pages:
+        expected = [reference_fix(t) for t in page]
+        for got in ([fix_common_misreads(t) for t in page], norm.normalize_lines(page)):
+            for t, e, g in zip(page, expected, got):
+                if e != g:
+                    bad += 1
+                    if bad <= 10:
+                        print(f"  MISMATCH {t!r}: expected {e!r}, got {g!r}")
+    return bad
+
+
+def _best(fn: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records", default="Mortgage_PDF_outputs")
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--lines", type=int, default=60, help="Lines per page")
+    ap.add_argument("--fuzz", type=int, default=200, help="Extra pages of random strings (checked, not timed)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    norm = TextNormalizer()
+    pages = corpus(args.records, args.pages, args.lines, args.fuzz)
+    n_lines = sum(len(p) for p in pages)
+    bad = differential(pages, norm)
+    print(f"differential: {n_lines} lines, {bad} mismatches")
+
+    timed = pages[:args.pages]
+    dict_pages = [{"page_index": i, "lines": [{"text": t, "score": 0.9, "box": [[0, i], [9, i], [9, i + 1], [0, i + 1]]}
+                                              for i, t in enumerate(p)]} for i, p in enumerate(timed)]
+    n = sum(len(p) for p in timed)
+    results = {
+        "reference (per line, per rule)": _best(lambda: [[reference_fix(t) for t in p] for p in timed], args.repeat),
+        "fix_common_misreads (per line)": _best(lambda: [[fix_common_misreads(t) for t in p] for p in timed], args.repeat),
+        "normalize_lines (per page)": _best(lambda: [norm.normalize_lines(p) for p in timed], args.repeat),
+        "preprocess_pages": _best(lambda: preprocess_pages(dict_pages), args.repeat),
+    }
+    base = results["reference (per line, per rule)"]
+    print(f"\n{n} lines, best of {args.repeat}:")
+    for name, sec in results.items():
+        print(f"  {name:<34} {sec * 1e3:9.2f} ms  {n / sec:>11,.0f} lines/s  {base / sec:5.2f}x")
+    if bad:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Cold-start cost of the entry points, each in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --repeat 5
+
+Times `import src.pipeline`, `run.py --help` and an OCR worker import
+(src.ocr_pool, what every spawned pool process pays), and reports which heavy
+dependencies each one pulled in; none of them should load paddle, PyMuPDF,
+LangChain or dateparser until a PDF is actually processed.
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ["paddleocr", "paddle", "fitz", "pymupdf", "langchain_google_genai", "langchain_core",
+         "dateparser", "requests", "httpx"]
+
+PROBE = """
+import sys, time, json, runpy
+t0 = time.perf_counter()
+{body}
+dt = time.perf_counter() - t0
+print(json.dumps({{"s": dt, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+CASES = {
+    "import src.pipeline": "import src.pipeline",
+    "import src.ocr_pool (worker)": "import src.ocr_pool",
+    "run.py --help": (
+        "sys.argv = ['run.py', '--help']\n"
+        "try:\n    runpy.run_path('run.py', run_name='__main__')\n"
+        "except SystemExit:\n    pass"
+    ),
+}
+
+
+def _probe(body: str) -> dict:
+    code = PROBE.format(body=body, heavy=HEAVY)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "probe failed")
+    rec = json.loads(out.stdout.strip().splitlines()[-1])
+    rec["wall"] = wall
+    return rec
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    base = statistics.median(_probe("pass")["wall"] for _ in range(args.repeat))
+    print(f"bare interpreter: {base * 1e3:.0f} ms")
+    print(f"{'case':<32}{'import ms':>10}{'process ms':>12}  heavy modules loaded")
+    for name, body in CASES.items():
+        try:
+            runs = [_probe(body) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<32}  failed: {e}")
+            continue
+        imp = statistics.median(r["s"] for r in runs)
+        wall = statistics.median(r["wall"] for r in runs)
+        print(f"{name:<32}{imp * 1e3:>10.0f}{wall * 1e3:>12.0f}  {', '.join(runs[-1]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
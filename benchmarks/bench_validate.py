@@ -0,0 +1,103 @@
+"""
+Field validation benchmark and differential check.
+
+    python -m benchmarks.bench_validate --records 20000
+
+Validates a backfill-sized batch of extracted records (the recorded
+Mortgage_PDF_outputs/*.json plus variants with the date, amount and NMLS
+values rewritten in the shapes models return) with validate.validate_records,
+and compares every field with the original is_valid, which called
+dateparser.parse for each date. Exits non-zero on any difference.
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List
+
+from src.validate import validate_records, normalize, MONEY, AMOUNT, NMLS
+from src.pipeline import REQUIRED_FIELDS
+from benchmarks.stubs import load_records
+
+_MONTH_NAMES = ["January", "February", "March", "April", "May", "June", "July",
+                "August", "September", "October", "November", "December"]
+
+
+def reference_is_valid(key: str, value: Any) -> bool:
+    """validate.is_valid with dateparser.parse for every date, as before the fast date path."""
+    if key == "loan_amount":
+        return bool(isinstance(value, str) and (MONEY.search(value) or AMOUNT.fullmatch(value.strip())))
+    if key in ("lender_nmls_id", "loan_originator_nmls_id"):
+        return bool(isinstance(value, str) and NMLS.fullmatch(value))
+    if key == "recording_date":
+        if not isinstance(value, str):
+            return False
+        import dateparser
+        return dateparser.parse(value) is not None
+    if value is None: return False
+    if isinstance(value, str) and not value.strip(): return False
+    return True
+
+
+def _date(rng: random.Random) -> Any:
+    y, m, d = rng.randint(1990, 2030), rng.randint(1, 12), rng.randint(1, 31)
+    name = _MONTH_NAMES[m - 1]
+    return rng.choice([
+        f"{m:02d}/{d:02d}/{y}", f"{m}/{d}/{y}", f"{m}-{d}-{y}", f"{m}.{d}.{y}", f"{y}-{m:02d}-{d:02d}",
+        f"{name} {d}, {y}", f"{name[:3]}. {d}, {y}", f"{d} {name} {y}", f"{name} {d}th, {y}",
+        f"{d:02d}/{m:02d}/{y}", f"{m}/{d}/{y % 100:02d}", f" {m:02d}/{d:02d}/{y} ",
+        f"{m:02d}/{d:02d}/{y} 10:32 AM", "13/45/2025", "Recorded April", "", None, "N/A",
+        # zero / swapped components: dateparser still reads some of these
+        "00/12/2025", "12/00/2025", f"{m:02d}/00/{y}", "2025-13-01", f"{y}-{d:02d}-{m:02d}", f"{name} 0, {y}",
+    ])
+
+
+def corpus(records_dir: str, n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    recs = list(load_records(Path(records_dir)).values()) or [{}]
+    out = []
+    for i in range(n):
+        rec = dict(recs[i % len(recs)])
+        if i >= len(recs):
+            rec["recording_date"] = _date(rng)
+            rec["loan_amount"] = rng.choice(["$475,950.00", "475950.00", "$ 1,200", "USD 300,000", None])
+            rec["lender_nmls_id"] = rng.choice(["3901", "NMLS# 3901", "12345678", "", None])
+        out.append(rec)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--records-dir", default="Mortgage_PDF_outputs")
+    ap.add_argument("--records", type=int, default=20000)
+    args = ap.parse_args()
+
+    records = corpus(args.records_dir, args.records)
+    t0 = time.perf_counter()
+    fast = validate_records(records, REQUIRED_FIELDS)
+    t_fast = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    reference = [{k: reference_is_valid(k, rec.get(k)) for k in REQUIRED_FIELDS}
+                 for rec in (normalize(r) for r in records)]
+    t_ref = time.perf_counter() - t0
+
+    bad = 0
+    for (rec, got), expected in zip(fast, reference):
+        for k in REQUIRED_FIELDS:
+            if got[k] != expected[k]:
+                bad += 1
+                if bad <= 10:
+                    print(f"  MISMATCH {k}={rec.get(k)!r}: expected {expected[k]}, got {got[k]}")
+    n_dates = sum(1 for r in records if isinstance(r.get("recording_date"), str))
+    print(f"differential: {len(records)} records, {len(records) * len(REQUIRED_FIELDS)} fields, {bad} mismatches")
+    print(f"  reference (dateparser per date)  {t_ref:8.2f} s  {len(records) / t_ref:>10,.0f} records/s")
+    print(f"  validate_records                 {t_fast:8.2f} s  {len(records) / t_fast:>10,.0f} records/s"
+          f"  {t_ref / t_fast:6.1f}x  ({n_dates} date strings)")
+    if bad:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
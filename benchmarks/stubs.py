@@ -0,0 +1,205 @@
+"""
+Offline stand-ins for the two external backends, so the pipeline can be
+benchmarked on a CPU-only box with no network:
+
+* CannedPaddleOCR -- PaddleOCR-compatible .ocr() (2.7.3 det/rec contract)
+  returning canned lines laid out on the page image (optionally sleeping to
+  emulate model time).
+* ReplayChatModel -- chat model whose .invoke() replays recorded extraction
+  JSON (e.g. Mortgage_PDF_outputs/*.json) instead of calling Gemini.
+
+Plus helpers to turn a recorded result into deed-like OCR lines and to write
+synthetic image-only (scanned-looking) multi-page PDFs.
+"""
+import io
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw
+
+from src.utils.tokens import estimate_tokens
+
+_FILLER = [
+    "THIS MORTGAGE is made this day between the Borrower and the Lender.",
+    "Borrower owes Lender the principal sum stated below plus interest.",
+    "This Security Instrument secures to Lender the repayment of the Loan.",
+    "Borrower does hereby mortgage, grant and convey to Lender the Property.",
+    "TOGETHER WITH all the improvements now or hereafter erected on the property.",
+    "UNIFORM COVENANTS. Borrower and Lender covenant and agree as follows:",
+    "Payment of Principal, Interest, Escrow Items, Prepayment Charges, and Late Charges.",
+    "Application of Payments or Proceeds. Except as otherwise described herein,",
+    "Funds for Escrow Items. Borrower shall pay to Lender on the day Periodic Payments",
+    "Charges; Liens. Borrower shall pay all taxes, assessments, charges, fines,",
+]
+
+
+def load_records(folder: Path) -> Dict[str, Dict[str, Any]]:
+    """Recorded extraction results by file stem."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for f in sorted(Path(folder).glob("*.json")):
+        try:
+            data = json.loads(f.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if isinstance(data, dict) and "borrowers" in data:
+            out[f.stem] = data
+    return out
+
+
+def record_lines(record: Dict[str, Any], lines_per_page: int = 40, pages: int = 1,
+                 seed: int = 0) -> List[List[str]]:
+    """Deed-like text lines per page that carry the record's field values."""
+    rng = random.Random(seed)
+    facts = ["MORTGAGE"]
+    borrowers = record.get("borrowers") or []
+    if isinstance(borrowers, str):
+        borrowers = [borrowers]
+    if borrowers:
+        facts.append(f'"Borrower" is {" AND ".join(borrowers)}.')
+    if record.get("lender_name"):
+        facts.append(f'"Lender" is {record["lender_name"]}.')
+    amount = str(record.get("loan_amount") or "").replace("$", "").replace(",", "")
+    try:
+        facts.append(f"Principal sum of U.S. ${float(amount):,.2f}")
+    except ValueError:
+        pass
+    if record.get("recording_date"):
+        facts.append(f"Recorded {record['recording_date']} {record.get('recording_location') or ''}".strip())
+    if record.get("lender_nmls_id"):
+        facts.append(f"Lender NMLS ID {record['lender_nmls_id']}")
+    if record.get("loan_originator_nmls_id"):
+        name = record.get("loan_originator_name") or ""
+        facts.append(f"Loan Originator {name} NMLS ID {record['loan_originator_nmls_id']}".replace("  ", " "))
+
+    out: List[List[str]] = []
+    for p in range(pages):
+        lines = list(facts) if p == 0 else []
+        while len(lines) < lines_per_page:
+            lines.append(rng.choice(_FILLER))
+        out.append(lines[:lines_per_page])
+    return out
+
+
+class CannedPaddleOCR:
+    """
+    PaddleOCR stand-in with PaddleOCR 2.7.3's .ocr(img, det=, rec=, cls=)
+    contract: det+rec returns the next page of canned lines in Paddle's
+    [[box, (text, score)], ...] layout, scaled to the image size; det only
+    returns the boxes; rec only recognizes a list of crops (as Paddle does,
+    a plain list is treated as separate images and truncated to page_num,
+    so only [crops] recognizes all of them in one batch). Crops read back as
+    the last detected page's lines, in order, scoring `rec_score`.
+    `fail_full` makes the first N det+rec calls raise. Call use() to switch
+    the pages served for the next document.
+    """
+    def __init__(self, pages: Optional[List[List[str]]] = None, latency: float = 0.0,
+                 rec_score: float = 0.99, fail_full: int = 0):
+        self.latency = latency
+        self.rec_score = rec_score
+        self.fail_full = fail_full
+        self.page_num = 0
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+        self._last: List[str] = []
+        self.use(pages or [list(_FILLER)])
+
+    def use(self, pages: List[List[str]]) -> None:
+        with self._lock:
+            self._pages = pages
+            self._next = 0
+
+    def _detect(self, img: Any) -> List[List[Any]]:
+        with self._lock:
+            lines = self._pages[self._next % len(self._pages)]
+            self._next += 1
+            self._last = lines
+        if self.latency:
+            time.sleep(self.latency)
+        h, w = img.shape[:2]
+        step = h / (len(lines) + 2)
+        result = []
+        for i, text in enumerate(lines):
+            y0 = step * (i + 1)
+            x0, x1 = w * 0.08, min(w * 0.92, w * 0.08 + len(text) * w * 0.011)
+            box = [[x0, y0], [x1, y0], [x1, y0 + step * 0.7], [x0, y0 + step * 0.7]]
+            result.append([box, (text, 0.97)])
+        return result
+
+    def ocr(self, img: Any, det: bool = True, rec: bool = True, cls: bool = True) -> List[Any]:
+        if isinstance(img, list) and det:
+            raise SystemExit("When input a list of images, det must be false")
+        if isinstance(img, list):  # paddleocr.py: "for infer pdf file"
+            if self.page_num > len(img) or self.page_num == 0:
+                self.page_num = len(img)
+            imgs = img[:self.page_num]
+        else:
+            imgs = [img]
+        mode = "det+rec" if det and rec else "det" if det else "rec"
+        self.calls.append(mode)
+        if mode == "det+rec" and self.fail_full > 0:
+            self.fail_full -= 1
+            raise RuntimeError("(PreconditionNotMet) canned predictor failure")
+        if mode == "det+rec":
+            return [self._detect(im) for im in imgs]
+        if mode == "det":
+            return [[line[0] for line in self._detect(im)] for im in imgs]
+        out = []
+        for im in imgs:
+            crops = im if isinstance(im, list) else [im]
+            texts = self._last or [""]
+            out.append([(texts[min(i, len(texts) - 1)], self.rec_score) for i in range(len(crops))])
+        return out
+
+
+class _Reply:
+    def __init__(self, content: str, usage: Dict[str, int]):
+        self.content = content
+        self.usage_metadata = usage
+
+
+class ReplayChatModel:
+    """
+    Gemini stand-in: every .invoke() answers with the current recorded JSON
+    (use() switches it per document). Field prompts just read their key from it.
+    """
+    def __init__(self, record: Optional[Dict[str, Any]] = None, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.record = record or {}
+
+    def use(self, record: Dict[str, Any]) -> None:
+        self.record = record
+
+    def invoke(self, messages: List[Any]) -> _Reply:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = "".join(getattr(m, "content", str(m)) for m in messages)
+        content = "```json\n" + json.dumps(self.record, ensure_ascii=False) + "\n```"
+        return _Reply(content, {"input_tokens": estimate_tokens(prompt),
+                                "output_tokens": estimate_tokens(content)})
+
+
+def write_synthetic_pdf(path: Path, pages: List[List[str]], size=(1275, 1650)) -> Path:
+    """Image-only PDF (no text layer, like a scan) with each page's lines drawn on it."""
+    doc = fitz.open()
+    try:
+        for lines in pages:
+            img = Image.new("L", size, 255)
+            draw = ImageDraw.Draw(img)
+            step = size[1] / (len(lines) + 2)
+            for i, text in enumerate(lines):
+                draw.text((size[0] * 0.08, step * (i + 1)), text, fill=0)
+            buf = io.BytesIO()
+            img.save(buf, format="PNG")
+            page = doc.new_page(width=612, height=792)
+            page.insert_image(page.rect, stream=buf.getvalue())
+        doc.save(str(path))
+    finally:
+        doc.close()
+    return Path(path)
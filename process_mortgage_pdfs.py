@@ -1,5 +1,9 @@
+import logging
 from pathlib import Path
-from src.pipeline import run_pipeline, save_json
+from src.pipeline import PipelineEngine
+from src.batch import BatchRunner
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 # Input and output folders
 pdf_folder = Path("Mortgage_PDF")
@@ -7,30 +11,19 @@ output_folder = Path("Mortgage_PDF_outputs")
 output_folder.mkdir(exist_ok=True)
 
 # Collect all PDF files (case-insensitive)
-pdf_files = [f for f in pdf_folder.glob("*") if f.suffix.lower() == ".pdf"]
+pdf_files = sorted(f for f in pdf_folder.glob("*") if f.suffix.lower() == ".pdf")
 
 if not pdf_files:
     print(f"⚠️ No PDF files found in: {pdf_folder.resolve()}")
 else:
-    for pdf_path in pdf_files:
-        try:
-            print(f"📄 Processing {pdf_path.name}...")
-
-            # Run pipeline
-            data = run_pipeline(str(pdf_path), dpi=300, model="gemini-1.5-flash")
-
-            # Ensure pipeline returns something usable
-            if not data:
-                print(f"⚠️ No data returned for {pdf_path.name}, skipping...\n")
-                continue
-
-            # Save output JSON
-            out_path = output_folder / f"{pdf_path.stem}.json"
-            save_json(data, str(out_path))
-
-            print(f"✅ Saved JSON -> {out_path}\n")
-
-        except TypeError as te:
-            print(f"❌ Function signature mismatch while processing {pdf_path.name}: {te}\n")
-        except Exception as e:
-            print(f"❌ Unexpected error processing {pdf_path.name}: {e}\n")
+    # One engine for the whole folder: PaddleOCR and Gemini client load once.
+    # OCR of the next PDF overlaps extraction of the current one; files already
+    # processed (same content hash, see manifest.jsonl) are skipped, so an
+    # interrupted run simply resumes when started again.
+    engine = PipelineEngine(dpi=300, model="gemini-1.5-flash")
+    runner = BatchRunner(engine, output_folder, manifest_path=output_folder / "manifest.jsonl")
+    try:
+        counts = runner.run(pdf_files)
+        print(f"✅ Done: {counts} (details in {runner.manifest.path})")
+    finally:
+        engine.close()
@@ -1,21 +1,118 @@
 # cli.py
+import time
+import cProfile
 import typer
 from pathlib import Path
 import logging
-from src.pipeline import run_pipeline, save_json
+from src.ocr import OCRConfig
+from src.ocr_cache import OCRCache
+from src.llm_cache import ResponseCache, SqliteResponseCache
+from src.pipeline import PipelineEngine, save_json
+from src.batch import BatchRunner, write_json_atomic
+from src.metrics import TOTALS
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 app = typer.Typer(add_completion=False)
 
+CACHE_DIR_OPT = typer.Option(Path(".ocr_cache"), help="OCR result cache folder")
+NO_CACHE_OPT = typer.Option(False, "--no-cache", help="Bypass the OCR result cache")
+CLEAR_CACHE_OPT = typer.Option(False, "--clear-cache", help="Empty the OCR and LLM caches before running")
+LLM_CACHE_OPT = typer.Option(Path(".llm_cache.sqlite"), help="LLM response cache (sqlite file)")
+NO_LLM_CACHE_OPT = typer.Option(False, "--no-llm-cache", help="Always call the model, never reuse responses")
+CONTEXT_BUDGET_OPT = typer.Option(0, help="Send only field-relevant OCR lines, up to ~N tokens per call (0 = full document)")
+WORK_DIR_OPT = typer.Option(Path(".pipeline_work"), help="Per-stage checkpoints of unfinished documents; a rerun resumes after the last completed stage")
+NO_CHECKPOINT_OPT = typer.Option(False, "--no-checkpoint", help="Do not persist or resume stage checkpoints")
+LLM_MODE_OPT = typer.Option("always", help="always: LLM extracts all fields; fallback: rules first, LLM for the rest; never: rules only")
+MODEL_OPT = typer.Option("gemini-1.5-flash", help="Extraction backend: a Gemini model ID (LangChain), gemini-rest:<model>, "
+                         "gemini-async:<model> (pooled, rate-limited REST client), "
+                         "local:<model> (OpenAI-compatible server, see --llm-base-url), fake[:recorded.json] or rules")
+TEXT_LAYER_OPT = typer.Option(True, help="Use the PDF's own text layer instead of OCR when usable "
+                              "(pages mostly covered by scanned images are OCR'd anyway)")
+SKIP_BLANK_OPT = typer.Option(True, help="Skip OCR (and prompt space) for blank / near-blank pages")
+BLANK_MAX_INK_OPT = typer.Option(1e-4, help="Ink density at or below which a page counts as blank (raise to skip more)")
+OCR_BUDGET_OPT = typer.Option(30.0, help="Per-page time budget (s) for PaddleOCR retries on bad scans (0 = unlimited)")
+REFINE_DPI_OPT = typer.Option(0, help="Re-render low-confidence / NMLS, amount and date lines at this DPI and re-recognize "
+                              "just those crops (0 = off); pair with a lower --dpi for the first pass")
+REFINE_BELOW_OPT = typer.Option(0.85, help="With --refine-dpi: OCR confidence below which a line is refined")
+LAYOUT_OPT = typer.Option("json", help="OCR layout format in prompts: json (line dicts with pixel coordinates) "
+                          "or compact (rows on a 100x100 grid, fewer input tokens)")
+LLM_BASE_URL_OPT = typer.Option(None, help="Base URL of the OpenAI-compatible server for local:/openai: models "
+                                "(default $LOCAL_LLM_BASE_URL or http://localhost:8000/v1), or of the "
+                                "generateContent API for gemini-async: models")
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: Path = typer.Option(None, help="Profile the whole command with cProfile and dump stats here (view with snakeviz / pstats)"),
+):
+    if profile is None:
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+
+    def _dump() -> None:
+        prof.disable()
+        prof.dump_stats(str(profile))
+        logging.info(f"📊 cProfile stats -> {profile}")
+
+    ctx.call_on_close(_dump)
+
+def _ocr_config(dpi: int, cache_dir: Path, no_cache: bool, clear_cache: bool, **kw) -> OCRConfig:
+    if clear_cache:
+        OCRCache(str(cache_dir)).clear()
+    return OCRConfig(dpi=dpi, cache_dir=None if no_cache else str(cache_dir), **kw)
+
+def _llm_cache(path: Path, no_llm_cache: bool, clear_cache: bool):
+    if no_llm_cache:
+        return None
+    cache = ResponseCache(disk=SqliteResponseCache(str(path)))
+    if clear_cache:
+        cache.clear()
+    return cache
+
 @app.command()
 def extract(
     pdf: Path = typer.Argument(..., exists=True, readable=True, help="Input scanned PDF"),
     out: Path = typer.Option(None, help="Where to save the extracted JSON"),
     dpi: int = typer.Option(300, help="DPI for PDF rasterization"),
-    model: str = typer.Option("gemini-1.5-flash", help="Gemini model ID")
+    model: str = MODEL_OPT,
+    llm_base_url: str = LLM_BASE_URL_OPT,
+    text_layer: bool = TEXT_LAYER_OPT,
+    cache_dir: Path = CACHE_DIR_OPT,
+    no_cache: bool = NO_CACHE_OPT,
+    clear_cache: bool = CLEAR_CACHE_OPT,
+    llm_cache: Path = LLM_CACHE_OPT,
+    no_llm_cache: bool = NO_LLM_CACHE_OPT,
+    context_budget: int = CONTEXT_BUDGET_OPT,
+    layout: str = LAYOUT_OPT,
+    llm_mode: str = LLM_MODE_OPT,
+    work_dir: Path = WORK_DIR_OPT,
+    no_checkpoint: bool = NO_CHECKPOINT_OPT,
+    skip_blank: bool = SKIP_BLANK_OPT,
+    blank_max_ink: float = BLANK_MAX_INK_OPT,
+    ocr_budget: float = OCR_BUDGET_OPT,
+    refine_dpi: int = REFINE_DPI_OPT,
+    refine_below: float = REFINE_BELOW_OPT,
+    metrics: Path = typer.Option(None, help="Write the per-document metrics report (JSON) here"),
 ):
     logging.info(f"📄 Processing: {pdf.name} (dpi={dpi}, model={model})")
-    data = run_pipeline(str(pdf), dpi=dpi, model=model)
+    ocr_cfg = _ocr_config(dpi, cache_dir, no_cache, clear_cache, text_layer=text_layer,
+                          skip_blank=skip_blank, blank_max_ink=blank_max_ink, ocr_budget_s=ocr_budget,
+                          refine_dpi=refine_dpi, refine_below=refine_below)
+    cache = _llm_cache(llm_cache, no_llm_cache, clear_cache)
+    try:
+        engine = PipelineEngine(dpi=dpi, model=model, ocr_cfg=ocr_cfg, llm_cache=cache,
+                                context_budget=context_budget or None, llm_mode=llm_mode, layout=layout,
+                                work_dir=None if no_checkpoint else str(work_dir),
+                                llm_base_url=llm_base_url)
+        result = engine.process_document(str(pdf))
+        data = result.data
+        if metrics is not None:
+            write_json_atomic(result.meta["metrics"], metrics)
+            logging.info(f"📊 Metrics -> {metrics}")
+    except Exception as e:
+        logging.error(f"Pipeline failed for {pdf}: {e}", exc_info=True)
+        data = {}
 
     if not data:
         logging.error("❌ No data extracted. Check PDF and API settings.")
@@ -27,5 +124,131 @@ def extract(
     save_json(data, str(out))
     logging.info(f"✅ Saved extracted JSON -> {out}")
 
+@app.command()
+def batch(
+    in_dir: Path = typer.Argument(Path("Mortgage_PDF"), exists=True, file_okay=False, help="Folder of input PDFs"),
+    out_dir: Path = typer.Option(Path("Mortgage_PDF_outputs"), help="Folder for extracted JSON"),
+    dpi: int = typer.Option(300, help="DPI for PDF rasterization"),
+    model: str = MODEL_OPT,
+    llm_base_url: str = LLM_BASE_URL_OPT,
+    watch: float = typer.Option(0, help="Keep running and poll the folder every N seconds (0 = single pass)"),
+    ocr_workers: int = typer.Option(1, help="OCR worker processes (one PaddleOCR each)"),
+    extract_workers: int = typer.Option(1, help="Documents extracted concurrently while the next ones are OCR'd"),
+    manifest: Path = typer.Option(None, help="JSONL manifest (default: <out-dir>/manifest.jsonl)"),
+    force: bool = typer.Option(False, "--force", help="Reprocess files even if their output is up to date, ignoring stage checkpoints"),
+    text_layer: bool = TEXT_LAYER_OPT,
+    cache_dir: Path = CACHE_DIR_OPT,
+    no_cache: bool = NO_CACHE_OPT,
+    clear_cache: bool = CLEAR_CACHE_OPT,
+    llm_cache: Path = LLM_CACHE_OPT,
+    no_llm_cache: bool = NO_LLM_CACHE_OPT,
+    context_budget: int = CONTEXT_BUDGET_OPT,
+    layout: str = LAYOUT_OPT,
+    llm_mode: str = LLM_MODE_OPT,
+    work_dir: Path = WORK_DIR_OPT,
+    no_checkpoint: bool = NO_CHECKPOINT_OPT,
+    skip_blank: bool = SKIP_BLANK_OPT,
+    blank_max_ink: float = BLANK_MAX_INK_OPT,
+    ocr_budget: float = OCR_BUDGET_OPT,
+    refine_dpi: int = REFINE_DPI_OPT,
+    refine_below: float = REFINE_BELOW_OPT,
+    metrics_dir: Path = typer.Option(None, help="Write a <stem>.metrics.json report per document here"),
+    prometheus: Path = typer.Option(None, help="Write batch totals in Prometheus text format here after each pass"),
+):
+    """Process every PDF in a folder with one warm OCR model / LLM client; resumable."""
+    ocr_cfg = _ocr_config(dpi, cache_dir, no_cache, clear_cache,
+                          processes=ocr_workers, text_layer=text_layer,
+                          skip_blank=skip_blank, blank_max_ink=blank_max_ink, ocr_budget_s=ocr_budget,
+                          refine_dpi=refine_dpi, refine_below=refine_below)
+    cache = _llm_cache(llm_cache, no_llm_cache, clear_cache)
+    engine = PipelineEngine(dpi=dpi, model=model, ocr_cfg=ocr_cfg, llm_cache=cache,
+                            context_budget=context_budget or None, llm_mode=llm_mode, layout=layout,
+                            work_dir=None if no_checkpoint else str(work_dir),
+                            llm_base_url=llm_base_url).warm_up()
+    runner = BatchRunner(engine, out_dir, manifest_path=manifest, force=force,
+                         extract_workers=extract_workers, metrics_dir=metrics_dir)
+
+    try:
+        while True:
+            pdfs = sorted(f for f in in_dir.glob("*") if f.suffix.lower() == ".pdf")
+            runner.run(pdfs)
+            if prometheus is not None:
+                tmp = prometheus.with_name(prometheus.name + ".tmp")
+                tmp.write_text(TOTALS.to_prometheus(), encoding="utf-8")
+                tmp.replace(prometheus)
+            if watch <= 0:
+                break
+            time.sleep(watch)
+    finally:
+        if cache is not None:
+            logging.info(f"LLM cache: {cache.stats()}")
+        engine.close()
+
+@app.command()
+def serve(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on"),
+    port: int = typer.Option(8080, help="HTTP port"),
+    queue_size: int = typer.Option(8, help="Max jobs waiting; further uploads get HTTP 429"),
+    upload_dir: Path = typer.Option(Path(".uploads"), help="Where uploaded PDFs wait for processing"),
+    max_upload_mb: int = typer.Option(100, help="Reject larger uploads (HTTP 413)"),
+    dpi: int = typer.Option(300, help="DPI for PDF rasterization"),
+    model: str = MODEL_OPT,
+    llm_base_url: str = LLM_BASE_URL_OPT,
+    ocr_workers: int = typer.Option(1, help="OCR worker processes (one PaddleOCR each)"),
+    extract_workers: int = typer.Option(1, help="Documents extracted concurrently while the next ones are OCR'd"),
+    text_layer: bool = TEXT_LAYER_OPT,
+    cache_dir: Path = CACHE_DIR_OPT,
+    no_cache: bool = NO_CACHE_OPT,
+    llm_cache: Path = LLM_CACHE_OPT,
+    no_llm_cache: bool = NO_LLM_CACHE_OPT,
+    context_budget: int = CONTEXT_BUDGET_OPT,
+    layout: str = LAYOUT_OPT,
+    llm_mode: str = LLM_MODE_OPT,
+    work_dir: Path = WORK_DIR_OPT,
+    no_checkpoint: bool = NO_CHECKPOINT_OPT,
+    skip_blank: bool = SKIP_BLANK_OPT,
+    blank_max_ink: float = BLANK_MAX_INK_OPT,
+    ocr_budget: float = OCR_BUDGET_OPT,
+    refine_dpi: int = REFINE_DPI_OPT,
+    refine_below: float = REFINE_BELOW_OPT,
+):
+    """Run a local HTTP extraction service: POST PDFs to /jobs, poll or stream /jobs/<id>."""
+    from src.service import ExtractionService, serve as serve_http
+    ocr_cfg = _ocr_config(dpi, cache_dir, no_cache, False,
+                          processes=ocr_workers, text_layer=text_layer,
+                          skip_blank=skip_blank, blank_max_ink=blank_max_ink, ocr_budget_s=ocr_budget,
+                          refine_dpi=refine_dpi, refine_below=refine_below)
+    engine = PipelineEngine(dpi=dpi, model=model, ocr_cfg=ocr_cfg,
+                            llm_cache=_llm_cache(llm_cache, no_llm_cache, False),
+                            context_budget=context_budget or None, llm_mode=llm_mode, layout=layout,
+                            work_dir=None if no_checkpoint else str(work_dir),
+                            llm_base_url=llm_base_url)
+    service = ExtractionService(engine, upload_dir, max_queue=queue_size, extract_workers=extract_workers)
+    serve_http(service, host, port, max_upload_mb=max_upload_mb)
+
+@app.command()
+def validate(
+    out_dir: Path = typer.Argument(Path("Mortgage_PDF_outputs"), exists=True, file_okay=False, help="Folder of extracted JSON"),
+    fix: bool = typer.Option(False, "--fix", help="Rewrite each file with its normalized values"),
+):
+    """Re-validate (and optionally re-normalize) every extracted JSON in a folder."""
+    import json
+    from src.validate import validate_records
+    from src.pipeline import REQUIRED_FIELDS
+    files = sorted(f for f in out_dir.glob("*.json") if not f.name.endswith(".metrics.json"))
+    t0 = time.perf_counter()
+    records = [json.loads(f.read_text(encoding="utf-8")) for f in files]
+    checked = validate_records(records, REQUIRED_FIELDS)
+    invalid = {}
+    for f, original, (record, ok) in zip(files, records, checked):
+        bad = [k for k in REQUIRED_FIELDS if not ok[k]]
+        for k in bad:
+            invalid[k] = invalid.get(k, 0) + 1
+        if bad:
+            logging.info(f"{f.name}: invalid {bad}")
+        if fix and record != original:
+            write_json_atomic(record, f)
+    logging.info(f"✅ Validated {len(files)} files in {time.perf_counter() - t0:.2f}s; invalid fields: {invalid or 'none'}")
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,300 @@
+# src/async_gemini.py
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import concurrent.futures
+import httpx
+from dotenv import load_dotenv
+from src.llm_backends import LLMExtractor, Layout, Usage
+from src.prompts import full_doc_prompt, field_prompt, fields_prompt
+from src.validate import is_valid
+from src.llm_cache import ResponseCache
+from src.metrics import Metrics
+from src.utils.tokens import estimate_tokens
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Async token-bucket limiter for requests/second and tokens/minute.
+    A limit of 0 disables that bucket.
+    """
+    def __init__(self, qps: float = 0, tokens_per_minute: int = 0):
+        self.qps = qps
+        self.tpm = tokens_per_minute
+        self._req_tokens = float(max(qps, 1))
+        self._tok_tokens = float(tokens_per_minute)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        dt, self._last = now - self._last, now
+        if self.qps:
+            self._req_tokens = min(max(self.qps, 1), self._req_tokens + dt * self.qps)
+        if self.tpm:
+            self._tok_tokens = min(self.tpm, self._tok_tokens + dt * self.tpm / 60.0)
+
+    async def acquire(self, tokens: int = 1) -> None:
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # a single huge prompt must still pass eventually
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.qps and self._req_tokens < 1:
+                    wait = max(wait, (1 - self._req_tokens) / self.qps)
+                if self.tpm and self._tok_tokens < tokens:
+                    wait = max(wait, (tokens - self._tok_tokens) * 60.0 / self.tpm)
+                if wait <= 0:
+                    if self.qps:
+                        self._req_tokens -= 1
+                    if self.tpm:
+                        self._tok_tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+
+class AsyncGeminiClient:
+    """
+    Pooled, rate-limited async client for the REST generateContent endpoint
+    (same call as modules.ai_extraction.query_gemini). Retries 429/5xx and
+    transport errors with jittered exponential backoff, honouring Retry-After;
+    every attempt, retries included, passes the rate limiter.
+    `base_url` can point at a local stub (see utils.gemini_stub).
+    """
+    def __init__(self, model: str = "gemini-1.5-flash", api_key: Optional[str] = None,
+                 base_url: Optional[str] = GEMINI_BASE_URL, max_concurrency: int = 8,
+                 qps: float = 0, tokens_per_minute: int = 0, retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0, timeout: float = 120.0):
+        if api_key is None:
+            load_dotenv()
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("❌ GEMINI_API_KEY not found. Set it in .env file or pass manually.")
+        self.model = model
+        self.api_key = api_key
+        self.base_url = (base_url or GEMINI_BASE_URL).rstrip("/")
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(qps, tokens_per_minute)
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncGeminiClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+                headers={"Content-Type": "application/json", "X-goog-api-key": self.api_key},
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # "full jitter": uniform in [0, base * 2^attempt]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def generate(self, prompt: str) -> str:
+        """Return the text of the first candidate for `prompt`."""
+        return (await self.complete(prompt))[0]
+
+    async def complete(self, prompt: str) -> Tuple[str, Usage]:
+        """Text of the first candidate for `prompt` and the reported token usage."""
+        client = self._client()
+        url = f"{self.base_url}/models/{self.model}:generateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        tokens = estimate_tokens(prompt)
+
+        for attempt in range(self.retries):
+            retry_after = None
+            await self.limiter.acquire(tokens)  # every attempt counts: retries must not burst past the limits
+            try:
+                async with self._sem:
+                    resp = await client.post(url, json=payload)
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    result = resp.json()
+                    meta = result.get("usageMetadata") or {}
+                    return result["candidates"][0]["content"]["parts"][0]["text"], {
+                        "input_tokens": meta.get("promptTokenCount"),
+                        "output_tokens": meta.get("candidatesTokenCount")}
+                retry_after = resp.headers.get("Retry-After")
+                logging.warning(f"⚠️ Gemini HTTP {resp.status_code} (attempt {attempt+1})")
+            except httpx.TransportError as e:  # includes timeouts
+                logging.warning(f"⚠️ Gemini transport error (attempt {attempt+1}): {e}")
+            if attempt < self.retries - 1:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise RuntimeError(f"❌ Gemini request failed after {self.retries} attempts")
+
+
+class AsyncGeminiExtractor(LLMExtractor):
+    """
+    Extractor backend ("gemini-async:<model>") whose calls all go through one
+    pooled, rate-limited AsyncGeminiClient running on a private event loop.
+    Prompts, response cache, JSON checks and metrics are LLMExtractor's;
+    the calls themselves are coroutines on that loop, so the per-field
+    requests of one document go out together (under the client's limits),
+    the sync pipeline (BatchRunner extract workers, the HTTP service)
+    shares the connection pool, and the *_async methods and extract_many
+    can be awaited from any event loop.
+    """
+    backend = "gemini-async"
+
+    def __init__(self, model: str = "gemini-1.5-flash", retries: int = 2, delay: float = 0,
+                 cache: Optional[ResponseCache] = None, client: Optional[AsyncGeminiClient] = None,
+                 **client_kw):
+        super().__init__(model, retries, delay, cache)
+        # HTTP retries/backoff happen in the client; `retries` here re-asks on invalid JSON
+        self._client = client
+        self._client_kw = client_kw  # AsyncGeminiClient options (api_key, base_url, qps, ...)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> AsyncGeminiClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = AsyncGeminiClient(self.model, **self._client_kw)
+        return self._client
+
+    def _submit(self, coro) -> "concurrent.futures.Future":
+        """Schedule `coro` on the extractor's event loop thread (started on first use)."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="gemini-async", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _run(self, coro) -> Any:
+        """Run `coro` on the extractor's event loop thread and wait for the result."""
+        return self._submit(coro).result()
+
+    async def _await(self, coro) -> Any:
+        """Await `coro` from any event loop; the client and its pool stay on the extractor's loop."""
+        return await asyncio.wrap_future(self._submit(coro))
+
+    def close(self) -> None:
+        """Close the pooled connections and stop the event loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            if self._client is not None:
+                asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    # ---------------------- Coroutines (extractor loop) ----------------------
+    async def _invoke(self, prompt: str, metrics: Optional[Metrics] = None, label: str = "") -> Dict[str, Any]:
+        """LLMExtractor._retry_invoke, awaiting the client instead of blocking on it."""
+        t0 = time.perf_counter()
+        full_prompt, call, key = self._start_call(prompt, label)
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            call["cached"] = True
+            self._record(metrics, call, True, t0)
+            return cached
+
+        client = self.client
+        for attempt in range(self.retries):
+            call["attempts"] = attempt + 1
+            raw_content = "<no content>"
+            try:
+                raw_content, usage = await client.complete(full_prompt)
+                data = self._accept(raw_content, usage, call, key)
+                self._record(metrics, call, True, t0)
+                return data
+            except Exception as e:
+                logging.warning(f"⚠️ Attempt {attempt+1} failed: {e}\nRaw response:\n{raw_content}")
+                if attempt < self.retries - 1:
+                    await asyncio.sleep(self.delay)
+
+        self._record(metrics, call, False, t0)
+        raise RuntimeError(f"❌ Failed to get valid JSON from {self.backend} after retries")
+
+    async def _fields(self, layout_json: Layout, fields: List[str], batched: bool = True,
+                      context: Optional[Callable[[List[str]], Layout]] = None,
+                      metrics: Optional[Metrics] = None, strict: bool = False) -> Dict[str, Any]:
+        """LLMExtractor.extract_fields with the per-field calls sent concurrently (client limits apply)."""
+        layout_for = context or (lambda _fields: layout_json)
+        out: Dict[str, Any] = {}
+        if batched and len(fields) > 1:
+            try:
+                data = await self._invoke(fields_prompt(layout_for(fields), fields), metrics, "fields")
+                out = {f: data.get(f, None) for f in fields}
+            except Exception as e:
+                logging.error(f"❌ Batched extraction failed for {fields}: {e}")
+            fields = [f for f in fields if not is_valid(f, out.get(f))]
+            if fields:
+                logging.info(f"Retrying fields individually: {fields}")
+
+        answers = await asyncio.gather(
+            *(self._invoke(field_prompt(layout_for([f]), f), metrics, f"field:{f}") for f in fields),
+            return_exceptions=True)
+        failed: List[str] = []
+        for f, data in zip(fields, answers):
+            if isinstance(data, Exception):
+                logging.error(f"❌ Failed to extract field {f}: {data}")
+                out[f] = None
+                failed.append(f)
+            else:
+                out[f] = data.get(f, None)
+        if failed and strict:
+            raise RuntimeError(f"❌ {self.backend} calls failed for fields {failed}")
+        return out
+
+    # ---------------------- Sync API (pipeline, batch, service) ----------------------
+    def _retry_invoke(self, prompt: str, metrics: Optional[Metrics] = None,
+                      label: str = "") -> Dict[str, Any]:
+        return self._run(self._invoke(prompt, metrics, label))
+
+    def extract_fields(self, layout_json: Layout, fields: List[str], batched: bool = True,
+                       context: Optional[Callable[[List[str]], Layout]] = None,
+                       metrics: Optional[Metrics] = None, strict: bool = False) -> Dict[str, Any]:
+        return self._run(self._fields(layout_json, fields, batched, context, metrics, strict))
+
+    # ---------------------- Async API ----------------------
+    async def extract_full_async(self, layout_json: Layout,
+                                 metrics: Optional[Metrics] = None) -> Dict[str, Any]:
+        return await self._await(self._invoke(full_doc_prompt(layout_json), metrics, "full"))
+
+    async def extract_fields_async(self, layout_json: Layout, fields: List[str],
+                                   **kw) -> Dict[str, Any]:
+        return await self._await(self._fields(layout_json, fields, **kw))
+
+    async def extract_many(self, layout_jsons: List[Layout]) -> List[Dict[str, Any]]:
+        """extract_full for many documents concurrently; failures yield {}."""
+        async def _safe(layout_json: Layout) -> Dict[str, Any]:
+            try:
+                return await self.extract_full_async(layout_json)
+            except Exception as e:
+                logging.error(f"❌ Extraction failed: {e}")
+                return {}
+        return await asyncio.gather(*(_safe(lj) for lj in layout_jsons))
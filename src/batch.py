@@ -0,0 +1,189 @@
+# src/batch.py
+from typing import Dict, Any, List, Optional, Iterable
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import concurrent.futures
+from pathlib import Path
+from .pipeline import PipelineEngine
+from .checkpoint import file_sha256
+from .metrics import Metrics
+
+_DONE = object()
+
+
+def write_json_atomic(data: Dict[str, Any], out_path: Path) -> None:
+    """Write JSON so a crash never leaves a truncated output behind."""
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, out_path)
+
+
+class Manifest:
+    """Append-only JSONL log of per-file outcomes; the last record per file wins."""
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self.latest[rec["file"]] = rec
+
+    def is_done(self, pdf: Path, sha: str, out_path: Path) -> bool:
+        rec = self.latest.get(str(pdf))
+        return bool(rec and rec.get("sha256") == sha
+                    and rec.get("status") == "ok" and out_path.exists())
+
+    def append(self, rec: Dict[str, Any]) -> None:
+        rec = {**rec, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        line = json.dumps(rec, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.latest[rec["file"]] = rec
+
+
+class BatchRunner:
+    """
+    Pipelined, resumable batch over many PDFs.
+
+    One thread OCRs documents ahead (at most `ocr_ahead` waiting) while
+    `extract_workers` threads run LLM extraction on the ones already OCR'd,
+    so OCR of doc N+1 overlaps extraction of doc N. Inputs whose content
+    hash already has an ok record in the manifest (and an output file) are
+    skipped, which makes re-running after a crash resume where it stopped.
+    With `metrics_dir`, each document's metrics report is written there as
+    <stem>.metrics.json.
+    """
+    def __init__(self, engine: PipelineEngine, out_dir: Path,
+                 manifest_path: Optional[Path] = None, force: bool = False,
+                 extract_workers: int = 1, ocr_ahead: int = 1,
+                 metrics_dir: Optional[Path] = None):
+        self.engine = engine
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = Manifest(Path(manifest_path or self.out_dir / "manifest.jsonl"))
+        self.force = force
+        self.extract_workers = max(1, extract_workers)
+        self.ocr_ahead = max(1, ocr_ahead)
+        self._hashes: Dict[Any, str] = {}  # (path, size, mtime) -> sha256, for --watch polling
+        self.metrics_dir = Path(metrics_dir) if metrics_dir else None
+        if self.metrics_dir:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+
+    def _sha256(self, pdf: Path) -> str:
+        st = pdf.stat()
+        key = (str(pdf), st.st_size, st.st_mtime_ns)
+        if key not in self._hashes:
+            self._hashes[key] = file_sha256(pdf)
+        return self._hashes[key]
+
+    def output_path(self, pdf: Path) -> Path:
+        return self.out_dir / f"{pdf.stem}.json"
+
+    def _ocr_stage(self, todo: List[Dict[str, Any]], q: "queue.Queue") -> None:
+        for job in todo:
+            t0 = time.perf_counter()
+            job["metrics"] = Metrics(str(job["pdf"]))
+            try:
+                job["cleaned"], job["meta"] = self.engine.ocr_document(
+                    str(job["pdf"]), job["metrics"], fresh=self.force)
+            except Exception as e:
+                logging.error(f"❌ OCR failed for {job['pdf'].name}: {e}", exc_info=True)
+                job["error"] = f"ocr: {e}"
+            job["ocr_s"] = round(time.perf_counter() - t0, 3)
+            q.put(job)
+        for _ in range(self.extract_workers):
+            q.put(_DONE)
+
+    def _extract_stage(self, q: "queue.Queue", counts: Dict[str, int]) -> None:
+        while True:
+            job = q.get()
+            if job is _DONE:
+                return
+            pdf: Path = job["pdf"]
+            rec = {"file": str(pdf), "sha256": job["sha256"], "ocr_s": job["ocr_s"]}
+            if "error" in job:
+                self._finish(rec, "error", counts, error=job["error"])
+                continue
+            t0 = time.perf_counter()
+            try:
+                result = self.engine.extract_document(job.pop("cleaned"), job["meta"], job["metrics"])
+                rec["pages"] = result.meta.get("pages")
+                rec["page_sources"] = result.meta.get("page_sources")
+                if result.meta.get("blank_pages"):
+                    rec["blank_pages"] = result.meta["blank_pages"]
+                rec["metrics"] = result.meta["metrics"]["summary"]
+                if self.metrics_dir:
+                    write_json_atomic(result.meta["metrics"], self.metrics_dir / f"{pdf.stem}.metrics.json")
+                if result.data:
+                    out_path = self.output_path(pdf)
+                    write_json_atomic(result.data, out_path)
+                    rec["output"] = str(out_path)
+            except Exception as e:
+                logging.error(f"❌ Extraction failed for {pdf.name}: {e}", exc_info=True)
+                rec["extract_s"] = round(time.perf_counter() - t0, 3)
+                self._finish(rec, "error", counts, error=f"extract: {e}")
+                continue
+            rec["extract_s"] = round(time.perf_counter() - t0, 3)
+            if "output" not in rec:
+                self._finish(rec, "empty", counts)
+                continue
+            self._finish(rec, "ok", counts)
+            logging.info(f"✅ Saved JSON -> {rec['output']}")
+
+    def _finish(self, rec: Dict[str, Any], status: str, counts: Dict[str, int],
+                error: Optional[str] = None) -> None:
+        rec["status"] = status
+        if error:
+            rec["error"] = error
+        self.manifest.append(rec)
+        counts[status] = counts.get(status, 0) + 1
+
+    def run(self, pdfs: Iterable[Path]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        todo: List[Dict[str, Any]] = []
+        for pdf in pdfs:
+            pdf = Path(pdf)
+            sha = self._sha256(pdf)
+            out_path = self.output_path(pdf)
+            if not self.force and self.manifest.is_done(pdf, sha, out_path):
+                counts["skipped"] = counts.get("skipped", 0) + 1
+                logging.info(f"⏭️ Up to date, skipping {pdf.name}")
+                continue
+            todo.append({"pdf": pdf, "sha256": sha})
+        if not todo:
+            return counts
+
+        q: "queue.Queue" = queue.Queue(maxsize=self.ocr_ahead)
+        producer = threading.Thread(target=self._ocr_stage, args=(todo, q), name="batch-ocr", daemon=True)
+        producer.start()
+        lock = threading.Lock()
+        shared: Dict[str, int] = {}
+
+        def _worker() -> None:
+            local: Dict[str, int] = {}
+            self._extract_stage(q, local)
+            with lock:
+                for k, v in local.items():
+                    shared[k] = shared.get(k, 0) + v
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.extract_workers) as ex:
+            for fut in [ex.submit(_worker) for _ in range(self.extract_workers)]:
+                fut.result()
+        producer.join()
+        for k, v in shared.items():
+            counts[k] = counts.get(k, 0) + v
+        logging.info(f"Batch finished: {counts}")
+        return counts
@@ -0,0 +1,42 @@
+# src/blank.py
+from typing import Dict, Any, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF; annotations only, imported on first use at runtime
+
+
+def ink_ratio(gray: np.ndarray, margin: float = 0.05, min_contrast: int = 16) -> float:
+    """
+    Ink density of a grayscale (H, W) uint8 image: summed darkness below the
+    paper level (median brightness), as a fraction of a fully black page.
+    Darkness is conserved by area-averaged downsampling, so thin strokes
+    still count on a small thumbnail. Deviations within the paper's own noise
+    (4x its median absolute deviation, at least `min_contrast`) are ignored,
+    as is a `margin` on every side (scanner edge shadows, punch holes).
+    """
+    h, w = gray.shape[:2]
+    mh, mw = int(h * margin), int(w * margin)
+    core = gray[mh:h - mh or None, mw:w - mw or None]
+    if core.size == 0:
+        return 0.0
+    paper = float(np.median(core))
+    dark = paper - core.astype(np.float32)
+    noise = float(np.median(np.abs(dark)))
+    dark -= max(min_contrast, 4 * noise)
+    return float(dark[dark > 0].sum()) / (255.0 * core.size)
+
+
+def page_ink_ratio(page: "fitz.Page", thumb_px: int = 256) -> float:
+    """Render `page` as a small grayscale thumbnail (a few ms) and measure its ink."""
+    import fitz  # PyMuPDF
+    longest = max(page.rect.width, page.rect.height) or 1.0
+    zoom = thumb_px / longest
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    return ink_ratio(gray)
+
+
+def blank_page(page_idx: int, ink: float) -> Dict[str, Any]:
+    """OCR-shaped entry for a page classified as blank (kept for page numbering/metadata)."""
+    return {"page_index": page_idx, "lines": [], "source": "blank", "ink": round(ink, 5)}
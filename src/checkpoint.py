@@ -0,0 +1,113 @@
+# src/checkpoint.py
+from typing import Dict, Any, Optional
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import logging
+from pathlib import Path
+from .lines import json_default
+
+# Pipeline stages in order; each persists its artifact when it completes. A
+# finished document's checkpoints are discarded, so there is no "final" stage.
+STAGES = ("ocr", "preprocess", "layout", "full", "rules", "fields")
+
+
+def file_sha256(path, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def input_key(data: Any) -> str:
+    """Fingerprint of a stage's input (pages, layout, field list ...) as stored with its artifact."""
+    blob = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=json_default)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class DocCheckpoint:
+    """
+    Per-document stage artifacts as gzipped compact JSON under one directory.
+    Each artifact is stored with the input_key of what it was computed from
+    (None for the first stage, whose input is the PDF itself), and only
+    loads for the same input, so a stage rerun upstream invalidates it.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, stage: str) -> Path:
+        return self.path / f"{stage}.json.gz"
+
+    def has(self, stage: str) -> bool:
+        return self._file(stage).exists()
+
+    def load(self, stage: str, key: Optional[str] = None) -> Optional[Any]:
+        try:
+            with gzip.open(self._file(stage), "rt", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Ignoring unreadable checkpoint {self._file(stage)}: {e}")
+            return None
+        if not isinstance(stored, dict) or stored.get("input") != key or "data" not in stored:
+            logging.info(f"Checkpoint {self._file(stage)} was made from other input; recomputing")
+            return None
+        return stored["data"]
+
+    def save(self, stage: str, data: Any, key: Optional[str] = None) -> None:
+        target = self._file(stage)
+        tmp = target.with_name(target.name + ".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump({"input": key, "data": data}, f, separators=(",", ":"), ensure_ascii=False,
+                      default=json_default)
+        os.replace(tmp, target)
+
+    def last_stage(self) -> Optional[str]:
+        done = [s for s in STAGES if self.has(s)]
+        return done[-1] if done else None
+
+
+class CheckpointStore:
+    """
+    Work directory of per-document checkpoints, keyed by the PDF's content
+    hash plus a fingerprint of the settings that shape the artifacts, so a
+    changed file or config never resumes from stale stages. Checkpoints of
+    documents that never finished are dropped after `max_age_days`.
+    """
+    def __init__(self, work_dir: str, max_age_days: float = 7):
+        self.root = Path(work_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        if max_age_days:
+            self.prune(max_age_days * 86400)
+
+    def prune(self, max_age_s: float) -> int:
+        """Discard document checkpoints not written to for `max_age_s`; returns how many."""
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for d in self.root.iterdir():
+            try:
+                if d.is_dir() and max((f.stat().st_mtime for f in d.iterdir()), default=d.stat().st_mtime) < cutoff:
+                    shutil.rmtree(d, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue  # being written / removed concurrently
+        if removed:
+            logging.info(f"🧹 Pruned {removed} stale checkpoint(s) from {self.root}")
+        return removed
+
+    def doc_id(self, pdf_path: str, settings: Dict[str, Any]) -> str:
+        fp = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+        return f"{file_sha256(pdf_path)}-{fp}"
+
+    def open(self, doc_id: str) -> DocCheckpoint:
+        return DocCheckpoint(self.root / doc_id)
+
+    def discard(self, doc_id: str) -> None:
+        shutil.rmtree(self.root / doc_id, ignore_errors=True)
@@ -0,0 +1,81 @@
+# src/context.py
+from typing import List, Dict, Any, Set, Tuple
+import re
+import logging
+import numpy as np
+from .utils.tokens import estimate_tokens
+from .lines import PageLines, page_lines
+
+# Lines matching these are likely to hold (or label) the field's value
+FIELD_ANCHORS: Dict[str, str] = {
+    "borrowers": r"borrower|mortgagor|grantor|trustor|husband|wife|spouse|married",
+    "loan_amount": r"\$|principal|sum of|loan amount|dollars",
+    "recording_date": r"record|filed|received|\b\d{1,2}/\d{1,2}/\d{2,4}\b",
+    "recording_location": r"county|clerk|recorder|register of|recorded",
+    "lender_name": r"lender|mortgagee|beneficiary|bank|mortgage corp|corporation|n\.a\.",
+    "lender_nmls_id": r"nmls|lender",
+    "broker_name": r"broker",
+    "loan_originator_name": r"originator|loan officer|nmls",
+    "loan_originator_nmls_id": r"nmls|originator",
+}
+
+_ANCHOR_RX = {k: re.compile(v, re.I) for k, v in FIELD_ANCHORS.items()}
+
+# Approximate per-line overhead of the "[001|y=123|x=456] " prefix in tokens
+_LINE_OVERHEAD = 5
+
+
+def _line_tokens(lines: PageLines) -> np.ndarray:
+    return np.fromiter((estimate_tokens(t) for t in lines.texts), np.int64, len(lines)) + _LINE_OVERHEAD
+
+
+def select_context(pages: List[Dict[str, Any]], fields: List[str],
+                   token_budget: int = 6000, window_px: float = 60.0,
+                   neighbors: int = 1) -> List[Dict[str, Any]]:
+    """
+    Keep only the lines relevant to `fields`: anchor hits plus their
+    neighbours (within `window_px` vertically, and `neighbors` lines either
+    side), highest-scoring windows first, until `token_budget` is spent.
+
+    Falls back to the full pages when they already fit the budget or when
+    no anchor matches at all. Returned pages keep the input shape, with
+    their lines as PageLines.
+    """
+    lines_of = [page_lines(p) for p in pages]
+    tokens_of = [_line_tokens(lines) for lines in lines_of]
+    total = int(sum(t.sum() for t in tokens_of))
+    if total <= token_budget:
+        return pages
+
+    rxs = [_ANCHOR_RX[f] for f in fields if f in _ANCHOR_RX]
+    seeds: List[Tuple[int, int, int]] = []  # (-score, page_pos, line_pos)
+    for pi, lines in enumerate(lines_of):
+        for li, text in enumerate(lines.texts):
+            score = sum(1 for rx in rxs if rx.search(text))
+            if score:
+                seeds.append((-score, pi, li))
+    if not seeds:
+        logging.info("Context selection: no anchors for %s, using full context", fields)
+        return pages
+    seeds.sort()
+
+    keep: Dict[int, Set[int]] = {}
+    used = 0
+    for _neg, pi, li in seeds:
+        lines = lines_of[pi]
+        window = set(lines.near_y(float(lines.y0[li]), window_px).tolist())
+        window.update(range(max(0, li - neighbors), min(len(lines), li + neighbors + 1)))
+        chosen = keep.setdefault(pi, set())
+        new = window - chosen
+        cost = int(tokens_of[pi][list(new)].sum()) if new else 0
+        if used + cost > token_budget and used:
+            continue
+        chosen |= new
+        used += cost
+
+    pruned = [
+        {**pages[pi], "lines": lines_of[pi].take(sorted(js))}
+        for pi, js in sorted(keep.items()) if js
+    ]
+    logging.info("Context selection for %d fields: ~%d of ~%d tokens", len(fields), used, total)
+    return pruned
@@ -1,13 +1,17 @@
 # extractor/extract.py
-from typing import Dict, Any, List
-from .gemini_extractor import GeminiExtractor
+from typing import Dict, Any, List, Optional
+from .llm_backends import LLMExtractor, make_extractor
 
 class ExtractorWrapper:
     """
     Optional wrapper to allow switching between multiple extractors.
+
+    `model` is a backend spec (see llm_backends.parse_model_spec), e.g.
+    "gemini-1.5-flash", "gemini-rest:gemini-1.5-flash", "local:qwen2.5-7b-instruct",
+    "fake:recorded.json"; or pass a ready `extractor`.
     """
-    def __init__(self, model: str = "gemini-1.5-flash"):
-        self.extractor = GeminiExtractor(model=model)
+    def __init__(self, model: str = "gemini-1.5-flash", extractor: Optional[LLMExtractor] = None, **kw):
+        self.extractor = extractor or make_extractor(model, **kw)
 
     def extract_document(self, layout_json: Dict[str, Any]) -> Dict[str, Any]:
         return self.extractor.extract_full(layout_json)
@@ -0,0 +1,167 @@
+# src/lines.py
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Union
+import numpy as np
+
+_BASE_KEYS = ("text", "score", "box")
+
+
+class PageLines:
+    """
+    A page's OCR lines stored as arrays instead of one dict (plus five box
+    lists) per line: boxes (N, 4, 2) float32, scores (N,) float32 and texts
+    as a list of str. Per-line extras such as "refined" live in a sparse
+    {index: {key: value}} map.
+
+    Indexing or iterating yields today's {"text", "score", "box"} dicts,
+    built on demand, so code written against lists of line dicts keeps
+    working; geometry (bounds, reading order, spatial queries) is vectorized.
+    """
+    __slots__ = ("texts", "scores", "boxes", "extras", "_bounds")
+
+    def __init__(self, texts: Iterable[str] = (), scores: Any = None, boxes: Any = None,
+                 extras: Optional[Dict[int, Dict[str, Any]]] = None):
+        self.texts: List[str] = list(texts)
+        n = len(self.texts)
+        self.scores = np.zeros(n, np.float32) if scores is None else np.asarray(scores, np.float32).reshape(n)
+        self.boxes = np.zeros((n, 4, 2), np.float32) if boxes is None else np.asarray(boxes, np.float32).reshape(n, 4, 2)
+        self.extras: Dict[int, Dict[str, Any]] = extras or {}
+        self._bounds: Optional[np.ndarray] = None
+
+    # ---------------------- Converters ----------------------
+    @classmethod
+    def from_dicts(cls, lines: Iterable[Dict[str, Any]]) -> "PageLines":
+        """From the [{"text", "score", "box"}, ...] shape (extra keys are kept)."""
+        if isinstance(lines, cls):
+            return lines
+        lines = list(lines)
+        extras: Dict[int, Dict[str, Any]] = {}
+        for i, l in enumerate(lines):
+            if len(l) != 3:  # anything besides text/score/box?
+                extra = {k: v for k, v in l.items() if k not in _BASE_KEYS}
+                if extra:
+                    extras[i] = extra
+        return cls([l["text"] for l in lines],
+                   [l.get("score", 0.0) for l in lines],
+                   [l.get("box") or [[0.0, 0.0]] * 4 for l in lines] if lines else None,
+                   extras)
+
+    @classmethod
+    def from_paddle(cls, results: Any) -> "PageLines":
+        """From PaddleOCR's [[[box, (text, score)], ...]] result, in detection order."""
+        texts: List[str] = []
+        scores: List[float] = []
+        boxes: List[Any] = []
+        for res in results or []:
+            for line in res or []:
+                box, txtpack = line[0], line[1]
+                if isinstance(txtpack, (list, tuple)) and len(txtpack) >= 2:
+                    text, score = txtpack[0], txtpack[1]
+                else:
+                    text, score = str(txtpack), 0.0
+                texts.append(text)
+                scores.append(float(score))
+                boxes.append(box)
+        return cls(texts, scores, boxes if boxes else None)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Today's line-dict shape (e.g. for JSON caches and checkpoints)."""
+        boxes = self.boxes.astype(np.float64).round(2).tolist()
+        scores = self.scores.astype(np.float64).round(6).tolist()
+        out = [{"text": t, "score": s, "box": b} for t, s, b in zip(self.texts, scores, boxes)]
+        for i, extra in self.extras.items():
+            out[i].update(extra)
+        return out
+
+    # ---------------------- Sequence protocol ----------------------
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        line = {"text": self.texts[i], "score": round(float(self.scores[i]), 6),
+                "box": self.boxes[i].astype(np.float64).round(2).tolist()}
+        line.update(self.extras.get(i if i >= 0 else i + len(self), {}))
+        return line
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"PageLines({len(self)} lines)"
+
+    # ---------------------- Geometry ----------------------
+    @property
+    def bounds(self) -> np.ndarray:
+        """(N, 4) float32 [x0, y0, x1, y1] per line, computed once."""
+        if self._bounds is None:
+            self._bounds = np.concatenate([self.boxes.min(axis=1), self.boxes.max(axis=1)], axis=1)
+        return self._bounds
+
+    @property
+    def x0(self) -> np.ndarray:
+        return self.bounds[:, 0]
+
+    @property
+    def y0(self) -> np.ndarray:
+        return self.bounds[:, 1]
+
+    @property
+    def x1(self) -> np.ndarray:
+        return self.bounds[:, 2]
+
+    @property
+    def y1(self) -> np.ndarray:
+        return self.bounds[:, 3]
+
+    def reading_order(self) -> np.ndarray:
+        """Indices top-to-bottom, then left-to-right (stable)."""
+        return np.lexsort((self.x0, self.y0))
+
+    def sorted(self) -> "PageLines":
+        return self.take(self.reading_order())
+
+    def near_y(self, y: float, px: float) -> np.ndarray:
+        """Indices of lines whose top edge is within `px` of `y`."""
+        return np.flatnonzero(np.abs(self.y0 - y) <= px)
+
+    def overlapping(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Indices of lines whose bounding box intersects the rectangle."""
+        b = self.bounds
+        return np.flatnonzero((b[:, 0] < x1) & (b[:, 2] > x0) & (b[:, 1] < y1) & (b[:, 3] > y0))
+
+    # ---------------------- Derived pages ----------------------
+    def take(self, idx: Union[List[int], np.ndarray]) -> "PageLines":
+        """Subset / reordering by line indices."""
+        idx = np.asarray(idx, dtype=np.intp).reshape(-1)
+        remap = {int(old): new for new, old in enumerate(idx) if int(old) in self.extras}
+        out = PageLines([self.texts[i] for i in idx], self.scores[idx], self.boxes[idx],
+                        {new: dict(self.extras[old]) for old, new in remap.items()})
+        if self._bounds is not None:
+            out._bounds = self._bounds[idx]
+        return out
+
+    def with_texts(self, texts: List[str]) -> "PageLines":
+        """Same geometry and scores (arrays shared, not copied) with new texts."""
+        out = PageLines.__new__(PageLines)
+        out.texts = list(texts)
+        out.scores, out.boxes, out._bounds = self.scores, self.boxes, self._bounds
+        out.extras = {i: dict(e) for i, e in self.extras.items()}
+        return out
+
+    def set_line(self, i: int, text: str, score: float, **extra: Any) -> None:
+        """Replace one line's reading in place (geometry unchanged)."""
+        self.texts[i] = text
+        self.scores[i] = score
+        if extra:
+            self.extras.setdefault(i, {}).update(extra)
+
+
+def page_lines(page: Dict[str, Any]) -> PageLines:
+    """A page's lines as PageLines, whether stored as PageLines or line dicts."""
+    return PageLines.from_dicts(page.get("lines") or [])
+
+
+def json_default(o: Any) -> Any:
+    """json.dump(default=...) for pages holding PageLines or numpy scalars."""
+    if isinstance(o, PageLines):
+        return o.to_dicts()
+    return float(o)
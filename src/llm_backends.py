@@ -0,0 +1,286 @@
+# src/llm_backends.py
+from typing import Dict, Any, List, Optional, Callable, Tuple, Union
+import os
+import json
+import time
+import logging
+import threading
+from src.prompts import full_doc_prompt, field_prompt, fields_prompt
+from src.validate import is_valid
+from src.llm_cache import ResponseCache, prompt_key
+from src.utils.json_utils import clean_json, parse_json_response
+from src.utils.tokens import count_tokens
+from src.metrics import Metrics
+
+JSON_PREAMBLE = "You are a JSON-only extractor. Return STRICT JSON ONLY.\n\n"
+LOCAL_BASE_URL = "http://localhost:8000/v1"  # vLLM / llama.cpp / Ollama OpenAI-compatible server
+
+# Token usage reported by a backend: {"input_tokens": .., "output_tokens": ..}
+Usage = Dict[str, Optional[int]]
+
+# Layout JSON dict, or compact layout text (see utils.pdf_utils.LAYOUT_MODES)
+Layout = Union[Dict[str, Any], str]
+
+
+class LLMExtractor:
+    """
+    Extraction logic shared by every backend: prompt building, response
+    cache, retries, JSON parsing and per-call metrics. Subclasses implement
+    _complete(prompt) -> (text, usage) and build their client on first call,
+    so constructing an extractor needs neither credentials nor network.
+    """
+    backend = "base"
+
+    def __init__(self, model: str = "", retries: int = 3, delay: float = 2,
+                 cache: Optional[ResponseCache] = None):
+        self.model = model
+        self.retries = retries
+        self.delay = delay
+        self.cache = cache
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release clients / connections held by the backend (no-op by default)."""
+
+    def _cache_model(self) -> str:
+        """Model identity in the response-cache key."""
+        return f"{self.backend}:{self.model}"
+
+    def _clean_json(self, text: str) -> str:
+        """Remove markdown fences and ensure raw JSON only."""
+        return clean_json(text)
+
+    def _safe_json_loads(self, text: str) -> Dict[str, Any]:
+        """Try to safely parse JSON, raising if invalid."""
+        return parse_json_response(text)
+
+    def _start_call(self, prompt: str, label: str) -> Tuple[str, Dict[str, Any], Optional[str]]:
+        """Full prompt, metrics record and response-cache key (None without a cache) for one call."""
+        full_prompt = JSON_PREAMBLE + prompt
+        call: Dict[str, Any] = {"call": label, "backend": self.backend, "model": self.model,
+                                "prompt_chars": len(full_prompt), "prompt_tokens_est": count_tokens(full_prompt),
+                                "attempts": 0, "cached": False}
+        key = prompt_key(self._cache_model(), full_prompt, temperature=0) if self.cache is not None else None
+        return full_prompt, call, key
+
+    def _accept(self, raw_content: str, usage: Usage, call: Dict[str, Any], key: Optional[str]) -> Dict[str, Any]:
+        """Parse one reply (raises if it is not JSON), note its size / usage and cache it."""
+        call["response_chars"] = len(raw_content)
+        call["input_tokens"] = usage.get("input_tokens")
+        call["output_tokens"] = usage.get("output_tokens")
+        data = self._safe_json_loads(raw_content)
+        if key is not None:
+            self.cache.put(key, data)
+        return data
+
+    @staticmethod
+    def _record(metrics: Optional[Metrics], call: Dict[str, Any], ok: bool, t0: float) -> None:
+        if metrics is not None:
+            metrics.record_llm(**call, ok=ok, latency_s=round(time.perf_counter() - t0, 4))
+
+    def _retry_invoke(self, prompt: str, metrics: Optional[Metrics] = None,
+                      label: str = "") -> Dict[str, Any]:
+        """Call the model with retries and ensure JSON-only response."""
+        t0 = time.perf_counter()
+        full_prompt, call, key = self._start_call(prompt, label)
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            call["cached"] = True
+            self._record(metrics, call, True, t0)
+            return cached
+
+        for attempt in range(self.retries):
+            call["attempts"] = attempt + 1
+            raw_content = "<no content>"
+            try:
+                raw_content, usage = self._complete(full_prompt)
+                data = self._accept(raw_content, usage, call, key)
+                self._record(metrics, call, True, t0)
+                return data
+
+            except Exception as e:
+                logging.warning(f"⚠️ Attempt {attempt+1} failed: {e}\nRaw response:\n{raw_content}")
+                if attempt < self.retries - 1:
+                    time.sleep(self.delay)
+
+        self._record(metrics, call, False, t0)
+        raise RuntimeError(f"❌ Failed to get valid JSON from {self.backend} after retries")
+
+    def extract_full(self, layout_json: Layout, metrics: Optional[Metrics] = None) -> Dict[str, Any]:
+        """Extract full document JSON."""
+        prompt = full_doc_prompt(layout_json)
+        return self._retry_invoke(prompt, metrics, "full")
+
+    def extract_fields(self, layout_json: Layout, fields: List[str],
+                       batched: bool = True,
+                       context: Optional[Callable[[List[str]], Layout]] = None,
+                       metrics: Optional[Metrics] = None,
+                       strict: bool = False) -> Dict[str, Any]:
+        """
+        Extract specific fields from document JSON.
+
+        With `batched`, all fields are requested in a single call first and
+        only keys still invalid afterwards get an individual call each.
+        `context(fields)`, if given, returns the (pruned) layout JSON to send
+        for a call about those fields instead of the full `layout_json`.
+        A field whose call fails (quota, network, no valid JSON) comes back
+        as None, or with `strict` raises once all fields were tried, so the
+        caller can retry later instead of keeping the gap.
+        """
+        layout_for = context or (lambda _fields: layout_json)
+        out: Dict[str, Any] = {}
+        failed: List[str] = []
+        if batched and len(fields) > 1:
+            try:
+                data = self._retry_invoke(fields_prompt(layout_for(fields), fields), metrics, "fields")
+                out = {f: data.get(f, None) for f in fields}
+            except Exception as e:
+                logging.error(f"❌ Batched extraction failed for {fields}: {e}")
+            fields = [f for f in fields if not is_valid(f, out.get(f))]
+            if fields:
+                logging.info(f"Retrying fields individually: {fields}")
+
+        for f in fields:
+            try:
+                prompt = field_prompt(layout_for([f]), f)
+                data = self._retry_invoke(prompt, metrics, f"field:{f}")
+                out[f] = data.get(f, None)
+            except Exception as e:
+                logging.error(f"❌ Failed to extract field {f}: {e}")
+                out[f] = None
+                failed.append(f)
+        if failed and strict:
+            raise RuntimeError(f"❌ {self.backend} calls failed for fields {failed}")
+        return out
+
+
+class RestGeminiExtractor(LLMExtractor):
+    """Gemini over the plain REST generateContent call (modules.ai_extraction), no LangChain."""
+    backend = "gemini-rest"
+
+    def __init__(self, model: str = "gemini-1.5-flash", api_key: Optional[str] = None, **kw):
+        super().__init__(model, **kw)
+        self.api_key = api_key
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        from src.modules.ai_extraction import generate_content
+        result = generate_content(prompt, self.model, self.api_key)
+        text = result["candidates"][0]["content"]["parts"][0]["text"]
+        meta = result.get("usageMetadata") or {}
+        return text, {"input_tokens": meta.get("promptTokenCount"),
+                      "output_tokens": meta.get("candidatesTokenCount")}
+
+
+class OpenAICompatExtractor(LLMExtractor):
+    """
+    Any OpenAI-compatible /chat/completions server, typically a local model
+    (vLLM, llama.cpp server, Ollama) at `base_url`. The key is optional.
+    """
+    backend = "openai"
+
+    def __init__(self, model: str = "", base_url: Optional[str] = None,
+                 api_key: Optional[str] = None, timeout: float = 300, **kw):
+        super().__init__(model, **kw)
+        self.base_url = (base_url or os.getenv("LOCAL_LLM_BASE_URL") or LOCAL_BASE_URL).rstrip("/")
+        self.api_key = api_key or os.getenv("LOCAL_LLM_API_KEY")
+        self.timeout = timeout
+        self._session = None
+
+    def _http(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session()  # pooled keep-alive connections
+            if self.api_key:
+                self._session.headers["Authorization"] = f"Bearer {self.api_key}"
+        return self._session
+
+    def _cache_model(self) -> str:
+        return f"{self.backend}:{self.base_url}:{self.model}"
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        resp = self._http().post(f"{self.base_url}/chat/completions", timeout=self.timeout, json={
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0,
+        })
+        resp.raise_for_status()
+        body = resp.json()
+        usage = body.get("usage") or {}
+        return body["choices"][0]["message"]["content"], {
+            "input_tokens": usage.get("prompt_tokens"), "output_tokens": usage.get("completion_tokens")}
+
+
+class FakeExtractor(LLMExtractor):
+    """Answers every prompt with the same JSON (a recorded result, or {}); no network."""
+    backend = "fake"
+
+    def __init__(self, model: str = "", response: Optional[Dict[str, Any]] = None, **kw):
+        kw.setdefault("retries", 1)
+        kw.setdefault("delay", 0)
+        super().__init__(model, **kw)
+        if response is None and model:
+            with open(model, "r", encoding="utf-8") as f:
+                response = json.load(f)
+        self.response = response or {}
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        return json.dumps(self.response, ensure_ascii=False), {}
+
+
+# ---------------------- Registry ----------------------
+def _gemini(model: str, **kw) -> LLMExtractor:
+    from src.gemini_extractor import GeminiExtractor  # LangChain is only needed for this backend
+    return GeminiExtractor(model=model or "gemini-1.5-flash", **kw)
+
+
+def _gemini_async(model: str, **kw) -> LLMExtractor:
+    from src.async_gemini import AsyncGeminiExtractor  # httpx is only needed for this backend
+    return AsyncGeminiExtractor(model=model or "gemini-1.5-flash", **kw)
+
+
+BACKENDS: Dict[str, Callable[..., LLMExtractor]] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[..., LLMExtractor]) -> None:
+    """factory(model, cache=..., retries=..., **options) -> LLMExtractor"""
+    with _BACKENDS_LOCK:
+        BACKENDS[name] = factory
+
+
+register_backend("gemini", _gemini)
+register_backend("gemini-rest", RestGeminiExtractor)
+register_backend("gemini-async", _gemini_async)
+register_backend("openai", OpenAICompatExtractor)
+register_backend("local", OpenAICompatExtractor)
+register_backend("fake", FakeExtractor)
+register_backend("rules", FakeExtractor)  # no LLM: PipelineEngine runs with llm_mode="never"
+
+
+def parse_model_spec(spec: str) -> Tuple[str, str]:
+    """
+    "gemini-1.5-flash" -> ("gemini", "gemini-1.5-flash"); "local:qwen2.5-7b" ->
+    ("local", "qwen2.5-7b"); "rules" -> ("rules", ""). Unprefixed names are
+    Gemini; an unknown "<backend>:" prefix raises ValueError instead of being
+    sent to Gemini as a model ID.
+    """
+    name, sep, model = spec.partition(":")
+    if sep and name in BACKENDS:
+        return name, model
+    if spec in BACKENDS:
+        return spec, ""
+    if sep:
+        raise ValueError(f"Unknown extraction backend {name!r} in model spec {spec!r}; "
+                         f"known: {', '.join(sorted(BACKENDS))}")
+    return "gemini", spec
+
+
+def make_extractor(spec: str, cache: Optional[ResponseCache] = None,
+                   base_url: Optional[str] = None, **kw) -> LLMExtractor:
+    """Build the extractor for a model spec (see parse_model_spec)."""
+    name, model = parse_model_spec(spec)
+    if base_url and name in ("openai", "local", "gemini-async"):
+        kw["base_url"] = base_url
+    return BACKENDS[name](model, cache=cache, **kw)
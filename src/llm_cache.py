@@ -0,0 +1,117 @@
+# src/llm_cache.py
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+
+def prompt_key(model: str, prompt: str, **params: Any) -> str:
+    """Cache key for one LLM call: model + sampling params + exact prompt text."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"model": model, **params}, sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(prompt.encode("utf-8"))
+    return h.hexdigest()
+
+
+class SqliteResponseCache:
+    """Disk tier: parsed JSON responses in a single sqlite file, LRU-bounded by row count."""
+    def __init__(self, path: str, max_rows: int = 100_000):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, accessed) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            (n,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if n > self.max_rows:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN"
+                    " (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (n - self.max_rows,),
+                )
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+
+class ResponseCache:
+    """
+    In-memory LRU of parsed LLM JSON responses, optionally backed by a disk
+    tier (anything with get/put, e.g. SqliteResponseCache). Memory misses
+    fall through to disk and are promoted on hit.
+    """
+    def __init__(self, max_items: int = 1024, disk: Optional[SqliteResponseCache] = None):
+        self.max_items = max_items
+        self.disk = disk
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._mem.get(key)
+            if value is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+        value = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, value)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._remember(key, copy.deepcopy(value))
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except sqlite3.Error as e:
+                logging.warning(f"⚠️ LLM cache disk write failed: {e}")
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._mem)}
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .validate import is_valid
 
 PREF_ORDER = [
@@ -7,11 +7,16 @@ PREF_ORDER = [
     "loan_originator_name", "loan_originator_nmls_id",
 ]
 
-def merge(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+def merge(base: Dict[str, Any], overrides: Dict[str, Any],
+          base_valid: Optional[Dict[str, bool]] = None) -> Dict[str, Any]:
+    """
+    Take an override for each field the base lacks a valid value for.
+    `base_valid` ({field: is_valid}) skips re-validating a base the caller
+    has already checked.
+    """
     out = dict(base)
     for k in PREF_ORDER:
-        b = out.get(k)
-        o = overrides.get(k)
-        if (not is_valid(k, b)) and is_valid(k, o):
-            out[k] = o
+        ok = base_valid.get(k) if base_valid is not None and k in base_valid else is_valid(k, out.get(k))
+        if not ok and is_valid(k, overrides.get(k)):
+            out[k] = overrides.get(k)
     return out
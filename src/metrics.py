@@ -0,0 +1,208 @@
+# src/metrics.py
+from typing import Dict, Any, List, Optional, Callable
+from collections import Counter
+from contextlib import contextmanager
+import os
+import sys
+import json
+import time
+import threading
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# on_stage(stage_name, "start" | "done" | "error", stage_record_or_None)
+StageListener = Callable[[str, str, Optional[Dict[str, Any]]], None]
+
+
+try:
+    _PAGE_BYTES = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):  # pragma: no cover
+    _PAGE_BYTES = 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS of this process right now in MB: /proc on Linux, else psutil if installed (None otherwise)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return round(int(f.read().split()[1]) * _PAGE_BYTES / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Process high-water RSS in MB since start (None where unsupported); per stage, see current_rss_mb."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Metrics:
+    """
+    Per-document instrumentation: per stage, wall time, CPU time of the
+    thread running it and the RSS change over it; per page, render / OCR
+    wall and CPU time, the retry path and the RSS of the process that OCR'd
+    it (an OCRPool worker's own); and one record per LLM call.
+    Exported as a JSON report (to_dict / write_json) or Prometheus text.
+    `on_stage(name, event, record)`, if given, is called when a stage
+    starts (event "start", record None) and ends ("done" / "error").
+    """
+    def __init__(self, doc: str = "", on_stage: Optional[StageListener] = None):
+        self.doc = doc
+        self.on_stage = on_stage
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.pages: List[Dict[str, Any]] = []
+        self.llm_calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        # thread_time: other documents' threads (BatchRunner, the service) must not count here
+        t0, c0, m0 = time.perf_counter(), time.thread_time(), current_rss_mb()
+        if self.on_stage is not None:
+            self.on_stage(name, "start", None)
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            m1 = current_rss_mb()
+            rec = {
+                "wall_s": round(time.perf_counter() - t0, 4),
+                "cpu_s": round(time.thread_time() - c0, 4),
+                "rss_mb": m1,
+                "rss_delta_mb": round(m1 - m0, 1) if m0 is not None and m1 is not None else None,
+            }
+            with self._lock:
+                prev = self.stages.get(name)
+                if prev:  # stage entered more than once: accumulate
+                    rec["wall_s"] = round(rec["wall_s"] + prev["wall_s"], 4)
+                    rec["cpu_s"] = round(rec["cpu_s"] + prev["cpu_s"], 4)
+                    if rec["rss_delta_mb"] is not None and prev["rss_delta_mb"] is not None:
+                        rec["rss_delta_mb"] = round(rec["rss_delta_mb"] + prev["rss_delta_mb"], 1)
+                self.stages[name] = rec
+            if self.on_stage is not None:
+                self.on_stage(name, "done" if ok else "error", rec)
+
+    def record_pages(self, pages: List[Dict[str, Any]]) -> None:
+        """Collect per-page fields OCRService puts on each page dict."""
+        with self._lock:
+            for p in pages:
+                self.pages.append({
+                    "page_index": p.get("page_index"),
+                    "source": p.get("source", "ocr"),
+                    "lines": len(p.get("lines", [])),
+                    "render_s": p.get("render_seconds"),
+                    "render_cpu_s": p.get("render_cpu_seconds"),
+                    "ocr_s": p.get("ocr_seconds"),
+                    "ocr_cpu_s": p.get("ocr_cpu_seconds"),
+                    "rss_mb": p.get("rss_mb"),
+                    "ocr_attempt": p.get("ocr_attempt"),
+                    "ocr_tries": p.get("ocr_tries"),
+                    "refined": p.get("refined"),
+                    "refine_s": p.get("refine_seconds"),
+                })
+
+    def record_llm(self, **call: Any) -> None:
+        """One LLM call: latency_s, attempts, prompt_chars / prompt_tokens_est, response_chars, tokens, cached..."""
+        with self._lock:
+            self.llm_calls.append(call)
+
+    # ---------------------- Export ----------------------
+    def summary(self) -> Dict[str, Any]:
+        calls = self.llm_calls
+        return {
+            "pages": len(self.pages),
+            "page_sources": dict(Counter(p["source"] for p in self.pages)),
+            "ocr_attempts": dict(Counter(p["ocr_attempt"] for p in self.pages if p["ocr_attempt"])),
+            "ocr_retries": sum(max(0, (p["ocr_tries"] or 1) - 1) for p in self.pages if p["ocr_attempt"]),
+            "ocr_s": round(sum(p["ocr_s"] or 0 for p in self.pages), 4),
+            "ocr_page_s_max": max((p["ocr_s"] or 0 for p in self.pages), default=0),
+            "ocr_cpu_s": round(sum(p["ocr_cpu_s"] or 0 for p in self.pages), 4),  # incl. OCRPool workers
+            "ocr_refined_lines": sum(p["refined"] or 0 for p in self.pages),
+            "refine_s": round(sum(p["refine_s"] or 0 for p in self.pages), 4),
+            "llm_calls": len(calls),
+            "llm_cached": sum(1 for c in calls if c.get("cached")),
+            "llm_attempts": sum(c.get("attempts", 0) for c in calls),
+            "llm_latency_s": round(sum(c.get("latency_s", 0) for c in calls), 4),
+            "prompt_chars": sum(c.get("prompt_chars", 0) for c in calls),
+            "prompt_tokens_est": sum(c.get("prompt_tokens_est", 0) for c in calls if not c.get("cached")),
+            "response_chars": sum(c.get("response_chars", 0) for c in calls),
+            "input_tokens": sum(c.get("input_tokens") or 0 for c in calls),
+            "output_tokens": sum(c.get("output_tokens") or 0 for c in calls),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"doc": self.doc, "summary": self.summary(), "stages": self.stages,
+                "pages": self.pages, "llm_calls": self.llm_calls}
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+
+class MetricTotals:
+    """Process-wide counters across documents, rendered in Prometheus text format."""
+    def __init__(self, prefix: str = "layout_ocr"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.counters: Counter = Counter()
+        self.stage_seconds: Counter = Counter()
+        self.stage_cpu_seconds: Counter = Counter()
+        self.page_sources: Counter = Counter()
+        self.ocr_attempts: Counter = Counter()
+
+    def add(self, m: Metrics) -> None:
+        s = m.summary()
+        with self._lock:
+            self.counters["documents_total"] += 1
+            self.counters["pages_total"] += s["pages"]
+            self.counters["ocr_retries_total"] += s["ocr_retries"]
+            self.counters["ocr_refined_lines_total"] += s["ocr_refined_lines"]
+            self.counters["llm_calls_total"] += s["llm_calls"]
+            self.counters["llm_cache_hits_total"] += s["llm_cached"]
+            self.counters["llm_attempts_total"] += s["llm_attempts"]
+            self.counters["llm_latency_seconds_total"] += s["llm_latency_s"]
+            self.counters["llm_prompt_chars_total"] += s["prompt_chars"]
+            self.counters["llm_prompt_tokens_est_total"] += s["prompt_tokens_est"]
+            self.counters["llm_response_chars_total"] += s["response_chars"]
+            self.counters["llm_input_tokens_total"] += s["input_tokens"]
+            self.counters["llm_output_tokens_total"] += s["output_tokens"]
+            for name, rec in m.stages.items():
+                self.stage_seconds[name] += rec["wall_s"]
+                self.stage_cpu_seconds[name] += rec["cpu_s"]
+            self.page_sources.update(s["page_sources"])
+            self.ocr_attempts.update(s["ocr_attempts"])
+
+    def to_prometheus(self) -> str:
+        p = self.prefix
+        out: List[str] = []
+        with self._lock:
+            for name, v in sorted(self.counters.items()):
+                out += [f"# TYPE {p}_{name} counter", f"{p}_{name} {v:g}"]
+            for metric, labels, counter in (
+                ("stage_seconds_total", "stage", self.stage_seconds),
+                ("stage_cpu_seconds_total", "stage", self.stage_cpu_seconds),
+                ("pages_by_source_total", "source", self.page_sources),
+                ("ocr_attempts_total", "attempt", self.ocr_attempts),
+            ):
+                if counter:
+                    out.append(f"# TYPE {p}_{metric} counter")
+                    out += [f'{p}_{metric}{{{labels}="{k}"}} {v:g}' for k, v in sorted(counter.items())]
+        rss = peak_rss_mb()
+        if rss is not None:
+            out += [f"# TYPE {p}_peak_rss_megabytes gauge", f"{p}_peak_rss_megabytes {rss:g}"]
+        return "\n".join(out) + "\n"
+
+
+# Totals for the whole process (e.g. a batch run or the HTTP service)
+TOTALS = MetricTotals()
@@ -3,29 +3,30 @@ import json
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Shared session so repeated calls reuse pooled HTTPS connections
+_SESSION = requests.Session()
 
-def query_gemini(prompt: str, api_key: str = None) -> str:
-    """
-    Send a prompt to Gemini API and return the response text.
-    
-    Args:
-        prompt (str): The input text for Gemini.
-        api_key (str, optional): API key. If None, loads from environment variable GEMINI_API_KEY.
-    
-    Returns:
-        str: Response from Gemini API.
-    """
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+
+def _api_key(api_key: str = None) -> str:
     if api_key is None:
+        load_dotenv()  # Load environment variables from .env file
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("❌ GEMINI_API_KEY not found. Set it in .env file or pass manually.")
+    return api_key
+
 
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
+def generate_content(prompt: str, model: str = "gemini-pro", api_key: str = None,
+                     timeout: float = 120) -> dict:
+    """
+    POST one prompt to generateContent and return the decoded JSON body.
+    Raises requests exceptions on transport or HTTP errors.
+    """
     headers = {
         "Content-Type": "application/json",
-        "X-goog-api-key": api_key   # Correct header format
+        "X-goog-api-key": _api_key(api_key)   # Correct header format
     }
     payload = {
         "contents": [
@@ -36,11 +37,27 @@ def query_gemini(prompt: str, api_key: str = None) -> str:
             }
         ]
     }
+    response = _SESSION.post(GEMINI_URL.format(model=model), headers=headers,
+                             data=json.dumps(payload), timeout=timeout)
+    response.raise_for_status()  # Raise error if bad response (4xx or 5xx)
+    return response.json()
 
+
+def query_gemini(prompt: str, api_key: str = None) -> str:
+    """
+    Send a prompt to Gemini API and return the response text.
+    
+    Args:
+        prompt (str): The input text for Gemini.
+        api_key (str, optional): API key. If None, loads from environment variable GEMINI_API_KEY.
+    
+    Returns:
+        str: Response from Gemini API.
+    """
+    api_key = _api_key(api_key)
+    result = None
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()  # Raise error if bad response (4xx or 5xx)
-        result = response.json()
+        result = generate_content(prompt, "gemini-pro", api_key)
 
         # Extract response text safely
         return result["candidates"][0]["content"]["parts"][0]["text"]
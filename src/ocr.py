@@ -1,15 +1,28 @@
 # src/ocr.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple, Union, Optional, NamedTuple, TYPE_CHECKING
 from dataclasses import dataclass
 import os
+import re
 import logging
 import numpy as np
 from PIL import Image
-import fitz  # PyMuPDF
-from paddleocr import PaddleOCR
 from tqdm import tqdm
 import concurrent.futures
 import threading
+import time
+from collections import Counter
+from .utils.prefetch import prefetch
+from .text_layer import text_layer_page
+from .blank import page_ink_ratio, blank_page
+from .lines import PageLines, page_lines
+from .ocr_cache import OCRCache
+from .metrics import current_rss_mb
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF; annotations only
+
+# PyMuPDF and PaddleOCR are imported on first use (see _fitz / OCRService),
+# so importing this module (CLI --help, config objects) stays cheap.
 
 # ========= Runtime env (must be set BEFORE Paddle initializes) =========
 # Disable MKLDNN/oneDNN paths that often cause layout/tensor crashes
@@ -24,8 +37,112 @@ os.environ.setdefault("FLAGS_allocator_strategy", "naive_best_fit")
 # Also cap Paddle CPU threads
 os.environ.setdefault("CPU_NUM", "1")
 
-# ========= Logging =========
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# A rendered page: PIL image, or an (H, W, 3) uint8 array when rendered zero-copy
+PageImage = Union[Image.Image, np.ndarray]
+
+
+def _fitz():
+    import fitz  # PyMuPDF
+    return fitz
+
+
+class _PixmapArray(np.ndarray):
+    """ndarray view over a pixmap's sample buffer; keeps the pixmap alive."""
+    _pixmap = None
+
+
+# Substrings of Paddle error messages, by the retry that can fix them
+_MEMORY_HINTS = ("out of memory", "cannot allocate", "resourceexhausted", "bad_alloc", "too large")
+_LAYOUT_HINTS = ("contiguous", "stride", "buffer", "read-only", "readonly", "not writeable")
+_ANGLE_HINTS = ("cls", "angle", "classif")
+
+
+def classify_ocr_error(e: Exception) -> str:
+    """Failure class of a Paddle call: "memory", "layout", "angle", "input" or "unknown"."""
+    msg = f"{type(e).__name__}: {e}".lower()
+    if isinstance(e, MemoryError) or any(h in msg for h in _MEMORY_HINTS):
+        return "memory"
+    if any(h in msg for h in _LAYOUT_HINTS):
+        return "layout"
+    if any(h in msg for h in _ANGLE_HINTS):
+        return "angle"
+    if isinstance(e, ValueError) and "for ocr" in msg:
+        return "input"  # raised by _call_paddle's own validation
+    return "unknown"
+
+
+def _crop_box(img: np.ndarray, box: List[List[float]]) -> np.ndarray:
+    """Axis-aligned crop of a detected text box; tall boxes are rotated upright like Paddle does."""
+    xs = [pt[0] for pt in box]
+    ys = [pt[1] for pt in box]
+    h, w = img.shape[:2]
+    x0, x1 = max(0, int(min(xs))), min(w, int(np.ceil(max(xs))))
+    y0, y1 = max(0, int(min(ys))), min(h, int(np.ceil(max(ys))))
+    crop = img[y0:max(y1, y0 + 1), x0:max(x1, x0 + 1)]
+    if crop.shape[0] >= 1.5 * crop.shape[1]:
+        crop = np.rot90(crop)
+    return np.ascontiguousarray(crop)
+
+
+# Lines re-read at cfg.refine_dpi even when confident: values where one wrong
+# character breaks the field (NMLS IDs, amounts, dates)
+_REFINE_ANCHORS = re.compile(r"nmls|\$|\d[\d,]*\.\d{2}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b", re.I)
+
+
+def page_zoom(page: "fitz.Page", dpi: int, max_side: int = 0) -> float:
+    """
+    Zoom factor that renders `page` at `dpi`, capped so the longest side of
+    the pixmap is at most `max_side` px. page.rect is the visible, rotation-
+    aware page box, i.e. exactly what get_pixmap rasterizes.
+    """
+    zoom = dpi / 72.0
+    if max_side:
+        longest = max(page.rect.width, page.rect.height)
+        if longest > 0:
+            zoom = min(zoom, max_side / longest)
+    return zoom
+
+
+def pixmap_to_array(pix: "fitz.Pixmap") -> np.ndarray:
+    """Wrap an RGB pixmap's samples as an (H, W, 3) uint8 array without copying."""
+    if pix.stride != pix.width * pix.n:
+        arr = np.frombuffer(pix.samples, dtype=np.uint8)
+        return arr.reshape(pix.height, pix.stride)[:, : pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+    arr = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n).view(_PixmapArray)
+    arr._pixmap = pix
+    return arr
+
+
+def iter_pdf_pages(pdf_path: str, dpi: int, max_side: int = 0,
+                   as_array: bool = False) -> Iterator[Tuple[int, PageImage]]:
+    """
+    Lazily render PDF pages as (page_index, image), one at a time, directly
+    at the OCR target size (see page_zoom) instead of rendering at full DPI
+    and downscaling afterwards.
+    """
+    with _fitz().open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            yield i, render_page(page, dpi, max_side, as_array)
+
+
+def render_page(page: "fitz.Page", dpi: int, max_side: int = 0, as_array: bool = False) -> PageImage:
+    zoom = page_zoom(page, dpi, max_side)
+    pix = page.get_pixmap(matrix=_fitz().Matrix(zoom, zoom), alpha=False)  # no alpha
+    if as_array:
+        return pixmap_to_array(pix)
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+
+def render_pdf(pdf_path: str, dpi: int, max_side: int = 0) -> List[Image.Image]:
+    """Render each PDF page to a PIL RGB image with DPI scaling (no Paddle needed)."""
+    images: List[Image.Image] = []
+    try:
+        for _i, img in iter_pdf_pages(pdf_path, dpi, max_side):
+            images.append(img)
+        logging.info("PDF %s converted into %d images", pdf_path, len(images))
+    except Exception as e:
+        logging.error("Failed to convert PDF %s: %s", pdf_path, e)
+    return images
 
 
 @dataclass
@@ -34,42 +151,137 @@ class OCRConfig:
     lang: str = "en"
     use_angle_cls: bool = True
     workers: int = 1               # PaddleOCR is not thread-safe; keep 1
+    processes: int = 1             # >1 -> OCRPool, one PaddleOCR per worker process
     max_side: int = 2000           # cap longest side to avoid huge tensors
+    prefetch: int = 2              # pages rendered ahead of OCR in run_stream (bounds memory)
+    zero_copy: bool = False        # run_stream: hand pixmap buffers to numpy without copying
+    text_layer: bool = True        # run_stream: use the PDF's own text instead of OCR when usable
+    text_layer_min_chars: int = 40 # fewer non-space chars than this -> treat page as image-only
+    text_layer_max_image_cover: float = 0.5  # images over more of the page than this -> scan, OCR it
+    text_layer_min_text_cover: float = 0.02  # words over less of the page than this -> OCR it
+    cache_dir: Optional[str] = None  # on-disk OCR result cache (None = disabled)
+    cache_max_mb: int = 1024       # LRU-evict cache entries beyond this size
+    skip_blank: bool = True        # don't OCR pages whose thumbnail has (almost) no ink
+    blank_max_ink: float = 1e-4    # ink density (see blank.ink_ratio) at or below which a page is blank
+    ocr_budget_s: float = 30.0     # per-page time budget for Paddle retries (0 = unlimited)
+    refine_dpi: int = 0            # >0: re-recognize uncertain lines from a clip rendered at this DPI
+    refine_below: float = 0.85     # lines scoring below this are refined
+    refine_anchors: bool = True    # also refine lines holding NMLS IDs, amounts, dates
+    refine_max_lines: int = 60     # per page, least confident first
+    refine_pad: float = 0.15       # clip padding around a line box, as a fraction of its height
+
+
+def make_cache(cfg: OCRConfig) -> Optional[OCRCache]:
+    return OCRCache(cfg.cache_dir, cfg.cache_max_mb * 1024 * 1024) if cfg.cache_dir else None
+
+
+class PageJob(NamedTuple):
+    index: int
+    image: Optional[PageImage]         # set when the page still needs OCR
+    page: Optional[Dict[str, Any]]     # set when resolved without OCR (text layer, cache)
+    cache_key: Optional[str] = None    # store the OCR result under this key
+    render_seconds: float = 0.0        # time spent rasterizing the page
+    scale: float = 0.0                 # render zoom: PDF points = image px / scale
+    render_cpu_seconds: float = 0.0    # CPU time of that (rendering thread)
+
+
+def iter_pdf_jobs(pdf_path: str, cfg: OCRConfig, cache: Optional[OCRCache] = None) -> Iterator[PageJob]:
+    """
+    Per page, yield a PageJob carrying either an image that needs OCR, or a
+    page already resolved from the text layer, as blank, or from the OCR cache.
+    """
+    settings = {"dpi": cfg.dpi, "max_side": cfg.max_side, "lang": cfg.lang, "angle_cls": cfg.use_angle_cls}
+    if cfg.refine_dpi:  # cached results include the second pass
+        settings.update(refine_dpi=cfg.refine_dpi, refine_below=cfg.refine_below,
+                        refine_anchors=cfg.refine_anchors, refine_max_lines=cfg.refine_max_lines)
+    with _fitz().open(pdf_path) as doc:
+        for i, page in enumerate(doc):
+            if cfg.text_layer:
+                zoom = page_zoom(page, cfg.dpi, cfg.max_side)
+                ready = text_layer_page(page, i, zoom, cfg.text_layer_min_chars,
+                                        cfg.text_layer_max_image_cover, cfg.text_layer_min_text_cover)
+                if ready is not None:
+                    yield PageJob(i, None, ready)
+                    continue
+            if cfg.skip_blank:
+                ink = page_ink_ratio(page)
+                if ink <= cfg.blank_max_ink:
+                    yield PageJob(i, None, blank_page(i, ink))
+                    continue
+            key = None
+            if cache is not None:
+                key = cache.page_key(page, settings)
+                hit = cache.get(key, i)
+                if hit is not None:
+                    yield PageJob(i, None, hit)
+                    continue
+            t0, c0 = time.perf_counter(), time.thread_time()
+            image = render_page(page, cfg.dpi, cfg.max_side, cfg.zero_copy)
+            yield PageJob(i, image, None, key, round(time.perf_counter() - t0, 4),
+                          page_zoom(page, cfg.dpi, cfg.max_side), round(time.thread_time() - c0, 4))
+
+
+def refine_candidates(lines: PageLines, cfg: OCRConfig) -> List[int]:
+    """Indices of lines worth a high-DPI second look, least confident first."""
+    mask = lines.scores < cfg.refine_below
+    if cfg.refine_anchors:
+        mask |= np.fromiter((_REFINE_ANCHORS.search(t) is not None for t in lines.texts), bool, len(lines))
+    picks = np.flatnonzero(mask)
+    picks = picks[np.argsort(lines.scores[picks], kind="stable")]
+    return picks[:cfg.refine_max_lines].tolist()
+
+
+def needs_refine(page: Dict[str, Any], cfg: OCRConfig) -> bool:
+    """OCR'd page whose render was coarser than cfg.refine_dpi."""
+    return bool(cfg.refine_dpi and page.get("source") == "ocr" and page.get("lines")
+                and 0 < page.get("scale", 0) < cfg.refine_dpi / 72.0)
+
+
+def line_clip(page: "fitz.Page", bounds: np.ndarray, scale: float, pad: float) -> "fitz.Rect":
+    """PDF-space clip rectangle of line bounds [x0, y0, x1, y1] on an image rendered at `scale`."""
+    x0, y0, x1, y1 = (float(v) / scale for v in bounds)
+    p = (y1 - y0) * pad
+    return _fitz().Rect(x0 - p, y0 - p, x1 + p, y1 + p) & page.rect
+
+
+def page_sources(pages: List[Dict[str, Any]]) -> Dict[str, int]:
+    """How many pages took each path ("ocr", "text", "blank", "cache")."""
+    return dict(Counter(p.get("source", "ocr") for p in pages))
 
 
 class OCRService:
-    def __init__(self, cfg: OCRConfig = OCRConfig()):
+    def __init__(self, cfg: OCRConfig = OCRConfig(), ocr: Any = None):
         self.cfg = cfg
         self._ocr_lock = threading.Lock()  # guard all Paddle calls
+        self.cache = make_cache(cfg)
 
         # ✅ Instantiate PaddleOCR with only supported arguments
-        self.ocr = PaddleOCR(
-            lang=cfg.lang,
-            use_angle_cls=cfg.use_angle_cls,
-        )
+        # (`ocr` injects any object with PaddleOCR's .ocr(img, cls=) API, e.g. a benchmark stub)
+        if ocr is None:
+            from paddleocr import PaddleOCR  # heavy (loads paddle); only when OCR is really needed
+            ocr = PaddleOCR(
+                lang=cfg.lang,
+                use_angle_cls=cfg.use_angle_cls,
+            )
+        self.ocr = ocr
 
         logging.info("OCRService initialized with config: %s", cfg)
 
     # ---------------------- PDF -> PIL Images ----------------------
     def pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
         """Render each PDF page to a PIL RGB image with DPI scaling."""
-        images: List[Image.Image] = []
-        try:
-            with fitz.open(pdf_path) as doc:
-                zoom = self.cfg.dpi / 72.0
-                mat = fitz.Matrix(zoom, zoom)
-                for _i, page in enumerate(doc, start=1):
-                    pix = page.get_pixmap(matrix=mat, alpha=False)  # no alpha
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    images.append(img)
-            logging.info("PDF %s converted into %d images", pdf_path, len(images))
-        except Exception as e:
-            logging.error("Failed to convert PDF %s: %s", pdf_path, e)
-        return images
+        return render_pdf(pdf_path, self.cfg.dpi, self.cfg.max_side)
 
     # ---------------------- Helpers ----------------------
-    def _prepare_np(self, img: Image.Image) -> np.ndarray:
+    def _prepare_np(self, img: PageImage) -> np.ndarray:
         """Ensure a safe, contiguous RGB uint8 array with optional downscale."""
+        if isinstance(img, np.ndarray):
+            h, w = img.shape[:2]
+            if not (self.cfg.max_side and max(h, w) > self.cfg.max_side):
+                if img.dtype == np.uint8 and img.ndim == 3 and img.shape[2] == 3:
+                    return np.ascontiguousarray(img)
+            img = Image.fromarray(np.ascontiguousarray(img))
+
         if img.mode != "RGB":
             img = img.convert("RGB")
 
@@ -100,70 +312,176 @@ class OCRService:
         with self._ocr_lock:
             return self.ocr.ocr(arr, cls=angle_cls)
 
-    def _safe_ocr(self, np_img: np.ndarray):
-        """Retry strategy to survive transient Paddle errors."""
-        try:
-            return self._call_paddle(np_img, self.cfg.use_angle_cls)
-        except Exception as e1:
-            logging.warning("PaddleOCR attempt#1 failed: %s", e1)
+    def _ocr_scaled(self, np_img: np.ndarray, factor: float, angle_cls: bool) -> Any:
+        """OCR a downscaled copy; boxes are mapped back to `np_img` coordinates."""
+        h, w = np_img.shape[:2]
+        small = Image.fromarray(np_img).resize((max(1, int(w * factor)), max(1, int(h * factor))), Image.BILINEAR)
+        res = self._call_paddle(np.ascontiguousarray(np.array(small, dtype=np.uint8)), angle_cls)
+        inv = 1.0 / factor
+        return [[[[[x * inv, y * inv] for x, y in line[0]], line[1]] for line in (page or [])]
+                for page in (res or [])]
 
-        try:
-            return self._call_paddle(np_img.copy(order="C"), self.cfg.use_angle_cls)
-        except Exception as e2:
-            logging.warning("PaddleOCR attempt#2 (copy) failed: %s", e2)
+    def _ocr_split(self, np_img: np.ndarray, angle_cls: bool, det_cache: Dict[str, Any]) -> Any:
+        """
+        Detection and recognition as separate Paddle calls. The detected boxes
+        are kept in `det_cache`, so a recognition retry doesn't detect again.
+        """
+        if "boxes" not in det_cache:
+            with self._ocr_lock:
+                det = self.ocr.ocr(np_img, det=True, rec=False, cls=False)
+            det_cache["boxes"] = (det[0] if det else None) or []
+        boxes = det_cache["boxes"]
+        if not boxes:
+            return [[]]
+        texts = self._recognize([_crop_box(np_img, b) for b in boxes], angle_cls)
+        return [[[b, tuple(t)] for b, t in zip(boxes, texts)]]
 
-        try:
-            h, w = np_img.shape[:2]
-            if h > 1 and w > 1:
-                nh = max(1, int(h * 0.8))
-                nw = max(1, int(w * 0.8))
-                small = Image.fromarray(np_img).resize((nw, nh), Image.BILINEAR)
-                small_np = np.ascontiguousarray(np.array(small, dtype=np.uint8))
-                return self._call_paddle(small_np, self.cfg.use_angle_cls)
-        except Exception as e3:
-            logging.warning("PaddleOCR attempt#3 (shrink) failed: %s", e3)
+    def _recognize(self, crops: List[np.ndarray], angle_cls: bool) -> List[Tuple[str, float]]:
+        """
+        Recognition only, one (text, score) per crop. Paddle reads a plain
+        list as separate pages (and cuts it to the page count it saw first),
+        so the crops go in as one image list: [crops] is a single batch.
+        """
+        with self._ocr_lock:
+            rec = self.ocr.ocr([crops], det=False, rec=True, cls=angle_cls)
+        texts = list((rec[0] if rec else None) or [])
+        if len(texts) != len(crops):
+            logging.warning("PaddleOCR recognized %d of %d crops", len(texts), len(crops))
+        return texts
 
-        try:
-            return self._call_paddle(np_img, angle_cls=False)
-        except Exception as e4:
-            logging.error("PaddleOCR attempt#4 (angle_cls=False) failed: %s", e4)
+    def _next_attempt(self, kind: str, step: str, det_cache: Dict[str, Any], tried: List[str]) -> Optional[str]:
+        """Pick the retry that can fix a failure of class `kind` (see classify_ocr_error)."""
+        if kind == "input":
+            return None  # bad tensor: no retry will change that
+        if step in ("det+rec", "rec_no_cls"):
+            if "boxes" in det_cache:  # detection worked, recognition failed
+                nxt = "rec_no_cls" if self.cfg.use_angle_cls else None
+            else:
+                nxt = "shrink"
+        else:
+            nxt = {"memory": "shrink", "layout": "copy", "angle": "no_angle_cls"}.get(kind, "det+rec")
+            if nxt == "no_angle_cls" and not self.cfg.use_angle_cls:
+                nxt = "det+rec"
+        return nxt if nxt not in tried else None
+
+    def _safe_ocr(self, np_img: np.ndarray) -> Tuple[Any, str, int]:
+        """
+        Retry ladder for Paddle failures. A healthy page costs one det+rec
+        call; after a failure the next attempt depends on the error class:
+
+          layout  -> fresh C-contiguous copy
+          memory  -> 0.8x downscale (boxes mapped back)
+          angle   -> without the angle classifier
+          unknown -> detection and recognition split; recognition retries
+                     (e.g. without angle classifier) reuse the detected boxes
 
-        logging.error("PaddleOCR failed after 4 attempts on page image.")
-        return []
+        At most 4 attempts, and a retry only starts if it is expected to
+        finish within cfg.ocr_budget_s for the page. Returns the raw result,
+        which attempt produced it ("full", "copy", "shrink", "no_angle_cls",
+        "det+rec", "rec_no_cls", or "failed" / "timeout") and the try count.
+        """
+        t0 = time.perf_counter()
+        cls = self.cfg.use_angle_cls
+        det_cache: Dict[str, Any] = {}
+        attempts = {
+            "full": lambda: self._call_paddle(np_img, cls),
+            "copy": lambda: self._call_paddle(np_img.copy(order="C"), cls),
+            "shrink": lambda: self._ocr_scaled(np_img, 0.8, cls),
+            "no_angle_cls": lambda: self._call_paddle(np_img, angle_cls=False),
+            "det+rec": lambda: self._ocr_split(np_img, cls, det_cache),
+            "rec_no_cls": lambda: self._ocr_split(np_img, False, det_cache),
+        }
+        step: Optional[str] = "full"
+        tried: List[str] = []
+        last = 0.0
+        while step and len(tried) < 4:
+            if tried and self.cfg.ocr_budget_s:
+                elapsed = time.perf_counter() - t0
+                if elapsed + last > self.cfg.ocr_budget_s:
+                    logging.error("PaddleOCR gave up after %.1fs (%s): page budget %.1fs exhausted",
+                                  elapsed, ", ".join(tried), self.cfg.ocr_budget_s)
+                    return [], "timeout", len(tried)
+            tried.append(step)
+            t = time.perf_counter()
+            try:
+                return attempts[step](), step, len(tried)
+            except Exception as e:
+                last = time.perf_counter() - t
+                kind = classify_ocr_error(e)
+                logging.warning("PaddleOCR attempt#%d (%s) failed [%s]: %s", len(tried), step, kind, e)
+                step = self._next_attempt(kind, step, det_cache, tried)
+
+        logging.error("PaddleOCR failed after %d attempts (%s) on page image.", len(tried), ", ".join(tried))
+        return [], "failed", len(tried)
 
     # ---------------------- Per-page OCR ----------------------
-    def run_page(self, page_idx: int, img: Image.Image) -> Dict[str, Any]:
+    def run_page(self, page_idx: int, img: PageImage) -> Dict[str, Any]:
+        t0, c0 = time.perf_counter(), time.thread_time()
+        attempt, tries = "failed", 0
         try:
             np_img = self._prepare_np(img)
-            results = self._safe_ocr(np_img)
-
-            lines: List[Dict[str, Any]] = []
-            if isinstance(results, list) and results:
-                for res in results:
-                    for line in res:
-                        box, txtpack = line[0], line[1]
-                        if isinstance(txtpack, (list, tuple)) and len(txtpack) >= 2:
-                            text, score = txtpack[0], txtpack[1]
-                        else:
-                            text, score = str(txtpack), 0.0
-                        lines.append({
-                            "text": text,
-                            "score": float(score),
-                            "box": box
-                        })
+            results, attempt, tries = self._safe_ocr(np_img)
+
+            lines = PageLines.from_paddle(results if isinstance(results, list) else None)
 
             # Sort lines top-to-bottom, then left-to-right
-            lines.sort(
-                key=lambda l: (
-                    min(pt[1] for pt in l["box"]) if l.get("box") else 0,
-                    min(pt[0] for pt in l["box"]) if l.get("box") else 0
-                )
-            )
-            return {"page_index": page_idx, "lines": lines}
+            lines = lines.sorted()
+            return {"page_index": page_idx, "lines": lines, "source": "ocr",
+                    "ocr_attempt": attempt, "ocr_tries": tries,
+                    "ocr_seconds": round(time.perf_counter() - t0, 4),
+                    "ocr_cpu_seconds": round(time.thread_time() - c0, 4), "rss_mb": current_rss_mb()}
 
         except Exception as e:
             logging.warning("OCR failed for page %d: %s", page_idx, e)
-            return {"page_index": page_idx, "lines": []}
+            return {"page_index": page_idx, "lines": PageLines(), "source": "ocr",
+                    "ocr_attempt": attempt, "ocr_tries": tries,
+                    "ocr_seconds": round(time.perf_counter() - t0, 4),
+                    "ocr_cpu_seconds": round(time.thread_time() - c0, 4), "rss_mb": current_rss_mb()}
+
+    # ---------------------- High-DPI refinement ----------------------
+    def refine_page(self, fz_page: "fitz.Page", page: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Second pass over one OCR'd page: the boxes of its uncertain lines
+        (refine_candidates) are rendered at cfg.refine_dpi through a PyMuPDF
+        clip and only those crops are re-recognized (no detection). A line
+        takes the new reading when it scores higher and is marked "refined".
+        """
+        t0 = time.perf_counter()
+        lines = page["lines"] = page_lines(page)
+        zoom = self.cfg.refine_dpi / 72.0
+        picks: List[int] = []
+        crops: List[np.ndarray] = []
+        for i in refine_candidates(lines, self.cfg):
+            clip = line_clip(fz_page, lines.bounds[i], page["scale"], self.cfg.refine_pad)
+            if clip.is_empty:
+                continue
+            crop = pixmap_to_array(fz_page.get_pixmap(matrix=_fitz().Matrix(zoom, zoom), clip=clip, alpha=False))
+            if crop.shape[0] >= 1.5 * crop.shape[1]:
+                crop = np.rot90(crop)
+            picks.append(i)
+            crops.append(np.ascontiguousarray(crop))
+
+        improved = 0
+        if crops:
+            try:
+                for i, (text, score) in zip(picks, self._recognize(crops, self.cfg.use_angle_cls)):
+                    if text.strip() and float(score) > lines.scores[i]:
+                        lines.set_line(i, text, float(score), refined=True)
+                        improved += 1
+            except Exception as e:
+                logging.warning("High-DPI refinement failed for page %d: %s", page["page_index"], e)
+        page["refined"] = improved
+        page["refine_seconds"] = round(time.perf_counter() - t0, 4)
+        return page
+
+    def refine_pages(self, pdf_path: str, pages: List[Dict[str, Any]]) -> None:
+        """refine_page for every page that needs_refine, in place."""
+        todo = [p for p in pages if needs_refine(p, self.cfg)]
+        if not todo:
+            return
+        with _fitz().open(pdf_path) as doc:
+            for p in tqdm(todo, desc="Refine pages"):
+                self.refine_page(doc[p["page_index"]], p)
 
     # ---------------------- Batch OCR ----------------------
     def run(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
@@ -181,3 +499,39 @@ class OCRService:
 
         pages.sort(key=lambda p: p["page_index"])
         return pages
+
+    # ---------------------- Streaming OCR ----------------------
+    def run_stream(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Render and OCR a PDF page by page. Rendering of page k+1 overlaps OCR
+        of page k, and at most `cfg.prefetch` rendered pages are alive at once.
+        With cfg.refine_dpi, uncertain lines then get a high-DPI second pass.
+        Raises if any page cannot be rendered, so a partial document is never
+        returned as the whole one.
+        """
+        pages: List[Dict[str, Any]] = []
+        to_cache: Dict[int, str] = {}
+        jobs = prefetch(iter_pdf_jobs(pdf_path, self.cfg, self.cache), self.cfg.prefetch)
+        try:
+            for job in tqdm(jobs, desc="OCR pages"):
+                if job.page is not None:
+                    pages.append(job.page)
+                    continue
+                page = self.run_page(job.index, job.image)
+                page["render_seconds"] = job.render_seconds
+                page["render_cpu_seconds"] = job.render_cpu_seconds
+                page["scale"] = job.scale
+                if job.cache_key:
+                    to_cache[job.index] = job.cache_key
+                pages.append(page)
+                del job
+            self.refine_pages(pdf_path, pages)
+        except Exception as e:
+            # a document missing pages must fail, not be extracted as if complete
+            logging.error("Failed to convert PDF %s after %d pages: %s", pdf_path, len(pages), e)
+            raise
+        for p in pages:
+            if p["page_index"] in to_cache and p["lines"]:
+                self.cache.put(to_cache[p["page_index"]], p)
+        logging.info("PDF %s: %d pages by source %s", pdf_path, len(pages), page_sources(pages))
+        return pages
@@ -0,0 +1,121 @@
+# src/ocr_cache.py
+from typing import Dict, Any, Optional, TYPE_CHECKING
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+from .lines import PageLines, json_default
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF; annotations only, imported on first use at runtime
+
+# Bump when the stored page shape or OCR post-processing changes
+CACHE_VERSION = 1
+
+
+class OCRCache:
+    """
+    Content-addressed on-disk cache of per-page OCR output.
+
+    Keys hash the page's content stream, the raw bytes of every image /
+    XObject it draws, its geometry and the OCR settings, so the same page
+    inside a resubmitted or duplicated PDF hits regardless of file name,
+    while any changed page is recomputed. Entries are evicted least recently
+    used first once the cache grows beyond `max_bytes`.
+    """
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._entries())
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------------- Keys ----------------------
+    @staticmethod
+    def page_key(page: "fitz.Page", settings: Dict[str, Any]) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps({"v": CACHE_VERSION, **settings}, sort_keys=True).encode())
+        h.update(repr((tuple(page.rect), page.rotation)).encode())
+        h.update(page.read_contents())
+        doc = page.parent
+        xrefs = {img[0] for img in page.get_images(full=True)}
+        xrefs.update(x[0] for x in page.get_xobjects())
+        for xref in sorted(xrefs):
+            h.update(doc.xref_stream_raw(xref) or b"")
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def _entries(self):
+        for dirpath, _dirs, files in os.walk(self.root):
+            for f in files:
+                if f.endswith(".json"):
+                    yield os.path.join(dirpath, f)
+
+    # ---------------------- Get / put ----------------------
+    def get(self, key: str, page_idx: int) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"page_index": page_idx, "lines": PageLines.from_dicts(lines), "source": "cache"}
+
+    def put(self, key: str, page: Dict[str, Any]) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = json.dumps(page["lines"], separators=(",", ":"), default=json_default).encode("utf-8")
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)  # overwriting an entry: count only the difference
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning("OCR cache write failed for %s: %s", key, e)
+            return
+        with self._lock:
+            self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache is ~90% of max_bytes."""
+        entries = []
+        for p in self._entries():
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        size = sum(e[1] for e in entries)
+        target = int(self.max_bytes * 0.9)
+        for _mtime, sz, p in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(p)
+                size -= sz
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
+            self._size = 0
+        logging.info("OCR cache cleared: %s", self.root)
@@ -0,0 +1,125 @@
+# src/ocr_pool.py
+from typing import List, Dict, Any, Optional
+import os
+import logging
+import multiprocessing
+import concurrent.futures
+from dataclasses import replace
+from PIL import Image
+from tqdm import tqdm
+
+# Importing src.ocr applies the single-thread BLAS / Paddle env setup; spawned
+# workers re-import this module, so every process gets it before Paddle loads.
+from .ocr import (OCRService, OCRConfig, PageImage, render_pdf, iter_pdf_jobs, page_sources, make_cache,
+                  PageJob, needs_refine, _fitz)
+
+# One PaddleOCR instance per worker process, built by the pool initializer
+_worker_ocr: Optional[OCRService] = None
+
+
+def _init_worker(cfg: OCRConfig) -> None:
+    global _worker_ocr
+    _worker_ocr = OCRService(cfg)
+
+
+def _ocr_page(page_idx: int, img: PageImage) -> Dict[str, Any]:
+    return _worker_ocr.run_page(page_idx, img)
+
+
+def _refine_page(pdf_path: str, page: Dict[str, Any]) -> Dict[str, Any]:
+    with _fitz().open(pdf_path) as doc:
+        return _worker_ocr.refine_page(doc[page["page_index"]], page)
+
+
+class OCRPool:
+    """
+    Process-pool OCR engine: pages are farmed out across worker processes,
+    each holding its own PaddleOCR, and returned ordered by page_index
+    exactly like OCRService.run.
+    """
+    def __init__(self, cfg: OCRConfig = OCRConfig(), processes: Optional[int] = None):
+        self.cfg = cfg
+        n = processes or (cfg.processes if cfg.processes > 1 else os.cpu_count())
+        self.processes = max(1, int(n or 1))
+        # spawn: never fork a parent that may already hold Paddle/BLAS state
+        self._executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(replace(cfg, cache_dir=None),),  # cache lives in the parent only
+        )
+        self.cache = make_cache(cfg)
+        logging.info("OCRPool started with %d worker processes", self.processes)
+
+    def pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
+        return render_pdf(pdf_path, self.cfg.dpi, self.cfg.max_side)
+
+    def run(self, images: List[Image.Image]) -> List[Dict[str, Any]]:
+        futures = [self._executor.submit(_ocr_page, i, img) for i, img in enumerate(images)]
+        pages: List[Dict[str, Any]] = []
+        for fut in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="OCR pages"):
+            pages.append(fut.result())
+        pages.sort(key=lambda p: p["page_index"])
+        return pages
+
+    def run_stream(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """
+        Render pages in this process while workers OCR earlier ones; at most
+        processes + cfg.prefetch rendered pages are in flight at once.
+        The cfg.refine_dpi second pass is spread over the workers as well.
+        Raises if any page cannot be rendered (see OCRService.run_stream).
+        """
+        limit = self.processes + max(1, self.cfg.prefetch)
+        pending: Dict[concurrent.futures.Future, PageJob] = {}
+        pages: List[Dict[str, Any]] = []
+        to_cache: Dict[int, str] = {}
+
+        def _collect(futures) -> None:
+            for f in futures:
+                page = f.result()
+                job = pending.pop(f)
+                page["render_seconds"] = job.render_seconds
+                page["render_cpu_seconds"] = job.render_cpu_seconds
+                page["scale"] = job.scale
+                if job.cache_key:
+                    to_cache[job.index] = job.cache_key
+                pages.append(page)
+
+        try:
+            for job in iter_pdf_jobs(pdf_path, self.cfg, self.cache):
+                if job.page is not None:
+                    pages.append(job.page)
+                    continue
+                if len(pending) >= limit:
+                    done, _ = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    _collect(done)
+                pending[self._executor.submit(_ocr_page, job.index, job.image)] = job._replace(image=None)
+        except Exception as e:
+            logging.error("Failed to convert PDF %s after %d pages: %s", pdf_path, len(pages), e)
+            for f in pending:
+                f.cancel()
+            raise
+        _collect(concurrent.futures.as_completed(list(pending)))
+        pages.sort(key=lambda p: p["page_index"])
+        refining = {self._executor.submit(_refine_page, pdf_path, p): i
+                    for i, p in enumerate(pages) if needs_refine(p, self.cfg)}
+        for f in concurrent.futures.as_completed(refining):
+            try:
+                pages[refining[f]] = f.result()
+            except Exception as e:
+                logging.warning("High-DPI refinement failed in worker: %s", e)
+        for p in pages:
+            if p["page_index"] in to_cache and p["lines"]:
+                self.cache.put(to_cache[p["page_index"]], p)
+        logging.info("PDF %s: %d pages by source %s", pdf_path, len(pages), page_sources(pages))
+        return pages
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "OCRPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,14 +1,23 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable
 import logging
 import json
-from .ocr import OCRService, OCRConfig
+import threading
+from dataclasses import dataclass, field
+from .ocr import OCRService, OCRConfig, page_sources
+from .ocr_pool import OCRPool
 from .preprocess import preprocess_pages
-from .utils.pdf_utils import pages_to_layout_json
-from .gemini_extractor import GeminiExtractor
+from .context import select_context
+from .utils.pdf_utils import pages_to_layout_json, LAYOUT_MODES
+from .llm_backends import LLMExtractor, make_extractor, parse_model_spec
+from .llm_cache import ResponseCache
 from .merge import merge
-from .validate import normalize
+from .validate import normalize, validity
+from .prompts import prompt_version
+from .rules import RuleExtractor
+from .checkpoint import CheckpointStore, DocCheckpoint, input_key
+from .metrics import Metrics, TOTALS
 
-logging.basicConfig(level=logging.INFO)
+LLM_MODES = ("always", "fallback", "never")
 
 REQUIRED_FIELDS = [
     "borrowers", "loan_amount", "recording_date", "recording_location",
@@ -16,38 +25,250 @@ REQUIRED_FIELDS = [
     "loan_originator_name", "loan_originator_nmls_id",
 ]
 
-def run_pipeline(pdf_path: str, dpi: int = 300, model: str = "gemini-1.5-flash") -> Dict[str, Any]:
-    try:
+
+@dataclass
+class DocumentResult:
+    data: Dict[str, Any]                                   # normalized extracted fields
+    meta: Dict[str, Any] = field(default_factory=dict)     # per-document report (page sources, ...)
+
+
+class PipelineEngine:
+    """
+    Long-lived pipeline that owns the loaded PaddleOCR model and LLM client.
+
+    Both are built on first use and reused for every document processed
+    through the same engine, so model load is paid once per process instead
+    of once per PDF.
+    """
+    def __init__(self, dpi: int = 300, model: str = "gemini-1.5-flash",
+                 ocr_cfg: Optional[OCRConfig] = None, ocr_processes: int = 1,
+                 llm_cache: Optional[ResponseCache] = None,
+                 context_budget: Optional[int] = None, llm_mode: str = "always",
+                 work_dir: Optional[str] = None,
+                 ocr: Optional[Union[OCRService, OCRPool]] = None,
+                 extractor: Optional[LLMExtractor] = None,
+                 llm_base_url: Optional[str] = None, layout: str = "json"):
+        if llm_mode not in LLM_MODES:
+            raise ValueError(f"llm_mode must be one of {LLM_MODES}, got {llm_mode!r}")
+        if layout not in LAYOUT_MODES:
+            raise ValueError(f"layout must be one of {LAYOUT_MODES}, got {layout!r}")
+        if parse_model_spec(model)[0] == "rules":
+            llm_mode = "never"
+        self.dpi = dpi
+        self.model = model                # backend spec, see llm_backends.parse_model_spec
+        self.llm_base_url = llm_base_url  # for OpenAI-compatible (local) backends
+        self.llm_cache = llm_cache
+        self.context_budget = context_budget  # max prompt tokens of OCR context; None = full document
+        self.layout = layout                  # how OCR lines are serialized into prompts
+        # "always": LLM extracts everything (rules unused); "fallback": rule extractor
+        # first, LLM only for fields it could not fill; "never": rules only, no API calls
+        self.llm_mode = llm_mode
+        self.rules = RuleExtractor()
+        # Per-stage artifacts so a failed LLM step resumes without redoing OCR
+        self.checkpoints = CheckpointStore(work_dir) if work_dir else None
+        self.ocr_cfg = ocr_cfg or OCRConfig(dpi=dpi, processes=ocr_processes)
+        # Pre-built backends may be injected (benchmarks, tests); otherwise built lazily
+        self._ocr: Optional[Union[OCRService, OCRPool]] = ocr
+        self._extractor: Optional[LLMExtractor] = extractor
+        self._init_lock = threading.Lock()
+
+    @property
+    def ocr(self) -> Union[OCRService, OCRPool]:
+        if self._ocr is None:
+            with self._init_lock:
+                if self._ocr is None:
+                    if self.ocr_cfg.processes > 1:
+                        self._ocr = OCRPool(self.ocr_cfg)
+                    else:
+                        self._ocr = OCRService(self.ocr_cfg)
+        return self._ocr
+
+    @property
+    def extractor(self) -> LLMExtractor:
+        if self._extractor is None:
+            with self._init_lock:
+                if self._extractor is None:
+                    self._extractor = make_extractor(self.model, cache=self.llm_cache,
+                                                     base_url=self.llm_base_url)
+        return self._extractor
+
+    def warm_up(self) -> "PipelineEngine":
+        """Load the OCR model and build the extractor eagerly (e.g. before a batch)."""
+        _ = self.ocr, self.extractor
+        return self
+
+    def close(self) -> None:
+        """Release OCR worker processes and LLM client connections, if any."""
+        if isinstance(self._ocr, OCRPool):
+            self._ocr.close()
+        self._ocr = None
+        if self._extractor is not None:
+            self._extractor.close()
+
+    def process(self, pdf_path: str) -> Dict[str, Any]:
+        """Run OCR + extraction for one PDF. Raises on failure."""
+        return self.process_document(pdf_path).data
+
+    def process_document(self, pdf_path: str) -> DocumentResult:
+        """Like process(), but also returns the per-document report."""
         logging.info(f"Starting pipeline for: {pdf_path}")
+        metrics = Metrics(pdf_path)
+        cleaned, meta = self.ocr_document(pdf_path, metrics)
+        result = self.extract_document(cleaned, meta, metrics)
+        logging.info(f"Pipeline completed successfully for {pdf_path}")
+        return result
+
+    # ---------------------- Checkpoints ----------------------
+    def _checkpoint(self, doc_id: Optional[str]) -> Optional[DocCheckpoint]:
+        if self.checkpoints is None or not doc_id:
+            return None
+        return self.checkpoints.open(doc_id)
+
+    def _settings(self) -> Dict[str, Any]:
+        """Everything that shapes stage artifacts; part of the checkpoint key."""
+        c = self.ocr_cfg
+        return {"dpi": c.dpi, "max_side": c.max_side, "lang": c.lang, "angle_cls": c.use_angle_cls,
+                "text_layer": c.text_layer, "text_layer_min_chars": c.text_layer_min_chars,
+                "text_layer_max_image_cover": c.text_layer_max_image_cover,
+                "text_layer_min_text_cover": c.text_layer_min_text_cover,
+                "skip_blank": c.skip_blank, "blank_max_ink": c.blank_max_ink,
+                "refine_dpi": c.refine_dpi, "refine_below": c.refine_below, "refine_anchors": c.refine_anchors,
+                "refine_max_lines": c.refine_max_lines, "refine_pad": c.refine_pad,
+                "model": self.model, "llm_mode": self.llm_mode,
+                "context_budget": self.context_budget, "layout": self.layout,
+                "prompts": prompt_version()}
+
+    @staticmethod
+    def _stage(ck: Optional[DocCheckpoint], name: str, compute, metrics: Optional[Metrics] = None,
+               complete: Optional[Callable[[Any], bool]] = None, inputs: Any = None):
+        """
+        Return the stage's checkpointed artifact, or compute and persist it.
+        `inputs` is what the stage computes from; a checkpoint made from other
+        inputs (an upstream stage ran again) is not reused. A result for which
+        `complete(data)` is False is returned but not persisted, so the next
+        run computes the stage again.
+        """
+        key = input_key(inputs) if ck is not None and inputs is not None else None
+        if ck is not None:
+            data = ck.load(name, key)
+            if data is not None:
+                logging.info(f"Resuming stage '{name}' from checkpoint {ck.path}")
+                return data
+        if metrics is None:
+            data = compute()
+        else:
+            with metrics.stage(name):
+                data = compute()
+        if ck is not None and (complete is None or complete(data)):
+            ck.save(name, data, key)
+        return data
+
+    # ---------------------- Stages ----------------------
+    def ocr_document(self, pdf_path: str, metrics: Optional[Metrics] = None, fresh: bool = False
+                     ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        OCR + preprocess stage: cleaned pages and the report so far. With
+        `fresh`, existing checkpoints of the document are discarded first.
+        """
+        doc_id = self.checkpoints.doc_id(pdf_path, self._settings()) if self.checkpoints else None
+        if doc_id and fresh:
+            self.checkpoints.discard(doc_id)
+        ck = self._checkpoint(doc_id)
 
-        # 1. OCR
-        ocr = OCRService(OCRConfig(dpi=dpi))
-        images = ocr.pdf_to_images(pdf_path)
-        pages = ocr.run(images)
-        logging.info(f"OCR completed. Extracted {len(pages)} pages.")
+        # 1. OCR (pages with a usable text layer skip it); a page Paddle gave up on
+        # is not checkpointed, so a rerun tries it again
+        pages = self._stage(ck, "ocr", lambda: self.ocr.run_stream(pdf_path), metrics,
+                            complete=lambda ps: not any(p.get("ocr_attempt") in ("failed", "timeout") for p in ps))
+        if metrics is not None:
+            metrics.record_pages(pages)
+        meta: Dict[str, Any] = {"pages": len(pages), "page_sources": page_sources(pages),
+                                "blank_pages": [p["page_index"] for p in pages if p.get("source") == "blank"]}
+        if doc_id:
+            meta["doc_id"] = doc_id
+        logging.info(f"OCR completed. Extracted {len(pages)} pages {meta['page_sources']}.")
 
         # 2. Preprocess
-        cleaned = preprocess_pages(pages)
-        layout_json = pages_to_layout_json(cleaned)
-
-        # 3. Full extraction
-        extractor = GeminiExtractor(model=model)
-        full = extractor.extract_full(layout_json)
-
-        # 4. Retry missing fields individually
-        missing = [k for k in REQUIRED_FIELDS if full.get(k) in [None, "", [], {}]]
-        if missing:
-            logging.warning(f"Missing fields detected: {missing}")
-            per_field = extractor.extract_fields(layout_json, missing)
-            merged = merge(full, per_field)
+        return self._stage(ck, "preprocess", lambda: preprocess_pages(pages), metrics, inputs=pages), meta
+
+    def extract_document(self, cleaned: List[Dict[str, Any]],
+                         meta: Optional[Dict[str, Any]] = None,
+                         metrics: Optional[Metrics] = None) -> DocumentResult:
+        """LLM / rule extraction stage over cleaned pages."""
+        meta = dict(meta or {})
+        ck = self._checkpoint(meta.get("doc_id"))
+
+        layout_json = self._stage(ck, "layout", lambda: pages_to_layout_json(cleaned, self.layout), metrics,
+                                  inputs=cleaned)
+
+        def layout_for(fields):
+            """Relevance-pruned layout JSON for `fields` (full document if no budget)."""
+            if not self.context_budget:
+                return layout_json
+            return pages_to_layout_json(select_context(cleaned, fields, self.context_budget), self.layout)
+
+        if self.llm_mode == "always":
+            # 3. Full extraction
+            full = self._stage(ck, "full", lambda: self.extractor.extract_full(
+                layout_for(REQUIRED_FIELDS), metrics=metrics), metrics, inputs=layout_json)
+
+            # 4. Retry missing fields individually
+            missing = [k for k in REQUIRED_FIELDS if full.get(k) in [None, "", [], {}]]
+            if missing:
+                logging.warning(f"Missing fields detected: {missing}")
+                per_field = self._stage(ck, "fields", lambda: self.extractor.extract_fields(
+                    layout_json, missing, context=layout_for, metrics=metrics, strict=True), metrics,
+                    inputs=[layout_json, missing])
+                merged = merge(full, per_field)
+            else:
+                merged = full
         else:
-            merged = full
+            # 3. Rule-based fields first; 4. LLM only for what is left
+            ruled = self._stage(ck, "rules", lambda: self.rules.extract(cleaned), metrics, inputs=cleaned)
+            valid = validity(ruled, REQUIRED_FIELDS)
+            remaining = [k for k in REQUIRED_FIELDS if not valid[k]]
+            meta["rule_fields"] = sorted(ruled)
+            merged = {k: ruled.get(k) for k in REQUIRED_FIELDS}
+            if remaining and self.llm_mode == "fallback":
+                logging.info(f"Rules filled {sorted(ruled)}; asking LLM for {remaining}")
+                llm = self._stage(ck, "fields", lambda: self.extractor.extract_fields(
+                    layout_json, remaining, context=layout_for, metrics=metrics, strict=True), metrics,
+                    inputs=[layout_json, remaining])
+                merged = merge(merged, llm, base_valid=valid)
+            elif not remaining:
+                logging.info("All fields found by rules; skipping LLM")
 
-        # 5. Normalize
-        final = normalize(merged)
-        logging.info(f"Pipeline completed successfully for {pdf_path}")
-        return final
+        # 5. Normalize (cheap, so never checkpointed: a fix here applies on the next run)
+        final = self._stage(None, "final", lambda: normalize(merged), metrics)
+        if ck is not None:
+            self.checkpoints.discard(meta["doc_id"])  # finished; the stage artifacts are not needed any more
+        return DocumentResult(final, self._report(meta, metrics))
 
+    def _report(self, meta: Dict[str, Any], metrics: Optional[Metrics]) -> Dict[str, Any]:
+        if self.llm_cache is not None:
+            meta["llm_cache"] = self.llm_cache.stats()
+        if metrics is not None:
+            TOTALS.add(metrics)
+            meta["metrics"] = metrics.to_dict()
+        return meta
+
+
+_ENGINES: Dict[Tuple[int, str], PipelineEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_engine(dpi: int = 300, model: str = "gemini-1.5-flash") -> PipelineEngine:
+    """Return the process-wide engine for (dpi, model), creating it once."""
+    key = (dpi, model)
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            engine = _ENGINES[key] = PipelineEngine(dpi=dpi, model=model)
+    return engine
+
+
+def run_pipeline(pdf_path: str, dpi: int = 300, model: str = "gemini-1.5-flash") -> Dict[str, Any]:
+    try:
+        return get_engine(dpi, model).process(pdf_path)
     except Exception as e:
         logging.error(f"Pipeline failed for {pdf_path}: {e}", exc_info=True)
         return {}
@@ -1,58 +1,152 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Pattern, Match
 import re
 import logging
+import numpy as np
+from .lines import page_lines
 
-logging.basicConfig(level=logging.INFO)
+class Rule(NamedTuple):
+    """
+    One misread fix. `pattern` must only use named groups (unique across the
+    rule set); `repl` is a match template like "0" or r"\g<prefix>0".
+    Rules of a later `stage` see the output of earlier stages. `first`
+    lists the characters a match can start with, so the stage can skip
+    ahead with a fast character-set scan ("" = unknown, any position).
+    """
+    name: str
+    pattern: str
+    repl: str
+    stage: int = 0
+    first: str = ""
 
-def fix_common_misreads(text: str) -> str:
-    """Fix common OCR misreads in extracted text."""
-    t = text
 
+DEFAULT_RULES: List[Rule] = [
     # Replace letter 'O' with zero when between digits
-    t = re.sub(r'(?<=\d)O(?=\d)', '0', t)
-
+    Rule("o_between_digits", r"(?<=\d)O(?=\d)", "0", first="O"),
     # Replace 'O' with zero when after a dollar sign
-    t = re.sub(r'(?<=\$)O(?=\d)', '0', t)
+    Rule("o_after_dollar", r"(?<=\$)O(?=\d)", "0", first="O"),
+    # Replace 'O' with zero in NMLS numbers (prefix group: lookbehinds can't be variable-width)
+    Rule("o_in_nmls", r"(?P<nmls_prefix>(?i:NMLS)[#:]?\s*)(?i:O)(?=\d)", r"\g<nmls_prefix>0", first="Nn"),
+    # Common letter-to-number misreads
+    Rule("i_to_1", r"\bI\b", "1", first="I"),   # 'I' -> 1
+    Rule("l_to_1", r"\bl\b", "1", first="l"),   # lowercase L -> 1
+    Rule("s_to_5", r"\bS\b", "5", first="S"),   # 'S' -> 5
+    # Ensure numbers with commas are treated as currency if missing $
+    # (after the fixes above, so "1,2O0" becomes "$1,200")
+    Rule("currency", r"(?<!\$)\b\d{1,3}(?:,\d{3})+(?:\.\d{2})?\b", r"$\g<0>", stage=1,
+         first="0123456789"),
+]
 
-    # Replace 'O' with zero in NMLS numbers (use capturing group to avoid variable-width lookbehind)
-    t = re.sub(r'(NMLS[#:]?\s*)O(?=\d)', r'\g<1>0', t, flags=re.I)
+# Replace common smart quotes and dashes
+DEFAULT_TRANSLATE: Dict[str, str] = {"“": '"', "”": '"', "’": "'", "—": "-", "–": "-"}
 
-    # Common letter-to-number misreads
-    t = re.sub(r'\bI\b', '1', t)   # 'I' -> 1
-    t = re.sub(r'\bl\b', '1', t)   # lowercase L -> 1
-    t = re.sub(r'\bS\b', '5', t)   # 'S' -> 5
+# Joins a page's lines for one regex pass: not \s, not \w, never in OCR text
+_SEP = "\x00"
 
-    # Ensure numbers with commas are treated as currency if missing $
-    t = re.sub(r'(?<!\$)(\b\d{1,3}(?:,\d{3})+(?:\.\d{2})?\b)', r'$\1', t)
 
-    # Replace common smart quotes and dashes
-    t = (t.replace('“', '"')
-           .replace('”', '"')
-           .replace('’', "'")
-           .replace('—', '-')
-           .replace('–', '-'))
+class TextNormalizer:
+    """
+    Misread fixes compiled into one alternation per stage, plus a
+    str.translate table for quotes and dashes. normalize_lines() runs each
+    stage once over a whole page (lines joined by NUL) instead of one
+    re.sub per rule per line.
+    """
+    def __init__(self, rules: List[Rule] = DEFAULT_RULES,
+                 translate: Optional[Dict[str, str]] = None):
+        self.rules = list(rules)
+        self._table = str.maketrans(DEFAULT_TRANSLATE if translate is None else translate)
+        self._repl = {r.name: r.repl for r in self.rules}
+        self._literal = {r.name for r in self.rules if "\\" not in r.repl}  # no template expansion needed
+        self._stages: List[Pattern[str]] = []
+        for stage in sorted({r.stage for r in self.rules}):
+            rules = [r for r in self.rules if r.stage == stage]
+            alts = "|".join(f"(?P<{r.name}>{r.pattern})" for r in rules)
+            if all(r.first for r in rules):
+                first = "".join(sorted({c for r in rules for c in r.first}))
+                alts = f"(?=[{re.escape(first)}])(?:{alts})"
+            self._stages.append(re.compile(alts))
+
+    def without(self, *names: str) -> "TextNormalizer":
+        """Same normalizer minus the named rules."""
+        return TextNormalizer([r for r in self.rules if r.name not in names], self._table)
+
+    def _sub(self, m: Match[str]) -> str:
+        name = m.lastgroup
+        return self._repl[name] if name in self._literal else m.expand(self._repl[name])
+
+    def _run(self, text: str) -> str:
+        text = text.translate(self._table)
+        for rx in self._stages:
+            text = rx.sub(self._sub, text)
+        return text
+
+    def normalize(self, text: str) -> str:
+        return self._run(text).strip()
 
-    return t.strip()
+    def normalize_lines(self, texts: List[str]) -> List[str]:
+        if any(_SEP in t for t in texts):
+            return [self.normalize(t) for t in texts]
+        return [t.strip() for t in self._run(_SEP.join(texts)).split(_SEP)] if texts else []
 
 
-def preprocess_pages(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+_DEFAULT = TextNormalizer()
+
+
+def fix_common_misreads(text: str) -> str:
+    """Fix common OCR misreads in extracted text."""
+    return _DEFAULT.normalize(text)
+
+
+def preprocess_pages(pages: List[Dict[str, Any]],
+                     normalizer: Optional[TextNormalizer] = None) -> List[Dict[str, Any]]:
     """Apply preprocessing and misread fixes to each page's text lines."""
+    normalizer = normalizer or _DEFAULT
     cleaned_pages = []
     for p in pages:
-        new_lines = []
-        for l in p["lines"]:
-            cleaned_text = fix_common_misreads(l["text"])
-            new_lines.append({**l, "text": cleaned_text})
+        lines = page_lines(p)
+        new_lines = lines.with_texts(normalizer.normalize_lines(lines.texts))
         cleaned_pages.append({**p, "lines": new_lines})
     logging.info(f"Preprocessed {len(cleaned_pages)} pages")
     return cleaned_pages
 
 
+def page_as_compact_text(page: Dict[str, Any], grid: int = 100) -> str:
+    """
+    Token-lean layout text: one output line per visual row, coordinates
+    quantized to a `grid` x `grid` page grid. A row is "y text"; further
+    lines on the same row follow as " | >x text", and the first line of a
+    row only carries ">x" when it is indented from the page's left margin.
+    """
+    lines = page_lines(page)
+    if not len(lines):
+        return ""
+    b = lines.bounds
+    width = max(float(b[:, 2].max()), 1.0)
+    height = max(float(b[:, 3].max()), 1.0)
+    yq = np.minimum(b[:, 1] / height * grid, grid - 1).astype(int)
+    xq = np.minimum(b[:, 0] / width * grid, grid - 1).astype(int)
+    margin = int(xq.min()) + 2
+    mid = (b[:, 1] + b[:, 3]) / 2
+    tol = 0.5 * float(np.median(b[:, 3] - b[:, 1]))
+
+    rows: List[List[int]] = []
+    for i in lines.reading_order().tolist():
+        if rows and abs(mid[i] - mid[rows[-1][0]]) <= tol:
+            rows[-1].append(i)
+        else:
+            rows.append([i])
+
+    out = []
+    for row in rows:
+        row.sort(key=lambda i: b[i, 0])
+        cells = [(f">{xq[i]} " if k or xq[i] > margin else "") + lines.texts[i] for k, i in enumerate(row)]
+        out.append(f"{yq[row[0]]} " + " | ".join(cells))
+    return "\n".join(out)
+
+
 def page_as_layout_text(page: Dict[str, Any]) -> str:
     """Render a page's lines into layout-aware text with coordinates."""
+    lines = page_lines(page)
     chunks = []
-    for i, l in enumerate(page["lines"], 1):
-        y = min(pt[1] for pt in l["box"])
-        x = min(pt[0] for pt in l["box"])
-        chunks.append(f"[{i:03d}|y={y:.0f}|x={x:.0f}] {l['text']}")
+    for i, (text, y, x) in enumerate(zip(lines.texts, lines.y0.tolist(), lines.x0.tolist()), 1):
+        chunks.append(f"[{i:03d}|y={y:.0f}|x={x:.0f}] {text}")
     return "\n".join(chunks)
@@ -1,4 +1,16 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Union
+import hashlib
+
+# Compact layout text (utils.pdf_utils, mode "compact") is introduced by this legend
+COMPACT_LEGEND = ("OCR_LAYOUT (one row per line: 'y text'; more text on the same row as "
+                  "' | >x text'; x/y are positions on a 100x100 page grid, x only shown when indented):")
+
+
+def layout_block(layout: Union[Dict[str, Any], str]) -> str:
+    """The OCR section of a prompt for either layout mode."""
+    if isinstance(layout, str):
+        return f"{COMPACT_LEGEND}\n{layout}"
+    return f"OCR_LAYOUT_JSON:\n{layout}"
 
 FIELDS = [
     "borrowers",
@@ -39,8 +51,7 @@ Rules:
 - For NMLS IDs, return only digits.
 - If truly missing, use null.
 
-OCR_LAYOUT_JSON:
-{layout_json}
+{layout_block(layout_json)}
 """.strip()
 
 def field_prompt(layout_json: Dict[str, Any], field: str) -> str:
@@ -52,6 +63,26 @@ Definition: {FIELD_GUIDELINES.get(field, "No definition provided.")}
 Return JSON only in this format:
 {{ "{field}": "value or null" }}
 
-OCR_LAYOUT_JSON:
-{layout_json}
+{layout_block(layout_json)}
+""".strip()
+
+def fields_prompt(layout_json: Dict[str, Any], fields: List[str]) -> str:
+    guidelines = {f: FIELD_GUIDELINES.get(f, "No definition provided.") for f in fields}
+    return f"""
+Extract the following fields from the OCR text:
+
+{guidelines}
+
+Rules:
+- Return a JSON object with exactly these keys, using null if truly missing.
+- For currency, return numbers only (no '$' or commas).
+- For dates, use MM/DD/YYYY.
+- For NMLS IDs, return only digits.
+
+{layout_block(layout_json)}
 """.strip()
+
+def prompt_version() -> str:
+    """Fingerprint of the prompt templates; part of the checkpoint key, so a prompt change re-runs the LLM stages."""
+    probe = full_doc_prompt("") + fields_prompt("", FIELDS) + "".join(field_prompt("", f) for f in FIELDS)
+    return hashlib.sha256(probe.encode("utf-8")).hexdigest()[:12]
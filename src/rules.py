@@ -0,0 +1,206 @@
+# src/rules.py
+from typing import List, Dict, Any, Optional, Tuple
+import re
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from .validate import MONEY, is_valid
+from .lines import page_lines
+
+# --- patterns ---------------------------------------------------------------
+NMLS_RX = re.compile(r'NMLS\s*(?:ID|No\.?|Number|Reg(?:istry)?)?\s*[#:]?\s*(?:ID)?\s*[#:]?\s*(\d{3,7})\b', re.I)
+DIGITS_RX = re.compile(r'^\s*[#:]?\s*(\d{3,7})\b')
+ORIGINATOR_RX = re.compile(r'originator|loan officer|\bMLO\b|individual', re.I)
+LENDER_RX = re.compile(r'lender|company|corporation|\bcorp\b|bank|\bllc\b|\binc\b|mortgage', re.I)
+AMOUNT_ANCHOR_RX = re.compile(r'principal|sum of|loan amount|amount of|indebtedness|U\.\s?S\.\s?\$', re.I)
+RECORDING_ANCHOR_RX = re.compile(r'record(?:ed|ing)?|filed|received', re.I)
+DATE_RXS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r'\b(\d{1,2}/\d{1,2}/\d{4})\b'), "%m/%d/%Y"),
+    (re.compile(r'\b(\d{4}-\d{2}-\d{2})\b'), "%Y-%m-%d"),
+    (re.compile(r'\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4})\b', re.I), None),
+]
+# Uniform-instrument definitions: '"Borrower" is JOHN DOE.' / '"Lender" is ACME BANK.'
+DEFINED_RX = {
+    "borrowers": re.compile(r'["“]?Borrower["”]?\s+is\s+(.+?)(?:[.;]\s|[.;]?$|,\s+(?:whose|residing|currently))', re.I),
+    "lender_name": re.compile(r'["“]?Lender["”]?\s+is\s+(.+?)(?:[.;]\s|[.;]?$|,\s+(?:a|an|whose|organized)\b)', re.I),
+}
+
+# Borrower definitions list several people: "A AND B", "A & B", "A; B"
+NAME_SPLIT_RX = re.compile(r'\s+(?:and|&)\s+|\s*;\s*', re.I)
+# Trailing marital / tenancy qualifiers that are not names
+NAME_QUALIFIER_RX = re.compile(
+    r'[,\s]*\(?\b(?:husband and wife|wife and husband|spouses|married couple|as joint tenants\b.*|'
+    r'as tenants by the entirety\b.*|(?:a|an|both) (?:married|single|unmarried)\b.*)\)?[.,\s]*$', re.I)
+
+
+def split_names(text: str) -> List[str]:
+    """Borrower definition -> individual names, like the LLM returns them."""
+    text = NAME_QUALIFIER_RX.sub("", text.strip())
+    return [n.strip(' ,"“”') for n in NAME_SPLIT_RX.split(text) if n.strip(' ,"“”')]
+
+
+def plain_amount(money: str) -> Optional[str]:
+    """"$475,950.00" -> "475950.00", the format the prompts ask the LLM for."""
+    try:
+        return str(Decimal(re.sub(r'[^\d.]', '', money)).quantize(Decimal("0.01")))
+    except InvalidOperation:
+        return None
+
+
+@dataclass
+class _Line:
+    page: int
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+
+def _parse_date(text: str) -> Optional[str]:
+    """First date in `text` as MM/DD/YYYY, or None."""
+    for rx, fmt in DATE_RXS:
+        m = rx.search(text)
+        if not m:
+            continue
+        raw = m.group(1)
+        if fmt is None:
+            raw = re.sub(r'\.|,', '', raw)
+            raw = re.sub(r'^Sept', 'Sep', raw, flags=re.I)
+            for f in ("%B %d %Y", "%b %d %Y"):
+                try:
+                    return datetime.strptime(raw, f).strftime("%m/%d/%Y")
+                except ValueError:
+                    continue
+            continue
+        try:
+            return datetime.strptime(raw, fmt).strftime("%m/%d/%Y")
+        except ValueError:
+            continue
+    return None
+
+
+class RuleExtractor:
+    """
+    Layout-aware rule extraction over preprocessed pages: find an anchor
+    phrase, then read the value from the same line or its spatial neighbours
+    (right on the same row, or just below). A field is only reported when the
+    evidence is unambiguous (one distinct candidate), so the result can be
+    trusted without the LLM.
+    """
+    def __init__(self, row_tolerance: float = 0.6, below_lines: float = 2.5):
+        self.row_tolerance = row_tolerance  # fraction of line height for "same row"
+        self.below_lines = below_lines      # how many line heights below an anchor to look
+
+    # ---------------------- geometry ----------------------
+    def _lines(self, pages: List[Dict[str, Any]]) -> List[_Line]:
+        out: List[_Line] = []
+        for p in pages:
+            lines = page_lines(p)
+            for text, (x0, y0, x1, y1) in zip(lines.texts, lines.bounds.tolist()):
+                out.append(_Line(p["page_index"], text, x0, y0, x1, y1))
+        return out
+
+    def _neighbors(self, a: _Line, lines: List[_Line]) -> List[_Line]:
+        """Lines right of `a` on the same row, then lines just below, nearest first."""
+        h = max(1.0, a.y1 - a.y0)
+        right, below = [], []
+        for b in lines:
+            if b is a or b.page != a.page:
+                continue
+            overlap = min(a.y1, b.y1) - max(a.y0, b.y0)
+            if overlap >= self.row_tolerance * min(h, max(1.0, b.y1 - b.y0)) and b.x0 >= a.x1 - h:
+                right.append(b)
+            elif 0 <= b.y0 - a.y1 <= self.below_lines * h and b.x0 < a.x1 and b.x1 > a.x0:
+                below.append(b)
+        right.sort(key=lambda b: b.x0)
+        below.sort(key=lambda b: b.y0)
+        return right + below
+
+    # ---------------------- fields ----------------------
+    def _nmls(self, lines: List[_Line]) -> Dict[str, str]:
+        found: Dict[str, set] = {"lender_nmls_id": set(), "loan_originator_nmls_id": set()}
+        for a in lines:
+            if "nmls" not in a.text.lower():
+                continue
+            values = NMLS_RX.findall(a.text)
+            if not values:
+                for b in self._neighbors(a, lines)[:2]:
+                    m = DIGITS_RX.match(b.text)
+                    if m:
+                        values = [m.group(1)]
+                        break
+            if len(values) != 1:
+                continue  # several IDs on one line: role assignment is ambiguous
+            is_orig = bool(ORIGINATOR_RX.search(a.text))
+            is_lender = bool(LENDER_RX.search(a.text))
+            if is_orig and not is_lender:
+                found["loan_originator_nmls_id"].add(values[0])
+            elif is_lender and not is_orig:
+                found["lender_nmls_id"].add(values[0])
+        return {k: next(iter(v)) for k, v in found.items() if len(v) == 1}
+
+    def _loan_amount(self, lines: List[_Line]) -> Optional[str]:
+        found = set()
+        for a in lines:
+            if not AMOUNT_ANCHOR_RX.search(a.text):
+                continue
+            m = MONEY.search(a.text)
+            if not m:
+                for b in self._neighbors(a, lines)[:2]:
+                    m = MONEY.search(b.text)
+                    if m:
+                        break
+            if m:
+                found.add(m.group(0).replace(" ", ""))
+        return next(iter(found)) if len(found) == 1 else None
+
+    def _recording_date(self, lines: List[_Line]) -> Optional[str]:
+        found = set()
+        for a in lines:
+            if not RECORDING_ANCHOR_RX.search(a.text):
+                continue
+            d = _parse_date(a.text)
+            if d is None:
+                for b in self._neighbors(a, lines)[:2]:
+                    d = _parse_date(b.text)
+                    if d:
+                        break
+            if d:
+                found.add(d)
+        return next(iter(found)) if len(found) == 1 else None
+
+    def _defined_terms(self, lines: List[_Line]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for field, rx in DEFINED_RX.items():
+            found = set()
+            for a in lines:
+                m = rx.search(a.text)
+                if m and m.group(1).strip():
+                    found.add(m.group(1).strip().strip('"“”'))
+            if len(found) == 1:
+                out[field] = next(iter(found))
+        return out
+
+    def extract(self, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        High-confidence fields only; anything uncertain is left out. Values
+        have the LLM's output shape (borrowers as a list of names, loan_amount
+        as a plain decimal), so results don't depend on which path filled them.
+        """
+        lines = self._lines(pages)
+        out: Dict[str, Any] = {}
+        out.update(self._nmls(lines))
+        amount = self._loan_amount(lines)
+        if amount:
+            out["loan_amount"] = plain_amount(amount)
+        date = self._recording_date(lines)
+        if date:
+            out["recording_date"] = date
+        out.update(self._defined_terms(lines))
+        if "borrowers" in out:
+            out["borrowers"] = split_names(out["borrowers"]) or None
+        out = {k: v for k, v in out.items() if is_valid(k, v)}
+        logging.info(f"Rule extractor found {sorted(out)}")
+        return out
@@ -0,0 +1,378 @@
+# src/service.py
+from typing import Dict, Any, List, Optional, Iterator
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from .pipeline import PipelineEngine
+from .metrics import Metrics, TOTALS
+
+_STOP = object()
+
+# Job statuses; the last three are final
+STATUSES = ("queued", "ocr", "extracting", "done", "empty", "error")
+FINAL = ("done", "empty", "error")
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the client should retry later (HTTP 429)."""
+
+
+class Job:
+    """
+    One submitted PDF: its status, an append-only list of progress events
+    (status changes and pipeline stage start/done) and, once finished, the
+    extracted JSON. Readers can block on new events via follow() / wait().
+    """
+    def __init__(self, job_id: str, name: str, path: Path):
+        self.id = job_id
+        self.name = name
+        self.path = path
+        self.status = "queued"
+        self.created = time.time()
+        self.result: Optional[Dict[str, Any]] = None
+        self.meta: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+        self.emit("status", status="queued")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINAL
+
+    def emit(self, event: str, **data: Any) -> None:
+        with self._cond:
+            self.events.append({"seq": len(self.events), "event": event,
+                                "t": round(time.time() - self.created, 3), **data})
+            self._cond.notify_all()
+
+    def set_status(self, status: str, **data: Any) -> None:
+        with self._cond:
+            self.status = status
+            self.emit("status", status=status, **data)
+
+    def on_stage(self, name: str, event: str, rec: Optional[Dict[str, Any]]) -> None:
+        """Metrics stage listener: forwards pipeline stage progress as events."""
+        data = {"wall_s": rec["wall_s"]} if rec else {}
+        self.emit("stage", stage=name, state=event, **data)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the job is finished or `timeout` seconds pass; True if finished."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.finished, timeout)
+
+    def follow(self, heartbeat: float = 15.0) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every event from the first on, blocking for new ones until
+        the job is finished. Yields {"event": "heartbeat"} after `heartbeat`
+        idle seconds so long-lived streams notice dropped clients.
+        """
+        seen = 0
+        while True:
+            with self._cond:
+                if seen >= len(self.events) and not self.finished:
+                    self._cond.wait(heartbeat)
+                batch = self.events[seen:]
+                finished = self.finished
+            seen += len(batch)
+            if not batch and not finished:
+                yield {"event": "heartbeat", "t": round(time.time() - self.created, 3)}
+            yield from batch
+            if finished and seen >= len(self.events):
+                return
+
+    def to_dict(self, events: bool = False) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"id": self.id, "name": self.name, "status": self.status,
+                               "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.created))}
+        if self.meta:
+            out["meta"] = self.meta
+        if self.error:
+            out["error"] = self.error
+        if self.finished:
+            out["result"] = self.result
+        if events:
+            out["events"] = list(self.events)
+        return out
+
+
+class ExtractionService:
+    """
+    Long-running extraction front end over one warm PipelineEngine.
+
+    Uploaded PDFs go on a bounded queue; submit() raises QueueFull once
+    `max_queue` jobs are waiting, which the HTTP layer turns into a 429.
+    One thread OCRs queued jobs (PaddleOCR / OCRPool, loaded once) and
+    hands them to `extract_workers` threads for LLM extraction, the same
+    stage split as BatchRunner. Finished jobs are kept in memory (the most
+    recent `keep_jobs`) for polling; uploads are deleted once processed.
+    """
+    def __init__(self, engine: PipelineEngine, upload_dir: Path, max_queue: int = 8,
+                 extract_workers: int = 1, ocr_ahead: int = 1, keep_jobs: int = 1000,
+                 keep_uploads: bool = False):
+        self.engine = engine
+        self.upload_dir = Path(upload_dir)
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        self.max_queue = max(1, max_queue)
+        self.extract_workers = max(1, extract_workers)
+        self.keep_jobs = keep_jobs
+        self.keep_uploads = keep_uploads
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._extract_q: "queue.Queue" = queue.Queue(maxsize=max(1, ocr_ahead))
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {"submitted": 0, "rejected": 0}
+        self._threads: List[threading.Thread] = []
+
+    # ---------------------- Lifecycle ----------------------
+    def start(self) -> "ExtractionService":
+        self.engine.warm_up()
+        self._threads = [threading.Thread(target=self._ocr_loop, name="service-ocr", daemon=True)]
+        self._threads += [threading.Thread(target=self._extract_loop, name=f"service-extract-{i}", daemon=True)
+                          for i in range(self.extract_workers)]
+        for t in self._threads:
+            t.start()
+        logging.info(f"🚀 Extraction service ready (queue {self.max_queue}, {self.extract_workers} extract workers)")
+        return self
+
+    def close(self) -> None:
+        """Finish the jobs already queued, then stop the worker threads."""
+        self._queue.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self.engine.close()
+
+    # ---------------------- Jobs ----------------------
+    def submit(self, data: bytes, name: str = "upload.pdf") -> Job:
+        if self._queue.full():  # cheap early reject before writing the upload
+            with self._lock:
+                self._counts["rejected"] += 1
+            raise QueueFull(f"{self.max_queue} jobs already queued")
+        job_id = uuid.uuid4().hex[:16]
+        path = self.upload_dir / f"{job_id}.pdf"
+        path.write_bytes(data)
+        job = Job(job_id, os.path.basename(name) or "upload.pdf", path)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._counts["rejected"] += 1
+                path.unlink(missing_ok=True)
+                raise QueueFull(f"{self.max_queue} jobs already queued")
+            self._counts["submitted"] += 1
+            self._jobs[job_id] = job
+            self._evict()
+        logging.info(f"📥 Queued {job.name} as job {job_id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        """Forget the oldest finished jobs beyond keep_jobs (caller holds the lock)."""
+        excess = len(self._jobs) - self.keep_jobs
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:max(0, excess)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            return {"queued": self._queue.qsize(), "max_queue": self.max_queue,
+                    "extract_workers": self.extract_workers, "jobs": by_status, **self._counts}
+
+    # ---------------------- Workers ----------------------
+    def _ocr_loop(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                for _ in range(self.extract_workers):
+                    self._extract_q.put(_STOP)
+                return
+            job.set_status("ocr")
+            metrics = Metrics(job.name, on_stage=job.on_stage)
+            try:
+                cleaned, meta = self.engine.ocr_document(str(job.path), metrics)
+            except Exception as e:
+                logging.error(f"❌ OCR failed for job {job.id} ({job.name}): {e}", exc_info=True)
+                self._finish(job, "error", error=f"ocr: {e}")
+                continue
+            self._extract_q.put((job, cleaned, meta, metrics))
+
+    def _extract_loop(self) -> None:
+        while True:
+            item = self._extract_q.get()
+            if item is _STOP:
+                return
+            job, cleaned, meta, metrics = item
+            job.set_status("extracting")
+            try:
+                result = self.engine.extract_document(cleaned, meta, metrics)
+            except Exception as e:
+                logging.error(f"❌ Extraction failed for job {job.id} ({job.name}): {e}", exc_info=True)
+                self._finish(job, "error", error=f"extract: {e}")
+                continue
+            job.meta = {k: result.meta[k] for k in ("pages", "page_sources", "blank_pages") if k in result.meta}
+            job.meta["metrics"] = result.meta.get("metrics", {}).get("summary")
+            job.result = result.data or None
+            self._finish(job, "done" if result.data else "empty")
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.error = error
+        if not self.keep_uploads:
+            job.path.unlink(missing_ok=True)
+        with self._lock:
+            self._counts[status] = self._counts.get(status, 0) + 1
+        if error:
+            job.set_status(status, error=error)
+        else:
+            job.set_status(status, result=job.result)
+        logging.info(f"✅ Job {job.id} ({job.name}) finished: {status}")
+
+
+# ---------------------- HTTP ----------------------
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST /jobs                 raw PDF body (?name=deed.pdf) -> 202 job, 429 when the queue is full
+    GET  /jobs/<id>            status, meta and (when finished) result; ?events=1 adds the event log
+    GET  /jobs/<id>/result     200 result when finished, 202 while running; ?wait=N long-polls N s
+    GET  /jobs/<id>/events     NDJSON stream of progress events until the job finishes
+    GET  /health, /metrics     queue stats (JSON) / Prometheus counters
+    """
+    server_version = "layout-ocr-service/1.0"
+
+    @property
+    def service(self) -> ExtractionService:
+        return self.server.service
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logging.debug("HTTP %s " + fmt, self.address_string(), *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _error(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._json(status, {"error": message}, headers)
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            return self._error(HTTPStatus.NOT_FOUND, "not found")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self.close_connection = True  # the body's extent is unknown, so it can't be skipped
+            return self._error(HTTPStatus.BAD_REQUEST, "Content-Length must be an integer")
+        if length <= 0:
+            return self._error(HTTPStatus.LENGTH_REQUIRED, "send the PDF as the request body")
+        if length > self.server.max_upload_bytes:
+            self.close_connection = True
+            return self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"upload exceeds {self.server.max_upload_bytes} bytes")
+        data = self.rfile.read(length)
+        if not data.startswith(b"%PDF"):
+            return self._error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "body is not a PDF")
+        name = parse_qs(url.query).get("name", [""])[0] or self.headers.get("X-Filename") or "upload.pdf"
+        try:
+            job = self.service.submit(data, name)
+        except QueueFull as e:
+            return self._error(HTTPStatus.TOO_MANY_REQUESTS, str(e),
+                               {"Retry-After": str(self.server.retry_after)})
+        self._json(HTTPStatus.ACCEPTED, job.to_dict(), {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["health"]:
+            return self._json(HTTPStatus.OK, self.service.stats())
+        if parts == ["metrics"]:
+            s = self.service.stats()
+            gauges = "".join(f"# TYPE layout_ocr_service_{k} gauge\nlayout_ocr_service_{k} {s[k]}\n"
+                             for k in ("queued", "max_queue"))
+            return self._send(HTTPStatus.OK, (TOTALS.to_prometheus() + gauges).encode("utf-8"),
+                              "text/plain; version=0.0.4")
+        if len(parts) < 2 or parts[0] != "jobs":
+            return self._error(HTTPStatus.NOT_FOUND, "not found")
+        job = self.service.get(parts[1])
+        if job is None:
+            return self._error(HTTPStatus.NOT_FOUND, f"unknown job {parts[1]}")
+        tail = parts[2:]
+        if not tail:
+            return self._json(HTTPStatus.OK, job.to_dict(events=query.get("events", ["0"])[0] not in ("0", "")))
+        if tail == ["result"]:
+            try:
+                wait = min(float(query.get("wait", ["0"])[0] or 0), self.server.max_wait)
+            except ValueError:
+                return self._error(HTTPStatus.BAD_REQUEST, "wait must be a number of seconds")
+            if wait > 0:
+                job.wait(wait)
+            if not job.finished:
+                return self._json(HTTPStatus.ACCEPTED, {"id": job.id, "status": job.status},
+                                  {"Retry-After": "2"})
+            if job.status == "error":
+                return self._json(HTTPStatus.UNPROCESSABLE_ENTITY, {"id": job.id, "error": job.error})
+            return self._json(HTTPStatus.OK, job.result or {})
+        if tail == ["events"]:
+            return self._stream(job)
+        self._error(HTTPStatus.NOT_FOUND, "not found")
+
+    def _stream(self, job: Job) -> None:
+        """NDJSON, one event per line, flushed as it happens; the connection closes at the end."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for event in job.follow():
+                self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            logging.debug(f"Event stream for job {job.id} closed by client")
+        self.close_connection = True
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: ExtractionService, max_upload_mb: int = 100,
+                 retry_after: int = 5, max_wait: float = 60.0):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.retry_after = retry_after  # seconds suggested to clients on 429
+        self.max_wait = max_wait        # cap for ?wait= long polls
+
+
+def serve(service: ExtractionService, host: str = "127.0.0.1", port: int = 8080, **kw) -> None:
+    """Start the service's workers and serve HTTP until interrupted."""
+    service.start()
+    httpd = ServiceHTTPServer((host, port), service, **kw)
+    logging.info(f"🌐 Listening on http://{host}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Shutting down: finishing queued jobs")
+    finally:
+        httpd.server_close()
+        service.close()
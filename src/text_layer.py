@@ -0,0 +1,66 @@
+# src/text_layer.py
+from typing import List, Dict, Any, Optional, Iterable, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import fitz  # PyMuPDF; annotations only, imported on first use at runtime
+
+
+def _usable(text: str, min_chars: int) -> bool:
+    """Enough characters, and mostly real glyphs rather than broken encodings."""
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < min_chars:
+        return False
+    good = sum(1 for c in chars if c.isalnum() or c in "$.,:;#/-'\"()&%")
+    return good / len(chars) >= 0.8
+
+
+def _cover(rects: Iterable[Sequence[float]], page: "fitz.Page") -> float:
+    """Share of the page area under `rects` (x0, y0, x1, y1), clipped to the page; overlaps count twice."""
+    r = page.rect
+    area = sum(max(0.0, min(x1, r.x1) - max(x0, r.x0)) * max(0.0, min(y1, r.y1) - max(y0, r.y0))
+               for x0, y0, x1, y1 in rects)
+    return min(1.0, area / r.get_area()) if r.get_area() > 0 else 0.0
+
+
+def text_layer_page(page: "fitz.Page", page_idx: int, zoom: float, min_chars: int = 40,
+                    max_image_cover: float = 0.5, min_text_cover: float = 0.02) -> Optional[Dict[str, Any]]:
+    """
+    Build an OCR-shaped page from the PDF's own text layer, or None when the
+    page has no usable text (image-only scan) and must go through OCR.
+
+    A scan that only carries a little text, such as a county recording stamp
+    added on top of the page image, is not a digital page: when images cover
+    more than `max_image_cover` of the page, or the words less than
+    `min_text_cover`, the page goes to OCR too.
+
+    Boxes are scaled by `zoom` so coordinates match what OCR would report for
+    the same page rendered at that zoom.
+    """
+    words = page.get_text("words", sort=False)  # (x0, y0, x1, y1, word, block, line, word_no)
+    if not _usable(" ".join(w[4] for w in words), min_chars):
+        return None
+    if _cover((w[:4] for w in words), page) < min_text_cover:
+        return None
+    if _cover((i["bbox"] for i in page.get_image_info()), page) > max_image_cover:
+        return None
+
+    grouped: Dict[Any, List[Any]] = {}
+    for w in words:
+        grouped.setdefault((w[5], w[6]), []).append(w)
+
+    lines: List[Dict[str, Any]] = []
+    for ws in grouped.values():
+        ws.sort(key=lambda w: w[7])
+        x0 = min(w[0] for w in ws) * zoom
+        y0 = min(w[1] for w in ws) * zoom
+        x1 = max(w[2] for w in ws) * zoom
+        y1 = max(w[3] for w in ws) * zoom
+        lines.append({
+            "text": " ".join(w[4] for w in ws),
+            "score": 1.0,
+            "box": [[x0, y0], [x1, y0], [x1, y1], [x0, y1]],
+        })
+
+    # Same reading order as OCRService.run_page
+    lines.sort(key=lambda l: (l["box"][0][1], l["box"][0][0]))
+    return {"page_index": page_idx, "lines": lines, "source": "text"}
@@ -0,0 +1,86 @@
+"""
+Local stand-in for the Gemini REST generateContent endpoint.
+
+    with StubGeminiServer(lambda prompt: '{"lender_nmls_id": "3901"}') as stub:
+        client = AsyncGeminiClient(api_key="test", base_url=stub.base_url)
+
+`fail_first` answers the first N requests with `fail_status` (default 429)
+to exercise retry/backoff; `latency` adds a fixed delay per request.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+
+class StubGeminiServer:
+    def __init__(self, responder: Callable[[str], str], fail_first: int = 0,
+                 fail_status: int = 429, latency: float = 0.0, port: int = 0):
+        self.responder = responder
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.latency = latency
+        self.prompts: List[str] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith(":generateContent"):
+                    return self._send(404, {"error": {"code": 404, "message": "not found"}})
+                with stub._lock:
+                    stub.requests += 1
+                    n = stub.requests
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if n <= stub.fail_first:
+                    return self._send(stub.fail_status, {"error": {"code": stub.fail_status}})
+                prompt = payload["contents"][0]["parts"][0]["text"]
+                with stub._lock:
+                    stub.prompts.append(prompt)
+                text = stub.responder(prompt)
+                self._send(200, {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]})
+
+        return Handler
+
+    def start(self) -> "StubGeminiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,17 @@
+import json
+from typing import Dict, Any
+
+
+def clean_json(text: str) -> str:
+    """Remove markdown fences and ensure raw JSON only."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        # remove leading json keyword if exists
+        text = text.replace("json", "", 1).strip()
+    return text
+
+
+def parse_json_response(text: str) -> Dict[str, Any]:
+    """Parse a model response as JSON, raising if invalid."""
+    return json.loads(clean_json(text))
@@ -1,9 +1,19 @@
-from typing import List, Dict, Any
-from ..preprocess import page_as_layout_text
+from typing import List, Dict, Any, Union
+from ..preprocess import page_as_layout_text, page_as_compact_text
 
-def pages_to_layout_json(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+# "json": dict of pages with "[001|y=123|x=456] text" lines (embedded as its repr);
+# "compact": plain text rows with grid-quantized coordinates (page_as_compact_text)
+LAYOUT_MODES = ("json", "compact")
+
+
+def pages_to_layout_json(pages: List[Dict[str, Any]], mode: str = "json") -> Union[Dict[str, Any], str]:
+    if mode == "compact":
+        return "\n".join(f"## page {p['page_index']}\n{page_as_compact_text(p)}"
+                         for p in pages if p.get("source") != "blank")
     doc = {"pages": []}
     for p in pages:
+        if p.get("source") == "blank":
+            continue  # nothing to read; keep the prompt short
         doc["pages"].append({
             "page_index": p["page_index"],
             "layout_text": page_as_layout_text(p)
@@ -0,0 +1,64 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch(items: Iterable[T], depth: int = 2) -> Iterator[T]:
+    """
+    Produce `items` on a background thread, at most `depth` ahead of the consumer.
+
+    Lets the producer (e.g. page rendering) overlap with the consumer (OCR)
+    while bounding how many produced items are alive at once. Exceptions
+    raised by the producer are re-raised in the consumer.
+    """
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        it = iter(items)
+        try:
+            for item in it:
+                if not _put(item):
+                    return
+        except BaseException as e:  # surfaced to the consumer below
+            _put(_Failure(e))
+            return
+        finally:
+            # Close generators on this thread (e.g. release an open fitz.Document)
+            close = getattr(it, "close", None)
+            if close is not None:
+                close()
+        _put(_DONE)
+
+    t = threading.Thread(target=_produce, name="prefetch", daemon=True)
+    t.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        # Consumer stopped early (or finished): unblock and reap the producer
+        stop.set()
+        t.join()
@@ -0,0 +1,18 @@
+import re
+
+# Word pieces of up to 5 letters, single digits (Gemini's tokenizer splits
+# numbers digit by digit) and single punctuation marks
+_PIECE_RX = re.compile(r"[^\W\d_]{1,5}|\d|[^\w\s]|_")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars/token), good enough for budgets and rate limits."""
+    return max(1, len(text) // 4)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Closer prompt-size estimate than estimate_tokens for text heavy in digits
+    and punctuation (coordinates, JSON quoting), used for per-call accounting.
+    """
+    return len(_PIECE_RX.findall(text))
@@ -1,20 +1,89 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, List, Sequence, Tuple
+from datetime import date
+from functools import lru_cache
 import re
-import dateparser
 
 MONEY = re.compile(r'\$\s?\d{1,3}(?:,\d{3})*(?:\.\d{2})?')
 NMLS = re.compile(r'\b(\d{1,7})\b')
+# Amounts as the prompts ask for them: numbers only, no '$' ("475950.00"). The
+# cents and at least four digits keep a ZIP code or NMLS ID from passing.
+AMOUNT = re.compile(r'[1-9]\d{0,2}(?:,?\d{3})+\.\d{2}')
+
+# Strict date shapes we ask the model for, checked without dateparser. A
+# date in one of them is valid when it is a real calendar day (month/day
+# either way round, as dateparser reads them, even for YYYY-DD-MM). A "00"
+# month or day is filled in from today, so "00/12/2025" and "05/00/2025"
+# are valid when the other part could be a day (a month for two-digit
+# years); "00/00/2025", a 0 in an ISO date and a month name with an
+# impossible day never parse. Other two-digit years, single-digit zeros and
+# a trailing time that does not check out go to the dateparser fallback,
+# which is slowest (up to seconds) on exactly the strings it rejects.
+_MONTHS = {m: i + 1 for i, m in enumerate(
+    ["january", "february", "march", "april", "may", "june", "july",
+     "august", "september", "october", "november", "december"])}
+_MONTHS.update({m[:3]: i for m, i in list(_MONTHS.items())})
+_MONTHS["sept"] = 9
+_TIME = r'(?:\s+(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*[AaPp][Mm])?)?'
+_NUMERIC_DATE = re.compile(r'(\d{1,2})([/.-])(\d{1,2})\2(\d{4}|\d{2})' + _TIME)  # MM/DD/YYYY
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')                                # YYYY-MM-DD
+_MONTH_DAY_YEAR = re.compile(r'([A-Za-z]{3,9})\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+(\d{4})')
+_DAY_MONTH_YEAR = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})')
+
+
+def _real_date(y: int, m: int, d: int) -> bool:
+    try:
+        date(y, m, d)
+    except ValueError:
+        return False
+    return True
+
+
+def _either_way(y: int, a: int, b: int, trusted: bool) -> Optional[bool]:
+    """A numeric date read month/day or day/month; not real is only final without a 0 component."""
+    if _real_date(y, a, b) or _real_date(y, b, a):
+        return True
+    return False if trusted and a and b else None
+
+
+def _fast_date(v: str) -> Optional[bool]:
+    """True / False for the strict formats, None when only dateparser can tell."""
+    m = _NUMERIC_DATE.fullmatch(v)
+    if m:
+        if m.group(5) is not None and not (int(m.group(5)) <= 23 and int(m.group(6)) <= 59):
+            return None
+        y, a, b = int(m.group(4)), int(m.group(1)), int(m.group(3))
+        if not (a and b) and len(m.group(1)) == len(m.group(3)) == 2:
+            return 0 < a + b <= (31 if y >= 1000 else 12)
+        return _either_way(y if y >= 100 else 2000 + y, a, b, y >= 1000)
+    m = _ISO_DATE.fullmatch(v)
+    if m:
+        return bool(_either_way(int(m.group(1)), int(m.group(2)), int(m.group(3)), True))
+    m = _MONTH_DAY_YEAR.fullmatch(v)
+    if m and m.group(1).lower() in _MONTHS:
+        return _real_date(int(m.group(3)), _MONTHS[m.group(1).lower()], int(m.group(2)))
+    m = _DAY_MONTH_YEAR.fullmatch(v)
+    if m and m.group(2).lower() in _MONTHS:
+        return _real_date(int(m.group(3)), _MONTHS[m.group(2).lower()], int(m.group(1)))
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(v: str) -> bool:
+    import dateparser  # slow to import (timezone tables); only needed for the odd formats
+    return dateparser.parse(v) is not None
+
 
 def _valid_money(v: Optional[str]) -> bool:
-    return bool(isinstance(v, str) and MONEY.search(v))
+    return bool(isinstance(v, str) and (MONEY.search(v) or AMOUNT.fullmatch(v.strip())))
 
 def _valid_nmls(v: Optional[str]) -> bool:
     return bool(isinstance(v, str) and NMLS.fullmatch(v))
 
 def _valid_date(v: Optional[str]) -> bool:
-    if not isinstance(v, str):
+    if not isinstance(v, str) or not v.strip():
         return False
-    return dateparser.parse(v) is not None
+    fast = _fast_date(v.strip())
+    return _parse_date(v) if fast is None else fast
 
 def is_valid(key: str, value: Any) -> bool:
     if key == "loan_amount": return _valid_money(value)
@@ -24,6 +93,10 @@ def is_valid(key: str, value: Any) -> bool:
     if isinstance(value, str) and not value.strip(): return False
     return True
 
+def validity(data: Dict[str, Any], keys: Optional[Sequence[str]] = None) -> Dict[str, bool]:
+    """{field: is_valid} for one record (all of its keys unless `keys` is given)."""
+    return {k: is_valid(k, data.get(k)) for k in (data if keys is None else keys)}
+
 def normalize(data: Dict[str, Any]) -> Dict[str, Any]:
     out = dict(data)
     # NMLS digits only
@@ -40,3 +113,26 @@ def normalize(data: Dict[str, Any]) -> Dict[str, Any]:
     for k, v in out.items():
         if isinstance(v, str): out[k] = v.strip()
     return out
+
+def validate_records(records: Iterable[Dict[str, Any]], keys: Optional[Sequence[str]] = None,
+                     normalized: bool = True) -> List[Tuple[Dict[str, Any], Dict[str, bool]]]:
+    """
+    Normalize (unless normalized=False) and validate a batch of extracted
+    records: [(record, {field: is_valid}), ...] in input order. Dates in the
+    strict formats never touch dateparser; the rest are parsed once per
+    distinct string across the whole batch.
+    """
+    dates: Dict[str, bool] = {}  # per batch: not bounded by _parse_date's LRU
+    out = []
+    for rec in records:
+        rec = normalize(rec) if normalized else rec
+        checks = {}
+        for k in (rec if keys is None else keys):
+            v = rec.get(k)
+            if k == "recording_date" and isinstance(v, str):
+                ok = dates.get(v)
+                checks[k] = dates.setdefault(v, _valid_date(v)) if ok is None else ok
+            else:
+                checks[k] = is_valid(k, v)
+        out.append((rec, checks))
+    return out
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# tests import the repo's top-level packages (src, benchmarks) like run.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TQDM_DISABLE", "1")
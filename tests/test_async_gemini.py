@@ -0,0 +1,117 @@
+import json
+import time
+import asyncio
+
+import pytest
+
+from src.async_gemini import AsyncGeminiClient, AsyncGeminiExtractor
+from src.llm_backends import make_extractor
+from src.metrics import Metrics
+from src.utils.gemini_stub import StubGeminiServer
+from src.utils.json_utils import parse_json_response
+
+RECORD = {"loan_amount": "475950.00", "lender_nmls_id": "3901", "recording_date": "04/01/2025"}
+
+
+def _answer(prompt: str) -> str:
+    return "```json\n" + json.dumps(RECORD) + "\n```"
+
+
+@pytest.fixture
+def stub():
+    with StubGeminiServer(_answer) as s:
+        yield s
+
+
+def test_client_retries_429_then_succeeds():
+    with StubGeminiServer(_answer, fail_first=2) as stub:
+        async def go():
+            async with AsyncGeminiClient(api_key="test", base_url=stub.base_url, backoff_base=0.01) as client:
+                return await client.generate("hello")
+        assert parse_json_response(asyncio.run(go())) == RECORD
+        assert stub.requests == 3
+
+
+def test_every_attempt_passes_the_rate_limiter():
+    with StubGeminiServer(_answer, fail_first=2) as stub:
+        client = AsyncGeminiClient(api_key="test", base_url=stub.base_url, backoff_base=0.01)
+        acquired = []
+        real = client.limiter.acquire
+
+        async def counting(tokens: int = 1) -> None:
+            acquired.append(tokens)
+            await real(tokens)
+
+        client.limiter.acquire = counting
+
+        async def go():
+            async with client:
+                return await client.generate("hello")
+        asyncio.run(go())
+        assert len(acquired) == stub.requests == 3
+
+
+def test_client_gives_up_after_retries():
+    with StubGeminiServer(_answer, fail_first=10, fail_status=503) as stub:
+        async def go():
+            async with AsyncGeminiClient(api_key="test", base_url=stub.base_url, retries=3,
+                                         backoff_base=0.01) as client:
+                return await client.generate("hello")
+        with pytest.raises(RuntimeError):
+            asyncio.run(go())
+        assert stub.requests == 3
+
+
+def test_backend_from_registry_records_metrics(stub):
+    ex = make_extractor("gemini-async:gemini-1.5-flash", base_url=stub.base_url, api_key="test")
+    try:
+        assert isinstance(ex, AsyncGeminiExtractor)
+        metrics = Metrics("deed.pdf")
+        assert ex.extract_full({"pages": []}, metrics=metrics) == RECORD
+        assert metrics.summary()["llm_calls"] == 1
+    finally:
+        ex.close()
+
+
+def test_batched_fields_take_one_request(stub):
+    ex = AsyncGeminiExtractor(api_key="test", base_url=stub.base_url)
+    try:
+        out = ex.extract_fields({"pages": []}, list(RECORD), context=lambda fields: "0 pruned layout")
+        assert out == RECORD
+        assert stub.requests == 1
+        assert "0 pruned layout" in stub.prompts[0]
+    finally:
+        ex.close()
+
+
+def test_extract_many_runs_documents_concurrently():
+    with StubGeminiServer(_answer, latency=0.3) as stub:
+        ex = AsyncGeminiExtractor(api_key="test", base_url=stub.base_url, max_concurrency=8)
+        try:
+            layouts = [{"pages": [{"page_index": i}]} for i in range(6)]
+            t0 = time.perf_counter()
+            results = asyncio.run(ex.extract_many(layouts))
+            elapsed = time.perf_counter() - t0
+        finally:
+            ex.close()
+        assert results == [RECORD] * 6
+        assert stub.requests == 6
+        assert elapsed < 6 * 0.3 * 0.6  # sequential would take >= 1.8s
+
+
+def test_field_requests_fan_out():
+    with StubGeminiServer(_answer, latency=0.3) as stub:
+        ex = AsyncGeminiExtractor(api_key="test", base_url=stub.base_url, max_concurrency=8)
+        try:
+            t0 = time.perf_counter()
+            out = ex.extract_fields({"pages": []}, list(RECORD), batched=False, strict=True)
+            sync_elapsed = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            again = asyncio.run(ex.extract_fields_async({"pages": [{"page_index": 1}]}, list(RECORD),
+                                                        batched=False))
+            async_elapsed = time.perf_counter() - t0
+        finally:
+            ex.close()
+        assert out == again == RECORD
+        assert stub.requests == 2 * len(RECORD)
+        assert max(sync_elapsed, async_elapsed) < len(RECORD) * 0.3 * 0.6  # one after another: >= 0.9s
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.batch import BatchRunner
+from src.ocr import OCRService, OCRConfig
+from src.llm_backends import FakeExtractor
+from src.pipeline import PipelineEngine
+from benchmarks.stubs import CannedPaddleOCR, write_synthetic_pdf
+
+RECORD = {"borrowers": ["ELIZABETH HOWERTON"], "loan_amount": "475950.00", "recording_date": "04/01/2025",
+          "recording_location": "Albany County, New York", "lender_name": "US Mortgage Corporation",
+          "lender_nmls_id": "3901", "broker_name": None, "loan_originator_name": "William John Lane",
+          "loan_originator_nmls_id": "65175"}
+
+
+class CountingExtractor(FakeExtractor):
+    def __init__(self):
+        super().__init__(response=RECORD)
+        self.documents = 0
+
+    def extract_full(self, layout_json, metrics=None):
+        self.documents += 1
+        return super().extract_full(layout_json, metrics)
+
+
+@pytest.fixture
+def runner(tmp_path):
+    cfg = OCRConfig(dpi=72, text_layer=False, skip_blank=False)
+    engine = PipelineEngine(ocr_cfg=cfg, ocr=OCRService(cfg, ocr=CannedPaddleOCR()), extractor=CountingExtractor())
+    return BatchRunner(engine, tmp_path / "out")
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    src = tmp_path / "in"
+    src.mkdir()
+    return [write_synthetic_pdf(src / f"deed{i}.pdf", [[f"MORTGAGE {i}"]]) for i in range(2)]
+
+
+def _manifest(runner):
+    with open(runner.manifest.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_unchanged_documents_are_skipped(runner, pdfs):
+    assert runner.run(pdfs) == {"ok": 2}
+    assert json.loads(runner.output_path(pdfs[0]).read_text(encoding="utf-8")) == RECORD
+    assert runner.run(pdfs) == {"skipped": 2}
+    assert runner.engine.extractor.documents == 2
+
+
+def test_changed_content_is_reprocessed(runner, pdfs):
+    runner.run(pdfs)
+    write_synthetic_pdf(pdfs[1], [["DEED OF TRUST"], ["page two"]])
+    assert runner.run(pdfs) == {"skipped": 1, "ok": 1}
+    last = _manifest(runner)[-1]
+    assert last["file"] == str(pdfs[1]) and last["pages"] == 2
+
+
+def test_failed_document_is_recorded_and_the_run_continues(runner, pdfs, tmp_path):
+    broken = tmp_path / "in" / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really a pdf")
+    counts = runner.run([broken] + pdfs)
+    assert counts == {"error": 1, "ok": 2}
+    (rec,) = [r for r in _manifest(runner) if r["file"] == str(broken)]
+    assert rec["status"] == "error" and rec["error"].startswith("ocr:")
+    assert runner.run([broken] + pdfs) == {"error": 1, "skipped": 2}  # failures are retried next run
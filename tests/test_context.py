@@ -0,0 +1,51 @@
+from src.context import select_context, _line_tokens
+from src.lines import page_lines
+
+FILLER = "the mortgaged premises together with all improvements thereon and appurtenances"
+
+
+def _page(texts, index=0, step=100.0):
+    return {"page_index": index, "lines": [
+        {"text": t, "score": 0.97, "box": [[50, i * step], [900, i * step], [900, i * step + 30], [50, i * step + 30]]}
+        for i, t in enumerate(texts)]}
+
+
+def _kept(pages):
+    return [t for p in pages for t in page_lines(p).texts]
+
+
+def _tokens(pages):
+    return int(sum(_line_tokens(page_lines(p)).sum() for p in pages))
+
+
+def test_pages_within_budget_are_returned_as_is():
+    pages = [_page(["Lender NMLS ID 3901", FILLER])]
+    assert select_context(pages, ["lender_nmls_id"], token_budget=10_000) is pages
+
+
+def test_anchor_window_is_kept_and_the_rest_dropped():
+    texts = [FILLER] * 30
+    texts[12] = "Lender NMLS ID 3901"
+    pages = [_page(texts), _page([FILLER] * 30, index=1)]
+    out = select_context(pages, ["lender_nmls_id"], token_budget=200)
+    assert [p["page_index"] for p in out] == [0]
+    assert _kept(out) == [FILLER, "Lender NMLS ID 3901", FILLER]  # the hit and one neighbour either side
+    assert page_lines(out[0]).y0.tolist() == [1100.0, 1200.0, 1300.0]
+
+
+def test_budget_is_respected_best_anchors_first():
+    texts = [FILLER] * 60
+    for i in range(0, 60, 6):
+        texts[i] = f"Loan originator NMLS {65170 + i}"  # matches both anchors of the field
+    texts[57] = "Originator notes"                      # one anchor only
+    pages = [_page(texts)]
+    full = _tokens(pages)
+    out = select_context(pages, ["loan_originator_nmls_id"], token_budget=full // 4)
+    assert 0 < _tokens(out) <= full // 4
+    assert "Loan originator NMLS 65170" in _kept(out)
+    assert "Originator notes" not in _kept(out)
+
+
+def test_no_anchor_match_falls_back_to_full_pages():
+    pages = [_page([FILLER] * 50)]
+    assert select_context(pages, ["broker_name"], token_budget=50) is pages
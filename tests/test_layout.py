@@ -0,0 +1,92 @@
+import json
+import os
+import re
+
+import numpy as np
+import pytest
+
+from src.lines import PageLines
+from src.preprocess import page_as_compact_text
+from src.prompts import full_doc_prompt
+from src.utils.pdf_utils import pages_to_layout_json
+from src.utils.tokens import count_tokens
+from benchmarks.stubs import CannedPaddleOCR, load_records, record_lines
+
+RECORDS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Mortgage_PDF_outputs")
+_CELL = re.compile(r">(\d+) (.*)")
+
+
+def _box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def _parse_compact(text):
+    """page_as_compact_text back into [(y, x or None, text)] in output order."""
+    out = []
+    for row in text.splitlines():
+        y, rest = row.split(" ", 1)
+        for cell in rest.split(" | "):
+            m = _CELL.fullmatch(cell)
+            if m:
+                out.append((int(y), int(m.group(1)), m.group(2)))
+            else:
+                out.append((int(y), None, cell))
+    return out
+
+
+# 850 x 1000 page: a two-cell row, a plain row, an indented row, a row below
+PAGE_LINES = [
+    ("Loan Amount", _box(50, 100, 250, 120)),
+    ("$250,000.00", _box(425, 102, 600, 121)),
+    ("MORTGAGE", _box(50, 200, 300, 220)),
+    ("Borrower: Jane Doe", _box(170, 300, 500, 320)),
+    ("NMLS ID 3901", _box(50, 980, 850, 1000)),
+]
+
+
+def _page(specs, index=0):
+    texts, boxes = zip(*specs)
+    return {"page_index": index, "lines": PageLines(texts, [0.95] * len(texts), boxes)}
+
+
+def test_compact_round_trip():
+    page = _page(PAGE_LINES)
+    text = page_as_compact_text(page)
+    assert _parse_compact(text) == [
+        (10, None, "Loan Amount"), (10, 50, "$250,000.00"),
+        (20, None, "MORTGAGE"),
+        (30, 20, "Borrower: Jane Doe"),
+        (98, None, "NMLS ID 3901"),
+    ]
+
+
+def test_compact_keeps_every_line_in_reading_order():
+    page = _page(PAGE_LINES[::-1])
+    lines = page["lines"]
+    parsed = _parse_compact(page_as_compact_text(page))
+    assert [t for _, _, t in parsed] == lines.sorted().texts
+    ys = [y for y, _, _ in parsed]
+    assert ys == sorted(ys) and all(0 <= y < 100 for y in ys)
+
+
+def test_compact_empty_and_blank_pages():
+    assert page_as_compact_text({"page_index": 0, "lines": []}) == ""
+    pages = [_page(PAGE_LINES), {"page_index": 1, "lines": [], "source": "blank"}]
+    assert pages_to_layout_json(pages, "compact") == "## page 0\n" + page_as_compact_text(pages[0])
+
+
+def _ocr_pages(n=3):
+    recs = list(load_records(RECORDS).values()) or [{}]
+    paddle = CannedPaddleOCR(record_lines(recs[0], 40, n))
+    img = np.zeros((1100, 850, 3), np.uint8)
+    return [{"page_index": i, "lines": PageLines.from_paddle(paddle.ocr(img))} for i in range(n)]
+
+
+@pytest.mark.parametrize("n", [1, 3])
+def test_compact_prompt_uses_fewer_tokens_than_json(n):
+    pages = _ocr_pages(n)
+    as_json = full_doc_prompt(pages_to_layout_json(pages, "json"))
+    compact = full_doc_prompt(pages_to_layout_json(pages, "compact"))
+    assert count_tokens(compact) < count_tokens(as_json)
+    body = json.dumps(pages_to_layout_json(pages, "json"))
+    assert count_tokens(pages_to_layout_json(pages, "compact")) < 0.75 * count_tokens(body)
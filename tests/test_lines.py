@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+
+from src.lines import PageLines, page_lines, json_default
+
+LINES = [
+    {"text": "Borrower: Jane Doe", "score": 0.98, "box": [[10.0, 100.0], [200.0, 100.0], [200.0, 120.0], [10.0, 120.0]]},
+    {"text": "Loan Amount", "score": 0.91, "box": [[10.0, 20.0], [120.0, 20.0], [120.0, 40.0], [10.0, 40.0]]},
+    {"text": "$250,000.00", "score": 0.87, "box": [[150.0, 22.0], [260.0, 22.0], [260.0, 42.0], [150.0, 42.0]],
+     "refined": True},
+]
+
+
+def test_dict_round_trip_keeps_lines_and_extras():
+    pl = PageLines.from_dicts(LINES)
+    assert len(pl) == 3 and pl.extras == {2: {"refined": True}}
+    assert pl.to_dicts() == LINES
+    assert list(pl) == LINES
+    assert pl[-1]["refined"] is True
+
+
+def test_from_dicts_passes_page_lines_through():
+    pl = PageLines.from_dicts(LINES)
+    assert PageLines.from_dicts(pl) is pl
+    assert page_lines({"lines": pl}) is pl
+    assert len(page_lines({"lines": None})) == 0
+
+
+def test_json_round_trip():
+    page = {"page_index": 0, "lines": PageLines.from_dicts(LINES), "ocr_seconds": np.float32(0.5)}
+    loaded = json.loads(json.dumps(page, default=json_default))
+    assert loaded["lines"] == LINES and loaded["ocr_seconds"] == 0.5
+    assert page_lines(loaded).to_dicts() == LINES
+
+
+def test_empty_round_trip():
+    pl = PageLines.from_dicts([])
+    assert pl.to_dicts() == [] and pl.boxes.shape == (0, 4, 2)
+    assert pl.near_y(10, 5).tolist() == []
+
+
+def test_near_y_uses_top_edge_inclusive_window():
+    pl = PageLines.from_dicts(LINES)
+    assert pl.near_y(20, 2).tolist() == [1, 2]
+    assert pl.near_y(20, 1).tolist() == [1]
+    assert pl.near_y(110, 10).tolist() == [0]
+    assert pl.near_y(60, 10).tolist() == []
+
+
+def test_take_and_sorted_remap_extras():
+    pl = PageLines.from_dicts(LINES).sorted()
+    assert pl.texts == ["Loan Amount", "$250,000.00", "Borrower: Jane Doe"]
+    assert pl.extras == {1: {"refined": True}}
+    assert pl.to_dicts()[1] == LINES[2]
+
+
+def test_with_texts_and_set_line_keep_geometry():
+    pl = PageLines.from_dicts(LINES)
+    fixed = pl.with_texts([t.upper() for t in pl.texts])
+    assert fixed.boxes is pl.boxes and fixed[0]["text"] == "BORROWER: JANE DOE"
+    fixed.set_line(1, "Loan Amt", 0.5, refined=True)
+    assert fixed[1] == {**LINES[1], "text": "Loan Amt", "score": 0.5, "refined": True}
+    assert pl.texts[1] == "Loan Amount" and 1 not in pl.extras
+
+
+def test_from_paddle_matches_dicts():
+    raw = [[[l["box"], (l["text"], l["score"])] for l in LINES]]
+    assert PageLines.from_paddle(raw).to_dicts() == [{k: l[k] for k in ("text", "score", "box")} for l in LINES]
+    assert len(PageLines.from_paddle([None])) == 0
@@ -0,0 +1,107 @@
+from typing import Any, Dict, List, Tuple
+import json
+
+import pytest
+
+from src.llm_backends import (LLMExtractor, Usage, FakeExtractor, OpenAICompatExtractor, BACKENDS,
+                              make_extractor, parse_model_spec, register_backend)
+from src.llm_cache import ResponseCache, SqliteResponseCache
+
+
+class ScriptedExtractor(LLMExtractor):
+    """Answers each prompt from `answer(prompt)` and records the prompts it saw."""
+    backend = "scripted"
+
+    def __init__(self, answer, model: str = "test", **kw):
+        kw.setdefault("retries", 1)
+        kw.setdefault("delay", 0)
+        super().__init__(model, **kw)
+        self.answer = answer
+        self.prompts: List[str] = []
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        self.prompts.append(prompt)
+        return json.dumps(self.answer(prompt)), {}
+
+
+LAYOUT: Dict[str, Any] = {"pages": []}
+
+
+def test_batched_answer_in_requested_format_is_not_retried():
+    ex = ScriptedExtractor(lambda _p: {"loan_amount": "475950.00", "lender_nmls_id": "3901",
+                                       "recording_date": "04/01/2025"})
+    out = ex.extract_fields(LAYOUT, ["loan_amount", "lender_nmls_id", "recording_date"])
+    assert out == {"loan_amount": "475950.00", "lender_nmls_id": "3901", "recording_date": "04/01/2025"}
+    assert len(ex.prompts) == 1
+
+
+def test_invalid_batched_field_gets_its_own_call():
+    ex = ScriptedExtractor(lambda p: {"loan_amount": "475950.00", "lender_nmls_id": "NMLS none"}
+                           if "following fields" in p else {"lender_nmls_id": "3901"})
+    out = ex.extract_fields(LAYOUT, ["loan_amount", "lender_nmls_id"])
+    assert out == {"loan_amount": "475950.00", "lender_nmls_id": "3901"}
+    assert len(ex.prompts) == 2
+
+
+def test_cache_hit_skips_the_backend():
+    cache = ResponseCache()
+    ex = ScriptedExtractor(lambda _p: {"lender_nmls_id": "3901"}, cache=cache)
+    assert ex.extract_full(LAYOUT) == ex.extract_full(LAYOUT) == {"lender_nmls_id": "3901"}
+    assert len(ex.prompts) == 1
+    assert cache.stats()["hits"] == 1
+    ex.extract_full({"pages": [{"page_index": 0, "lines": []}]})  # different prompt: miss
+    assert len(ex.prompts) == 2
+
+
+def test_cache_key_includes_the_model():
+    cache = ResponseCache()
+    flash = ScriptedExtractor(lambda _p: {"lender_nmls_id": "3901"}, model="flash", cache=cache)
+    pro = ScriptedExtractor(lambda _p: {"lender_nmls_id": "65175"}, model="pro", cache=cache)
+    assert flash.extract_full(LAYOUT) == {"lender_nmls_id": "3901"}
+    assert pro.extract_full(LAYOUT) == {"lender_nmls_id": "65175"}
+    assert len(pro.prompts) == 1
+
+
+def test_sqlite_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    first = ScriptedExtractor(lambda _p: {"lender_nmls_id": "3901"},
+                              cache=ResponseCache(disk=SqliteResponseCache(path)))
+    first.extract_full(LAYOUT)
+    again = ScriptedExtractor(lambda _p: {"lender_nmls_id": "wrong"},
+                              cache=ResponseCache(disk=SqliteResponseCache(path)))
+    assert again.extract_full(LAYOUT) == {"lender_nmls_id": "3901"}
+    assert again.prompts == []
+
+
+@pytest.mark.parametrize("spec, parsed", [
+    ("gemini-1.5-flash", ("gemini", "gemini-1.5-flash")),
+    ("gemini-rest:gemini-1.5-pro", ("gemini-rest", "gemini-1.5-pro")),
+    ("gemini-async:gemini-1.5-flash", ("gemini-async", "gemini-1.5-flash")),
+    ("local:qwen2.5-7b-instruct", ("local", "qwen2.5-7b-instruct")),
+    ("fake:C:/records/deed.json", ("fake", "C:/records/deed.json")),
+    ("rules", ("rules", "")),
+])
+def test_parse_model_spec(spec, parsed):
+    assert parse_model_spec(spec) == parsed
+
+
+def test_unknown_backend_prefix_is_an_error():
+    with pytest.raises(ValueError, match="anthropic"):
+        parse_model_spec("anthropic:claude")
+    with pytest.raises(ValueError):
+        make_extractor("vllm:qwen2.5-7b")
+
+
+def test_make_extractor_builds_registered_backends(monkeypatch):
+    ex = make_extractor("local:qwen2.5-7b", base_url="http://gpu-box:8000/v1/")
+    assert isinstance(ex, OpenAICompatExtractor)
+    assert (ex.model, ex.base_url) == ("qwen2.5-7b", "http://gpu-box:8000/v1")
+    monkeypatch.setitem(BACKENDS, "canned", BACKENDS["fake"])
+    assert parse_model_spec("canned") == ("canned", "")
+    register_backend("scripted", lambda model, **kw: ScriptedExtractor(lambda _p: {}, model=model, **kw))
+    try:
+        ex = make_extractor("scripted:v2")
+        assert isinstance(ex, ScriptedExtractor) and ex.model == "v2"
+    finally:
+        BACKENDS.pop("scripted")
+    assert isinstance(make_extractor("rules"), FakeExtractor)
@@ -0,0 +1,44 @@
+import time
+import threading
+
+from src.metrics import Metrics, current_rss_mb
+from src.ocr import OCRService, OCRConfig
+from benchmarks.stubs import CannedPaddleOCR, write_synthetic_pdf
+
+
+def test_stage_cpu_is_this_threads_and_rss_is_a_delta():
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    busy = threading.Thread(target=spin)
+    busy.start()
+    m = Metrics("deed.pdf")
+    try:
+        with m.stage("wait"):
+            time.sleep(0.3)
+        with m.stage("alloc"):
+            block = bytearray(64 * 1024 * 1024)
+            block[::4096] = b"x" * len(block[::4096])  # touch every page
+    finally:
+        stop.set()
+        busy.join()
+    assert m.stages["wait"]["wall_s"] >= 0.3
+    assert m.stages["wait"]["cpu_s"] < 0.1  # the spinning thread is not this stage's CPU
+    assert current_rss_mb() is not None
+    assert m.stages["alloc"]["rss_delta_mb"] >= 50
+    assert m.stages["wait"]["rss_mb"] is not None
+    del block
+
+
+def test_pages_carry_cpu_and_rss(tmp_path):
+    pdf = write_synthetic_pdf(tmp_path / "deed.pdf", [["MORTGAGE"]] * 2)
+    svc = OCRService(OCRConfig(dpi=72, text_layer=False, skip_blank=False), ocr=CannedPaddleOCR())
+    m = Metrics("deed.pdf")
+    m.record_pages(svc.run_stream(str(pdf)))
+    for page in m.pages:
+        assert page["render_cpu_s"] is not None and page["ocr_cpu_s"] is not None
+        assert page["rss_mb"] > 0
+    assert m.summary()["ocr_cpu_s"] >= 0
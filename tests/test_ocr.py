@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import src.ocr as ocr_mod
+from src.ocr import OCRService, OCRConfig
+from benchmarks.stubs import CannedPaddleOCR, write_synthetic_pdf
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return write_synthetic_pdf(tmp_path / "deed.pdf", [["MORTGAGE", "Lender NMLS ID 3901"]] * 3)
+
+
+def _service(**kw):
+    return OCRService(OCRConfig(dpi=72, text_layer=False, skip_blank=False, **kw), ocr=CannedPaddleOCR())
+
+
+def test_run_stream_ocrs_every_page(pdf):
+    pages = _service().run_stream(str(pdf))
+    assert [p["page_index"] for p in pages] == [0, 1, 2]
+
+
+def test_run_stream_fails_on_render_error(pdf, monkeypatch):
+    real = ocr_mod.render_page
+    calls = []
+
+    def flaky(page, *a, **kw):
+        calls.append(page.number)
+        if page.number == 1:
+            raise RuntimeError("corrupt page stream")
+        return real(page, *a, **kw)
+
+    monkeypatch.setattr(ocr_mod, "render_page", flaky)
+    with pytest.raises(RuntimeError, match="corrupt page stream"):
+        _service().run_stream(str(pdf))
+
+
+def test_split_retry_keeps_every_detected_line():
+    paddle = CannedPaddleOCR([["MORTGAGE", "Lender NMLS ID 3901", "Principal $475,950.00", "Recorded 04/01/2025",
+                               "Borrower ELIZABETH HOWERTON"]], fail_full=1)
+    svc = OCRService(OCRConfig(skip_blank=False, use_angle_cls=False), ocr=paddle)
+    page = svc.run_page(0, np.full((800, 600, 3), 255, np.uint8))
+    assert page["ocr_attempt"] == "det+rec"
+    assert len(page["lines"]) == 5
+    # a second, longer split must not be truncated by Paddle's page_num
+    paddle.use([["line %d" % i for i in range(9)]])
+    paddle.fail_full = 1
+    assert len(svc.run_page(1, np.full((800, 600, 3), 255, np.uint8))["lines"]) == 9
+
+
+def test_refine_rereads_every_uncertain_line(pdf):
+    # canned detection scores 0.97, canned recognition 0.99: every line is a candidate and improves
+    pages = _service(refine_dpi=150, refine_below=0.98).run_stream(str(pdf))
+    assert [p["refined"] for p in pages] == [len(p["lines"]) for p in pages]
+    assert all(len(p["lines"]) > 1 for p in pages)
+    assert all(line["refined"] for p in pages for line in p["lines"])
+
+
+def test_blank_check_runs_once_per_page_on_the_thumbnail(tmp_path, monkeypatch):
+    import src.blank as blank_mod
+    measured = []
+    real = blank_mod.ink_ratio
+    monkeypatch.setattr(blank_mod, "ink_ratio", lambda gray, *a, **kw: measured.append(gray.shape) or real(gray, *a, **kw))
+    pdf = write_synthetic_pdf(tmp_path / "deed.pdf", [["MORTGAGE", "Lender NMLS ID 3901"], []])
+    paddle = CannedPaddleOCR()
+    pages = OCRService(OCRConfig(dpi=72, text_layer=False), ocr=paddle).run_stream(str(pdf))
+    assert [p["source"] for p in pages] == ["ocr", "blank"]
+    assert len(measured) == 2 and max(max(shape) for shape in measured) <= 256
+    assert paddle.calls == ["det+rec"]
@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import fitz
+import pytest
+
+from src.ocr_cache import OCRCache
+from benchmarks.stubs import write_synthetic_pdf
+
+LINES = [{"text": "Lender NMLS ID 3901", "score": 0.97, "box": [[10, 10], [200, 10], [200, 30], [10, 30]]}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OCRCache(str(tmp_path / "cache"))
+
+
+def _key(pdf, settings, page=0):
+    with fitz.open(str(pdf)) as doc:
+        return OCRCache.page_key(doc[page], settings)
+
+
+def test_put_then_get_hits(cache):
+    assert cache.get("ab" * 32, 0) is None
+    cache.put("ab" * 32, {"lines": LINES})
+    page = cache.get("ab" * 32, 3)
+    assert page["page_index"] == 3 and page["source"] == "cache"
+    assert page["lines"].texts == ["Lender NMLS ID 3901"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_follows_content_and_settings_not_file_name(tmp_path):
+    pdf = write_synthetic_pdf(tmp_path / "a.pdf", [["MORTGAGE"], ["DEED OF TRUST"]])
+    copy = shutil.copy(pdf, tmp_path / "b.pdf")
+    key = _key(pdf, {"dpi": 300})
+    assert _key(copy, {"dpi": 300}) == key
+    assert _key(pdf, {"dpi": 150}) != key
+    assert _key(pdf, {"dpi": 300}, page=1) != key
+
+
+def test_overwrite_is_not_counted_twice(cache):
+    for _ in range(3):
+        cache.put("cd" * 32, {"lines": LINES})
+    assert cache._size == os.path.getsize(cache._path("cd" * 32))
+
+
+def test_evicts_least_recently_used(cache):
+    keys = ["%02d" % i * 32 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, {"lines": LINES})
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    entry = os.path.getsize(cache._path(keys[0]))
+    cache.max_bytes = 4 * entry
+    cache.get(keys[1], 0)  # touch: now the most recently used
+    cache.put("99" * 32, {"lines": LINES})  # 5 entries: evict down to 90% of 4
+    assert cache._size == 3 * entry
+    assert [cache.get(k, 0) is not None for k in keys] == [False, True, False, True]
@@ -0,0 +1,111 @@
+import json
+from typing import List, Tuple
+
+import pytest
+
+from src.ocr import OCRService, OCRConfig
+from src.llm_backends import LLMExtractor, Usage
+from src.pipeline import PipelineEngine
+from src.lines import page_lines
+from benchmarks.stubs import CannedPaddleOCR, write_synthetic_pdf
+
+RECORD = {"borrowers": ["ELIZABETH HOWERTON"], "loan_amount": "475950.00", "recording_date": "04/01/2025",
+          "recording_location": "Albany County, New York", "lender_name": "US Mortgage Corporation",
+          "lender_nmls_id": "3901", "broker_name": None, "loan_originator_name": "William John Lane",
+          "loan_originator_nmls_id": None}
+
+
+class QuotaExtractor(LLMExtractor):
+    """Full-document call answers RECORD; field calls fail while `quota` is exhausted."""
+    backend = "quota"
+
+    def __init__(self, quota: bool = True):
+        super().__init__("test", retries=1, delay=0)
+        self.quota = quota
+        self.calls: List[str] = []
+
+    def _complete(self, prompt: str) -> Tuple[str, Usage]:
+        kind = "full" if "all fields, even if" in prompt else "fields"
+        self.calls.append(kind)
+        if kind == "fields" and not self.quota:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED")
+        return json.dumps(RECORD if kind == "full" else {"loan_originator_nmls_id": "65175",
+                                                         "broker_name": None}), {}
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return write_synthetic_pdf(tmp_path / "deed.pdf", [["MORTGAGE"]])
+
+
+def _engine(work_dir, extractor):
+    cfg = OCRConfig(dpi=72, text_layer=False, skip_blank=False)
+    return PipelineEngine(ocr_cfg=cfg, ocr=OCRService(cfg, ocr=CannedPaddleOCR()), extractor=extractor,
+                          work_dir=str(work_dir))
+
+
+def test_failed_field_calls_are_not_checkpointed_and_resume_later(pdf, tmp_path):
+    work = tmp_path / "work"
+    with pytest.raises(RuntimeError):
+        _engine(work, QuotaExtractor(quota=False)).process_document(str(pdf))
+    (doc_dir,) = list(work.iterdir())
+    assert sorted(f.name for f in doc_dir.iterdir()) == ["full.json.gz", "layout.json.gz",
+                                                         "ocr.json.gz", "preprocess.json.gz"]
+
+    extractor = QuotaExtractor(quota=True)
+    result = _engine(work, extractor).process_document(str(pdf))
+    assert "full" not in extractor.calls  # full extraction resumed from its checkpoint
+    assert result.data["loan_originator_nmls_id"] == "65175"
+    assert list(work.iterdir()) == []  # finished documents leave no checkpoints behind
+
+
+def test_fresh_run_ignores_checkpoints(pdf, tmp_path):
+    work = tmp_path / "work"
+    with pytest.raises(RuntimeError):
+        _engine(work, QuotaExtractor(quota=False)).process_document(str(pdf))
+    engine = _engine(work, QuotaExtractor(quota=True))
+    cleaned, meta = engine.ocr_document(str(pdf), fresh=True)
+    engine.extract_document(cleaned, meta)
+    assert engine.extractor.calls[0] == "full"
+
+
+def test_pages_paddle_gave_up_on_are_not_checkpointed(pdf, tmp_path):
+    class Broken(CannedPaddleOCR):
+        def ocr(self, img, cls=True, **kw):
+            raise RuntimeError("segfault-ish failure")
+
+    cfg = OCRConfig(dpi=72, text_layer=False, skip_blank=False, ocr_budget_s=0)
+    engine = PipelineEngine(ocr_cfg=cfg, ocr=OCRService(cfg, ocr=Broken()), work_dir=str(tmp_path / "work"),
+                            extractor=QuotaExtractor())
+    engine.ocr_document(str(pdf))
+    (doc_dir,) = list((tmp_path / "work").iterdir())
+    assert not (doc_dir / "ocr.json.gz").exists()
+
+
+def test_stages_after_a_failed_ocr_are_not_reused(pdf, tmp_path):
+    class Broken(CannedPaddleOCR):
+        def ocr(self, img, cls=True, **kw):
+            raise RuntimeError("segfault-ish failure")
+
+    cfg = OCRConfig(dpi=72, text_layer=False, skip_blank=False, ocr_budget_s=0)
+    work = str(tmp_path / "work")
+    broken = PipelineEngine(ocr_cfg=cfg, ocr=OCRService(cfg, ocr=Broken()), work_dir=work, extractor=QuotaExtractor())
+    cleaned, _meta = broken.ocr_document(str(pdf))
+    assert not any(p["lines"] for p in cleaned)
+
+    paddle = CannedPaddleOCR([["MORTGAGE", "Lender NMLS ID 3901"]])
+    working = PipelineEngine(ocr_cfg=cfg, ocr=OCRService(cfg, ocr=paddle), work_dir=work, extractor=QuotaExtractor())
+    cleaned, _meta = working.ocr_document(str(pdf))
+    assert page_lines(cleaned[0]).texts == ["MORTGAGE", "Lender NMLS ID 3901"]
+
+
+def test_ocr_settings_are_part_of_the_checkpoint_key(pdf, tmp_path):
+    def doc_id(**kw):
+        engine = _engine(tmp_path / "work", QuotaExtractor())
+        for k, v in kw.items():
+            setattr(engine.ocr_cfg, k, v)
+        return engine.checkpoints.doc_id(str(pdf), engine._settings())
+
+    base = doc_id()
+    for change in ({"text_layer_min_chars": 10}, {"refine_anchors": False}, {"refine_max_lines": 5}):
+        assert doc_id(**change) != base, change
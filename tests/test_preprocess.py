@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from src.preprocess import TextNormalizer, fix_common_misreads, preprocess_pages
+from benchmarks.bench_preprocess import reference_fix, corpus, _EDGE_LINES
+
+RECORDS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Mortgage_PDF_outputs")
+
+# the NMLS rule is case-insensitive on both the prefix and the O
+NMLS_CASES = [
+    ("NMLS o123", "NMLS 0123"),
+    ("nmls# O45", "nmls# 045"),
+    ("NMLS: o7", "NMLS: 07"),
+    ("Nmls ID o3901", "Nmls ID o3901"),
+    ("NMLSo", "NMLSo"),
+    ("NMLS oO1", "NMLS oO1"),
+]
+
+
+@pytest.fixture(scope="module")
+def pages():
+    return corpus(RECORDS, pages=20, lines=40, fuzz=50, seed=7)
+
+
+@pytest.mark.parametrize("line", _EDGE_LINES)
+def test_edge_lines_match_reference(line):
+    assert fix_common_misreads(line) == reference_fix(line)
+    assert TextNormalizer().normalize_lines([line, line]) == [reference_fix(line)] * 2
+
+
+@pytest.mark.parametrize("line,expected", NMLS_CASES)
+def test_nmls_o(line, expected):
+    assert reference_fix(line) == expected
+    assert fix_common_misreads(line) == expected
+
+
+def test_corpus_and_fuzz_match_reference(pages):
+    norm = TextNormalizer()
+    for page in pages:
+        expected = [reference_fix(t) for t in page]
+        assert [fix_common_misreads(t) for t in page] == expected
+        assert norm.normalize_lines(page) == expected
+
+
+def test_lines_containing_separator_fall_back_per_line():
+    page = ["1,2O0\x00S", "$O5"]
+    assert TextNormalizer().normalize_lines(page) == [reference_fix(t) for t in page]
+
+
+def test_preprocess_pages_matches_reference(pages):
+    page = pages[0]
+    src = [{"page_index": 0, "lines": [{"text": t, "score": 0.9, "box": [[0, i], [9, i], [9, i + 1], [0, i + 1]]}
+                                       for i, t in enumerate(page)]}]
+    out = preprocess_pages(src)
+    assert out[0]["lines"].texts == [reference_fix(t) for t in page]
@@ -0,0 +1,32 @@
+from src.rules import RuleExtractor, split_names, plain_amount
+from src.validate import is_valid
+
+
+def _page(texts):
+    lines = [{"text": t, "score": 0.99, "box": [[50, 40 * i], [900, 40 * i], [900, 40 * i + 20], [50, 40 * i + 20]]}
+             for i, t in enumerate(texts, start=1)]
+    return {"page_index": 0, "lines": lines}
+
+
+def test_rule_values_have_the_llm_output_shape():
+    page = _page([
+        'MORTGAGE',
+        '"Borrower" is ELIZABETH HOWERTON AND TRAVIS HOWERTON, husband and wife.',
+        '"Lender" is US Mortgage Corporation.',
+        'Borrower owes Lender the principal sum of U.S. $475,950.00',
+        'Recorded 04/01/2025 Albany County Clerk',
+        'Lender NMLS ID 3901',
+    ])
+    out = RuleExtractor().extract([page])
+    assert out["borrowers"] == ["ELIZABETH HOWERTON", "TRAVIS HOWERTON"]
+    assert out["loan_amount"] == "475950.00"
+    assert out["recording_date"] == "04/01/2025"
+    assert out["lender_name"] == "US Mortgage Corporation"
+    assert out["lender_nmls_id"] == "3901"
+    assert all(is_valid(k, v) for k, v in out.items())
+
+
+def test_split_names_and_plain_amount():
+    assert split_names("JOHN DOE & JANE DOE; MARY ROE, as joint tenants") == ["JOHN DOE", "JANE DOE", "MARY ROE"]
+    assert split_names("JOHN SMITH, a single man") == ["JOHN SMITH"]
+    assert plain_amount("$1,200") == "1200.00"
@@ -0,0 +1,43 @@
+import json
+import threading
+import http.client
+
+import pytest
+
+from src.service import ExtractionService, ServiceHTTPServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    # workers are never started: uploads stay queued, which is all these requests need
+    httpd = ServiceHTTPServer(("127.0.0.1", 0), ExtractionService(None, tmp_path / "uploads"))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _request(httpd, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=5)
+    try:
+        conn.putrequest(method, path)
+        for k, v in (headers or {}).items():
+            conn.putheader(k, v)
+        conn.endheaders(body)
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read() or b"null")
+    finally:
+        conn.close()
+
+
+def test_malformed_content_length_is_a_bad_request(server):
+    status, body = _request(server, "POST", "/jobs", b"%PDF-1.4", {"Content-Length": "12abc"})
+    assert status == 400 and "Content-Length" in body["error"]
+
+
+def test_malformed_wait_is_a_bad_request(server):
+    status, job = _request(server, "POST", "/jobs?name=deed.pdf", b"%PDF-1.4", {"Content-Length": "8"})
+    assert status == 202
+    status, body = _request(server, "GET", f"/jobs/{job['id']}/result?wait=soon")
+    assert status == 400 and "wait" in body["error"]
+    assert _request(server, "GET", f"/jobs/{job['id']}/result?wait=0")[0] == 202
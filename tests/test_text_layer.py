@@ -0,0 +1,49 @@
+import fitz
+import pytest
+
+from src.ocr import OCRService, OCRConfig
+from benchmarks.stubs import CannedPaddleOCR, write_synthetic_pdf
+
+BODY = ["MORTGAGE", "Borrower ELIZABETH HOWERTON", "Lender NMLS ID 3901", "Principal $475,950.00"]
+STAMP = "RECORDED 04/01/2025 10:32 AM ALBANY COUNTY CLERK DOC# 2025-000123"
+
+
+def _service(**kw):
+    return OCRService(OCRConfig(dpi=72, skip_blank=False, **kw), ocr=CannedPaddleOCR([BODY]))
+
+
+@pytest.fixture
+def stamped_scan(tmp_path):
+    """Image-only scan with a recording stamp added as real text, as county clerks do."""
+    scan = write_synthetic_pdf(tmp_path / "scan.pdf", [BODY])
+    with fitz.open(str(scan)) as doc:
+        doc[0].insert_text((40, 30), STAMP, fontsize=8)
+        doc.save(str(tmp_path / "stamped.pdf"))
+    return tmp_path / "stamped.pdf"
+
+
+@pytest.fixture
+def digital(tmp_path):
+    with fitz.open() as doc:
+        page = doc.new_page(width=612, height=792)
+        for i, text in enumerate(BODY * 6):
+            page.insert_text((72, 72 + 18 * i), text, fontsize=11)
+        doc.save(str(tmp_path / "digital.pdf"))
+    return tmp_path / "digital.pdf"
+
+
+def test_stamped_scan_is_ocrd(stamped_scan):
+    (page,) = _service().run_stream(str(stamped_scan))
+    assert page["source"] == "ocr"
+    assert [l["text"] for l in page["lines"]] == BODY
+
+
+def test_digital_page_uses_text_layer(digital):
+    (page,) = _service().run_stream(str(digital))
+    assert page["source"] == "text"
+    assert [l["text"] for l in page["lines"]][:4] == BODY
+
+
+def test_text_layer_off_ocrs_digital_page(digital):
+    (page,) = _service(text_layer=False).run_stream(str(digital))
+    assert page["source"] == "ocr"
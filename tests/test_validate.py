@@ -0,0 +1,34 @@
+import pytest
+
+from src.validate import is_valid, validate_records
+
+
+@pytest.mark.parametrize("value, valid", [
+    ("04/01/2025", True), ("31/12/2025", True), ("2025-04-01", True), ("April 1, 2025", True),
+    # dateparser reads a 0 component as "unspecified" and YYYY-DD-MM the other way round
+    ("00/12/2025", True), ("12/00/2025", True), ("2025-13-01", True),
+    ("31.00.1990", True), ("00-07-25", True), ("05/00/2025 10:32 AM", True),
+    ("13/45/2025", False), ("02/30/2025", False), ("2025-02-30", False), ("April 31, 2025", False),
+    ("00/00/2025", False), ("00/32/2025", False), ("13/00/25", False), ("2025-05-00", False),
+    ("March 0, 2020", False), ("30 February 2020", False),
+])
+def test_recording_date_matches_dateparser(value, valid):
+    assert is_valid("recording_date", value) is valid
+
+
+@pytest.mark.parametrize("value, valid", [
+    ("$475,950.00", True), ("475950.00", True), ("475,950.00", True), ("1000.00", True),
+    ("12207", False), ("3901", False), ("475950", False), ("99.50", False), (None, False),
+])
+def test_loan_amount_needs_a_money_shape(value, valid):
+    assert is_valid("loan_amount", value) is valid
+
+
+def test_validate_records_checks_each_date_string_once(monkeypatch):
+    import src.validate as validate
+    seen = []
+    monkeypatch.setattr(validate, "_parse_date", lambda v: seen.append(v) or v == "Recorded April 1")
+    records = [{"recording_date": d} for d in ["Recorded April 1", "N/A", "04/01/2025"] * 50]
+    results = validate_records(records, ["recording_date"])
+    assert [ok["recording_date"] for _, ok in results[:3]] == [True, False, True]
+    assert sorted(seen) == ["N/A", "Recorded April 1"]